@@ -7,7 +7,7 @@ covariance matrix.
 
 created by Daniel Haenelt
 Date created: 08-03-2019
-Last modified: 11-03-2019
+Last modified: 18-10-2026
 """
 import os
 import numpy as np
@@ -40,17 +40,16 @@ nsigma = 1 # draw <nsigma>-sigma intervals in the output plot
 if not os.path.exists(path_output):
     os.makedirs(path_output)
 
-def get_percentile(input_data, input_cmap, input_distance, min_percentile, max_percentile, min_distance, max_distance):
+def get_percentile(input_data, cmap, distance, min_percentile, max_percentile, min_distance, max_distance):
     """
     This function selects the voxels which will be considered in further analysis. Voxels are 
     selected based on their corresponding minimum or maximum length and based on the chose 
-    percentile of their coherence value. 
+    percentile of their coherence value. Grid coordinate mapping and distance map are passed as 
+    arrays, i.e. they are only loaded once per hemisphere.
     """
     
     # load data
     data = nb.load(input_data).get_fdata()
-    cmap = nb.load(input_cmap).get_fdata().astype(int)
-    distance = nb.load(input_distance).get_fdata()
     
     # get coordinates within ROI
     distance = distance[cmap != 0]
@@ -69,6 +68,15 @@ def get_percentile(input_data, input_cmap, input_distance, min_percentile, max_p
     
     return cmap
 
+# load cmap and distance map once per hemisphere
+cmap_grid = []
+distance_grid = []
+for i in range(len(hemi)):
+    input_cmap = os.path.join(path_ortho,hemi[i]+"."+file_patch+".patch.flat.cmap.nii")
+    input_distance = os.path.join(path_ortho,hemi[i]+"."+file_patch+".iso_distance.nii")
+    cmap_grid.append(nb.load(input_cmap).get_fdata().astype(int))
+    distance_grid.append(nb.load(input_distance).get_fdata())
+
 # get cmap intersection
 cmap = []
 cmap_hemi = []    
@@ -78,11 +86,9 @@ for i in range(len(hemi)):
         cmap_layer = []
             
         # load data
-        input_cmap = os.path.join(path_ortho,hemi[i]+"."+file_patch+".patch.flat.cmap.nii")
-        input_distance = os.path.join(path_ortho,hemi[i]+"."+file_patch+".iso_distance.nii")
         input_data = os.path.join(path_data,hemi[i]+".c_multipol_"+str(j)+"_def-img_layer"+str(layer_percentile)+"_def.mgh")
                 
-        c = get_percentile(input_data, input_cmap, input_distance, min_percentile, max_percentile, min_distance, max_distance)
+        c = get_percentile(input_data, cmap_grid[i], distance_grid[i], min_percentile, max_percentile, min_distance, max_distance)
         cmap_layer.append(c)
     
         temp = cmap_layer[0].copy()
@@ -104,11 +110,8 @@ distance = []
 for i in range(len(hemi)):
     
     # load data
-    input_cmap = os.path.join(path_ortho,hemi[i]+"."+file_patch+".patch.flat.cmap.nii")
-    input_distance = os.path.join(path_ortho,hemi[i]+"."+file_patch+".iso_distance.nii")
-    
-    c = nb.load(input_cmap).get_fdata().astype(int)
-    d = nb.load(input_distance).get_fdata()
+    c = cmap_grid[i]
+    d = distance_grid[i]
     cmap_temp = np.append(cmap_temp, c)
     distance_temp = np.append(distance_temp, d)
 
@@ -3,3 +3,5 @@ from .crop_coordinate_mapping import crop_coordinate_mapping
 from .remove_edge_cmap import remove_edge_cmap
 from .clean_coordinate_mapping import clean_coordinate_mapping
 from .expand_coordinate_mapping import expand_coordinate_mapping
+from .coordinate_mapping import CoordinateMapping
+from .compose_coordinate_mapping import compose_coordinate_mapping
@@ -0,0 +1,155 @@
+def compose_coordinate_mapping(mappings, target=None, interpolation="linear", padding="zero",
+                               chunk_size=1000000, file_out=None):
+    """
+    This function composes a chain of coordinate mappings into one coordinate mapping. The mappings
+    are listed in the order in which they deform a source image (same as mapping1, mapping2, ... in
+    apply_coordinate_mappings of nighres), i.e. the first mapping contains coordinates in the
+    source space and the last mapping defines the target grid. Consecutive affine transformations
+    are multiplied into one matrix. For chunks of target voxels, coordinates are then pushed through
+    the chain and each dense mapping is interpolated once at the final coordinates. Therefore, no
+    intermediate cmaps are resampled or written. Each list item can be
+        - a cmap filename or nibabel image (dense mapping),
+        - a CoordinateMapping instance,
+        - a 4x4 array which transforms target voxel coordinates to source voxel coordinates,
+        - a freesurfer lta file (vox2vox transformation from source to target),
+        - a tuple (transformation file, source image, target image) for fsl matrix files or lta
+          files whose source and target grids should be known.
+    With zero padding, target voxels which are mapped outside of a dense mapping (or outside of the
+    source grid of a transformation with known grid) are set to zero. With closest padding,
+    coordinates are clamped to the borders of dense mappings.
+    Inputs:
+        *mappings: list of coordinate mappings.
+        *target: filename or nibabel image of target grid (necessary if the last mapping has no
+            grid).
+        *interpolation: interpolation method of dense mappings (nearest, linear).
+        *padding: padding method (zero, closest).
+        *chunk_size: number of target voxels evaluated at once.
+        *file_out: filename of written cmap (opt).
+    Outputs:
+        *cmap: composed CoordinateMapping instance.
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import os
+    import sys
+    import numpy as np
+    import nibabel as nb
+    from lib.io.read_vox2vox import read_vox2vox
+    from lib.cmap.coordinate_mapping import CoordinateMapping
+    from lib.utils.sample_volume import sample_volume
+
+    if interpolation == "linear":
+        interpolation = "trilinear"
+    elif interpolation != "nearest":
+        sys.exit("Choose a valid interpolation method!")
+
+    if padding not in ["zero", "closest"]:
+        sys.exit("Choose a valid padding method!")
+
+    if not len(mappings):
+        sys.exit("At least one coordinate mapping has to be given!")
+
+    # convert list items to CoordinateMapping instances (affine items without grid are kept as
+    # matrices)
+    cmaps = []
+    for m in mappings:
+        if isinstance(m, CoordinateMapping):
+            cmaps.append(m)
+        elif isinstance(m, tuple):
+            file_m, source, target_m = m
+            if isinstance(source, str):
+                source = nb.load(source)
+            if isinstance(target_m, str):
+                target_m = nb.load(target_m)
+            _, Minv = read_vox2vox(file_m, source, target_m)
+            cmaps.append(CoordinateMapping(target_m.shape[:3], M=Minv, affine=target_m.affine,
+                                           header=target_m.header,
+                                           dim_source=source.shape[:3]))
+        elif isinstance(m, str) and os.path.splitext(m)[1] == ".lta":
+            _, Minv = read_vox2vox(m)
+            cmaps.append(Minv)
+        elif isinstance(m, np.ndarray) and np.shape(m) == (4,4):
+            cmaps.append(np.asarray(m, dtype=np.float64))
+        else:
+            cmaps.append(CoordinateMapping.from_nifti(m))
+
+    # target grid
+    if target is not None:
+        if isinstance(target, str):
+            target = nb.load(target)
+        dim = target.shape[:3]
+        affine = target.affine
+        header = target.header
+    elif isinstance(cmaps[-1], CoordinateMapping):
+        dim = cmaps[-1].dim
+        affine = cmaps[-1].affine
+        header = cmaps[-1].header
+    else:
+        sys.exit("Target grid is unknown!")
+
+    # chain of links in evaluation order (from target to source), consecutive affine
+    # transformations are merged
+    links = []
+    for c in cmaps[::-1]:
+        if isinstance(c, CoordinateMapping) and not c.is_affine:
+            links.append(("dense", c.data, None))
+            continue
+
+        M = c.M if isinstance(c, CoordinateMapping) else c
+        dim_source = c.dim_source if isinstance(c, CoordinateMapping) else None
+        if len(links) and links[-1][0] == "affine":
+            M = np.dot(M, links[-1][1])
+            links[-1] = ("affine", M, dim_source)
+        else:
+            links.append(("affine", M, dim_source))
+
+    # identity mapping of target grid
+    if links[0][0] == "dense":
+        if np.shape(links[0][1])[:3] != tuple(dim):
+            sys.exit("Last coordinate mapping does not match the target grid!")
+        links.insert(0, ("affine", np.eye(4), None))
+
+    # all links are affine
+    if len(links) == 1:
+        cmap = CoordinateMapping(dim, M=links[0][1], affine=affine, header=header,
+                                 dim_source=links[0][2])
+        if file_out:
+            nb.save(cmap.get_nifti(dtype="float32"), file_out)
+
+        return cmap
+
+    # push coordinates of target voxels through the chain
+    cmap_identity = CoordinateMapping(dim, M=links[0][1])
+    data = np.zeros(tuple(dim) + (3,))
+    data_view = np.reshape(data, (-1, 3))
+    for ind, coords in cmap_identity.chunks(chunk_size):
+        is_valid = np.ones(len(ind), dtype=bool)
+        if padding == "zero" and links[0][2] is not None:
+            is_valid &= np.all((coords >= 0) & (coords <= np.array(links[0][2]) - 1), axis=1)
+
+        for link_type, link, dim_source in links[1:]:
+            if link_type == "affine":
+                coords = np.dot(coords, link[:3,:3].T) + link[:3,3]
+                if padding == "zero" and dim_source is not None:
+                    is_valid &= np.all((coords >= 0) & (coords <= np.array(dim_source) - 1),
+                                       axis=1)
+            else:
+                dim_link = np.array(np.shape(link)[:3])
+                if padding == "closest":
+                    coords = np.clip(coords, 0, dim_link - 1)
+                elif interpolation == "nearest":
+                    is_valid &= np.all((coords >= -0.5) & (coords < dim_link - 0.5), axis=1)
+                else:
+                    is_valid &= np.all((coords >= 0) & (coords <= dim_link - 1), axis=1)
+                coords = sample_volume(link, coords, interpolation)
+
+        coords[~is_valid] = 0
+        data_view[ind] = coords
+
+    cmap = CoordinateMapping(dim, data=data, affine=affine, header=header)
+    if file_out:
+        nb.save(cmap.get_nifti(dtype="float32"), file_out)
+
+    return cmap
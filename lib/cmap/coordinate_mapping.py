@@ -0,0 +1,215 @@
+class CoordinateMapping:
+    """
+    This class represents a coordinate mapping, i.e. the source voxel coordinates of each voxel in a
+    target grid. The mapping is either stored in a lazy affine form (4x4 matrix which transforms
+    target voxel coordinates to source voxel coordinates) or in a dense form (array with shape
+    (x, y, z, 3) as read from a cmap file). In the affine form, coordinates are only evaluated on
+    demand for requested voxels or in chunks of voxels. A dense array is only created if a consumer
+    needs it (materialize, get_nifti). Two mappings can be composed and affine mappings can be
+    inverted. The dense form is used as soon as a dense mapping is involved in a composition.
+    Inputs:
+        *dim: matrix size of target grid.
+        *M: affine transformation from target to source voxel coordinates (affine form).
+        *data: source coordinates with shape (x, y, z, 3) (dense form).
+        *affine: vox2ras transformation of target grid (used for writing).
+        *header: nifti header of target grid (used for writing).
+        *dim_source: matrix size of source grid (only necessary for inversion).
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    def __init__(self, dim, M=None, data=None, affine=None, header=None, dim_source=None):
+        import sys
+        import numpy as np
+
+        if (M is None) == (data is None):
+            sys.exit("Either an affine matrix or a dense coordinate array has to be given!")
+
+        self.dim = tuple(int(i) for i in dim[:3])
+        self.M = np.asarray(M, dtype=np.float64) if M is not None else None
+        self.data = data
+        self.affine = np.asarray(affine) if affine is not None else np.eye(4)
+        self.header = header
+        self.dim_source = tuple(int(i) for i in dim_source[:3]) if dim_source is not None else None
+
+        if self.data is not None and np.shape(self.data)[:3] != self.dim:
+            sys.exit("Dense coordinate array does not match the target grid!")
+
+    @classmethod
+    def identity(cls, dim, pad=0, affine=None, header=None):
+        """
+        Returns the identity mapping of a grid. With padding, the grid is expanded by pad voxels
+        in both directions of each axis (same as generate_coordinate_mapping).
+        """
+        import numpy as np
+
+        M = np.eye(4)
+        M[:3,3] = -pad
+        dim = np.asarray(dim[:3]) + 2 * pad
+
+        return cls(dim, M=M, affine=affine, header=header, dim_source=dim)
+
+    @classmethod
+    def from_scanner(cls, source_img, target_img):
+        """
+        Returns the mapping between two nibabel images in the same scanner coordinate system.
+        """
+        import numpy as np
+
+        M = np.linalg.inv(source_img.affine).dot(target_img.affine)
+
+        return cls(target_img.shape[:3], M=M, affine=target_img.affine, header=target_img.header,
+                   dim_source=source_img.shape[:3])
+
+    @classmethod
+    def from_nifti(cls, input):
+        """
+        Returns the dense mapping of a cmap file or nibabel image.
+        """
+        import numpy as np
+        import nibabel as nb
+
+        if isinstance(input, str):
+            input = nb.load(input)
+        data = np.asanyarray(input.dataobj)[:,:,:,:3]
+
+        return cls(input.shape[:3], data=data, affine=input.affine, header=input.header)
+
+    @property
+    def is_affine(self):
+        return self.M is not None
+
+    @property
+    def n_voxel(self):
+        import numpy as np
+
+        return int(np.prod(self.dim))
+
+    def evaluate(self, ind=None):
+        """
+        Returns the source coordinates of target voxels.
+        Inputs:
+            *ind: flat indices (C order) of target voxels (all voxels if not set).
+        Outputs:
+            *coords: source coordinates with shape (n_points, 3).
+        """
+        import numpy as np
+
+        if ind is None:
+            ind = np.arange(self.n_voxel)
+
+        if self.is_affine:
+            ijk = np.stack(np.unravel_index(ind, self.dim), axis=1).astype(np.float64)
+            return np.dot(ijk, self.M[:3,:3].T) + self.M[:3,3]
+        else:
+            return np.asarray(np.reshape(self.data, (-1, 3))[ind], dtype=np.float64)
+
+    def chunks(self, chunk_size=1000000):
+        """
+        Generator over chunks of target voxels.
+        Inputs:
+            *chunk_size: number of target voxels in one chunk.
+        Outputs:
+            *ind: flat indices of target voxels.
+            *coords: source coordinates with shape (n_points, 3).
+        """
+        import numpy as np
+
+        for i in range(0, self.n_voxel, chunk_size):
+            ind = np.arange(i, min(i + chunk_size, self.n_voxel))
+            yield ind, self.evaluate(ind)
+
+    def compose(self, other, interpolation="trilinear", chunk_size=1000000):
+        """
+        Returns the composition of both mappings, i.e. target coordinates of this mapping are
+        mapped to the source coordinates of the other mapping whose target grid is the source grid
+        of this mapping. Two affine mappings give an affine mapping. Otherwise, the other mapping
+        is sampled at the source coordinates of this mapping.
+        Inputs:
+            *other: coordinate mapping applied after this mapping.
+            *interpolation: interpolation of a dense other mapping (nearest, trilinear).
+            *chunk_size: number of target voxels evaluated at once.
+        Outputs:
+            *cmap: composed coordinate mapping on the target grid of this mapping.
+        """
+        import numpy as np
+        from lib.utils.sample_volume import sample_volume
+
+        if self.is_affine and other.is_affine:
+            return CoordinateMapping(self.dim, M=np.dot(other.M, self.M), affine=self.affine,
+                                     header=self.header, dim_source=other.dim_source)
+
+        data = np.zeros(self.dim + (3,))
+        data_view = np.reshape(data, (-1, 3))
+        for ind, coords in self.chunks(chunk_size):
+            if other.is_affine:
+                data_view[ind] = np.dot(coords, other.M[:3,:3].T) + other.M[:3,3]
+            else:
+                data_view[ind] = sample_volume(other.data, coords, interpolation)
+
+        return CoordinateMapping(self.dim, data=data, affine=self.affine, header=self.header,
+                                 dim_source=other.dim_source)
+
+    def inverse(self, affine=None, header=None):
+        """
+        Returns the inverse of an affine mapping. The target grid of the inverse mapping is the
+        source grid of this mapping.
+        Inputs:
+            *affine: vox2ras transformation of the source grid (used for writing).
+            *header: nifti header of the source grid (used for writing).
+        Outputs:
+            *cmap: inverse coordinate mapping.
+        """
+        import sys
+        import numpy as np
+
+        if not self.is_affine:
+            sys.exit("Only affine coordinate mappings can be inverted!")
+
+        if self.dim_source is None:
+            sys.exit("Source grid is unknown!")
+
+        return CoordinateMapping(self.dim_source, M=np.linalg.inv(self.M), affine=affine,
+                                 header=header, dim_source=self.dim)
+
+    def materialize(self, dtype="float64", chunk_size=1000000):
+        """
+        Returns the dense coordinate array.
+        Inputs:
+            *dtype: data type of output array.
+            *chunk_size: number of target voxels evaluated at once.
+        Outputs:
+            *data: source coordinates with shape (x, y, z, 3).
+        """
+        import numpy as np
+
+        if not self.is_affine:
+            return np.asarray(self.data, dtype=dtype)
+
+        data = np.zeros(self.dim + (3,), dtype=dtype)
+        data_view = np.reshape(data, (-1, 3))
+        for ind, coords in self.chunks(chunk_size):
+            data_view[ind] = coords
+
+        return data
+
+    def get_nifti(self, dtype="float64", chunk_size=1000000):
+        """
+        Returns the materialized coordinate mapping as nibabel instance.
+        """
+        import numpy as np
+        import nibabel as nb
+
+        data = self.materialize(dtype, chunk_size)
+        if self.header is not None:
+            header = self.header.copy()
+            header["dim"][0] = 4
+            header["dim"][4] = 3
+        else:
+            header = None
+
+        output = nb.Nifti1Image(data, self.affine, header)
+        output.set_data_dtype(np.dtype(dtype))
+
+        return output
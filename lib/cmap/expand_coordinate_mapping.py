@@ -3,8 +3,9 @@ def expand_coordinate_mapping(cmap_in, path_output=None, name_output=None, write
     This function removes black background in a coordinate mapping to omit interpolation problems
     at the edges of a coordinate slab within a larger volume. Based on the cmap, a transformation
     matrix is computed from randomly sampled data points within the slab. The transformation matrix 
-    is then applied to all background voxels. Hence, this method is only really precise for
-    coordinate mappings representing an affine transformation. However, this function can also be 
+    is then applied to all background voxels. The transformation is only evaluated at background
+    voxels and no coordinate grid of the whole volume is generated. Hence, this method is only 
+    really precise for coordinate mappings representing an affine transformation. However, this function can also be 
     applied to nonlinear coordinate mappings since the preliminary goal is to avoid problems at the 
     slab edges. Therefore, the actual data sampling should not be affected. The code snippet for
     computing the transformation matrix is taken from https://stackoverflow.com/questions/56220626/
@@ -19,30 +20,21 @@ def expand_coordinate_mapping(cmap_in, path_output=None, name_output=None, write
     
     created by Daniel Haenelt
     Date created: 18-06-2020
-    Last modified: 18-06-2020
+    Last modified: 18-10-2026
     """
     import os
     import random
     import numpy as np
     import nibabel as nb
-    from nibabel.affines import apply_affine
     from lib.io.get_filename import get_filename
-    from lib.cmap.generate_coordinate_mapping import generate_coordinate_mapping
+    from lib.cmap.coordinate_mapping import CoordinateMapping
 
     # get file extension of cmap
     _, _, ext_cmap = get_filename(cmap_in)
     
-    # load target cmap and generate source cmap 
+    # load target cmap
     cmap_target = nb.load(cmap_in)
-    cmap_source = generate_coordinate_mapping(cmap_in, pad=0)
-    
     arr_cmap_target = cmap_target.get_fdata()
-    arr_cmap_source = cmap_source.get_fdata()
-    
-    # get image dimensions
-    xdim = cmap_source.header["dim"][1]
-    ydim = cmap_source.header["dim"][2]
-    zdim = cmap_source.header["dim"][3]
     
     # random selection of 4 data points
     s_coords = []
@@ -87,27 +79,17 @@ def expand_coordinate_mapping(cmap_in, path_output=None, name_output=None, write
     # get final transformation matrix (source -> target)
     M = np.linalg.inv(M)
     
-    # transform source volume
-    x = arr_cmap_source[:,:,:,0].flatten()
-    y = arr_cmap_source[:,:,:,1].flatten()
-    z = arr_cmap_source[:,:,:,2].flatten()
-    
-    source_listed = np.array([x,y,z]).T
-    source_transformed = apply_affine(M, source_listed)
-    
-    x_new = np.reshape(source_transformed[:,0], (xdim,ydim,zdim))
-    y_new = np.reshape(source_transformed[:,1], (xdim,ydim,zdim))
-    z_new = np.reshape(source_transformed[:,2], (xdim,ydim,zdim))
+    # transform background voxels only (affine mapping is evaluated lazily)
+    cmap_source = CoordinateMapping(np.shape(arr_cmap_target)[:3], M=M)
+    ind_background = np.where(np.any(arr_cmap_target[:,:,:,:3] <= 0, axis=3).flatten())[0]
+    source_transformed = cmap_source.evaluate(ind_background)
 
-    # overwrite new cmap with old coordinate mapping (so that only background remains)    
-    x_new[arr_cmap_target[:,:,:,0] > 0] = arr_cmap_target[:,:,:,0][arr_cmap_target[:,:,:,0] > 0]
-    y_new[arr_cmap_target[:,:,:,1] > 0] = arr_cmap_target[:,:,:,1][arr_cmap_target[:,:,:,1] > 0]
-    z_new[arr_cmap_target[:,:,:,2] > 0] = arr_cmap_target[:,:,:,2][arr_cmap_target[:,:,:,2] > 0]
-    
-    # overwrite input cmap array with final cmap array
-    arr_cmap_target[:,:,:,0] = x_new
-    arr_cmap_target[:,:,:,1] = y_new
-    arr_cmap_target[:,:,:,2] = z_new
+    # overwrite background of old coordinate mapping with new coordinates
+    arr_cmap_listed = np.reshape(arr_cmap_target, (-1, np.shape(arr_cmap_target)[3]))
+    for i in range(3):
+        is_background = arr_cmap_listed[ind_background,i] <= 0
+        arr_cmap_listed[ind_background[is_background],i] = source_transformed[is_background,i]
+    arr_cmap_target = np.reshape(arr_cmap_listed, np.shape(arr_cmap_target))
     
     # nibabel instance of final cmap
     output = nb.Nifti1Image(arr_cmap_target, cmap_target.affine, cmap_target.header)
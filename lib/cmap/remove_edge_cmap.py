@@ -5,8 +5,9 @@ def remove_edge_cmap(input_cmap, edge_threshold=5, min_threshold=5):
     interpolated with the neighbouring background. The function identifies those affected edge
     voxels by comparing the difference of each voxel to its local neighbourhood. Background is
     assumed to be filled by zeroes and identified edge voxels are set to the background value. A
-    voxels is classified as edge outlier if its difference to one local neighbour is larger than
-    edge_threshold or if its cmap value is below min_threshold in all dimensions.
+    voxels is classified as edge outlier if its difference to one local neighbour (18-connected
+    neighbourhood within the same cmap dimension) is larger than edge_threshold or if its cmap 
+    value is below min_threshold in all dimensions.
     Inputs:
         *input_cmap: filename of 4d coordinate mapping.
         *edge_threshold: maximum difference to neighbouring voxel (in voxel units).
@@ -14,7 +15,7 @@ def remove_edge_cmap(input_cmap, edge_threshold=5, min_threshold=5):
     
     created by Daniel Haenelt
     Date created: 26-10-2019
-    Last modified: 09-12-2019
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
@@ -25,101 +26,35 @@ def remove_edge_cmap(input_cmap, edge_threshold=5, min_threshold=5):
     cmap = nb.load(input_cmap)
     cmap_array = cmap.get_fdata()
 
-    # get slab coordinates within volume (assumes background filled with zeroes)
-    cmap_slab_coords = np.where(cmap_array != 0)
-
-    # number of voxels
-    n_vox = len(cmap_slab_coords[0])
-    c_vox = 0
-    
-    # initialise for printing out loop status
-    c_step = 0
-    n_step = [10,20,30,40,50,60,70,80,90,100]
-
-    # identify edges
-    for n in range(n_vox):
-
-        # current voxel
-        i = cmap_slab_coords[0][n]
-        j = cmap_slab_coords[1][n]
-        k = cmap_slab_coords[2][n]
-        t = cmap_slab_coords[3][n]
-        
-        # initialise voxel and its neighbours
-        cmap_point = cmap_array[i,j,k,t]
-        cmap_neighbour = []
-            
-        # consider neighour if not at edge of image volume
-        if i > 0:
-            cmap_neighbour.append(cmap_array[i-1,j,k,t])
-        
-        if j > 0:
-            cmap_neighbour.append(cmap_array[i,j-1,k,t])
-            
-        if k > 0:
-            cmap_neighbour.append(cmap_array[i,j,k-1,t])
-            
-        if i < np.shape(cmap_array)[0] - 1:
-            cmap_neighbour.append(cmap_array[i+1,j,k,t])
-    
-        if j < np.shape(cmap_array)[1] - 1:
-            cmap_neighbour.append(cmap_array[i,j+1,k,t])
-    
-        if k < np.shape(cmap_array)[2] - 1:
-            cmap_neighbour.append(cmap_array[i,j,k+1,t])
-    
-        if i > 0 and j > 0:
-            cmap_neighbour.append(cmap_array[i-1,j-1,k,t])
-    
-        if i > 0 and j < np.shape(cmap_array)[1] - 1:
-            cmap_neighbour.append(cmap_array[i-1,j+1,k,t])
-    
-        if i > np.shape(cmap_array)[0] - 1 and j > 0:
-            cmap_neighbour.append(cmap_array[i+1,j-1,k,t])
-    
-        if i > np.shape(cmap_array)[0] - 1 and j < np.shape(cmap_array)[1] - 1:
-            cmap_neighbour.append(cmap_array[i+1,j+1,k,t])
-
-        if i > 0 and k > 0:
-            cmap_neighbour.append(cmap_array[i-1,j,k-1,t])
-    
-        if i > 0 and k < np.shape(cmap_array)[2] - 1:
-            cmap_neighbour.append(cmap_array[i-1,j,k+1,t])
-    
-        if i > np.shape(cmap_array)[0] - 1 and k > 0:
-            cmap_neighbour.append(cmap_array[i+1,j,k-1,t])
-    
-        if i > np.shape(cmap_array)[0] - 1 and j < np.shape(cmap_array)[2] - 1:
-            cmap_neighbour.append(cmap_array[i+1,j,k+1,t])   
-
-        if j > 0 and k > 0:
-            cmap_neighbour.append(cmap_array[i,j-1,k-1,t])
-    
-        if j > 0 and k < np.shape(cmap_array)[2] - 1:
-            cmap_neighbour.append(cmap_array[i,j-1,k+1,t])
-    
-        if j > np.shape(cmap_array)[1] - 1 and k > 0:
-            cmap_neighbour.append(cmap_array[i,j+1,k-1,t])
-    
-        if j > np.shape(cmap_array)[1] - 1 and j < np.shape(cmap_array)[2] - 1:
-            cmap_neighbour.append(cmap_array[i,j+1,k+1,t])   
-             
-        # compare voxel to its neighbours
-        cmap_temp = np.abs(np.array(cmap_neighbour) - cmap_point)
-        cmap_temp = cmap_temp[~np.isnan(cmap_temp)]
-        cmap_temp = np.any(cmap_temp > edge_threshold)
-            
-        if cmap_temp:
-            cmap_array[i,j,k,t] = np.nan
-        
-        # print status
-        counter = np.floor(c_vox / n_vox * 100).astype(int)
-        if counter == n_step[c_step]:
-            print("cmap edge removal: "+str(counter)+" %")
-            c_step += 1
+    # identify edges by comparing each voxel to its 18-connected neighbourhood. Each neighbour
+    # offset is handled by one shifted array comparison. Since the neighbourhood is symmetric, the
+    # comparison result is assigned to both voxels of each pair.
+    offset = [[1,0,0], [0,1,0], [0,0,1],
+              [1,1,0], [1,-1,0], [1,0,1], [1,0,-1], [0,1,1], [0,1,-1]]
+    
+    edge_array = np.zeros_like(cmap_array, dtype=bool)
+    for o in offset:
+        src = [slice(None)] * 4
+        dst = [slice(None)] * 4
+        for d in range(3):
+            if o[d] > 0:
+                src[d] = slice(0, -o[d])
+                dst[d] = slice(o[d], None)
+            elif o[d] < 0:
+                src[d] = slice(-o[d], None)
+                dst[d] = slice(0, o[d])
+        src = tuple(src)
+        dst = tuple(dst)
         
-        # counter loop cycles
-        c_vox += 1
+        # nan differences are ignored (comparison is false)
+        with np.errstate(invalid="ignore"):
+            cmap_temp = np.abs(cmap_array[src] - cmap_array[dst]) > edge_threshold
+        edge_array[src] |= cmap_temp
+        edge_array[dst] |= cmap_temp
+    
+    # only consider voxels within the slab (assumes background filled with zeroes)
+    edge_array[cmap_array == 0] = False
+    cmap_array[edge_array] = np.nan
 
     # remove edges
     cmap_array[np.isnan(cmap_array)] = 0
@@ -1,7 +1,7 @@
 def get_movie(input, path_output, name_output, coord, axis=0, fps = 10, transpose=True):
     """
     This function generates gif of a specific slice over a time series. It has the purpose to easily
-    check preprocessing performance.
+    check preprocessing performance. Only the selected slice is read from the time series.
     Inputs:
         *input: input file.
         *path_output: path where output is saved.
@@ -13,42 +13,27 @@ def get_movie(input, path_output, name_output, coord, axis=0, fps = 10, transpos
         
     created by Daniel Haenelt
     Date created: 04-02-2019
-    Last modified: 04-02-2019
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
-    import nibabel as nb
     import imageio
+    from lib.io.load_volume import load_volume
     
     # make subfolders
     if not os.path.exists(path_output):
         os.makedirs(path_output)
     
-    # load time series
-    data_img = nb.load(input)
-    data_array = data_img.get_fdata()
-    
-    # get matrix dimension
-    x_size = data_img.header["dim"][1]
-    y_size = data_img.header["dim"][2]
-    z_size = data_img.header["dim"][3]
-    nt = data_img.header["dim"][4]
-    
-    # get movie array
+    # load selected slice of time series
     if axis == 0:
-        movie_array = np.zeros([y_size, z_size, nt])
-        for i in range(nt):
-            movie_array[:,:,i] = data_array[coord,:,:,i]
+        movie_array = load_volume(input, roi=(coord, slice(None), slice(None)))
     elif axis == 1:
-        movie_array = np.zeros([x_size, z_size, nt])
-        for i in range(nt):
-            movie_array[:,:,i] = data_array[:,coord,:,i]
+        movie_array = load_volume(input, roi=(slice(None), coord, slice(None)))
     elif axis == 2:
-        movie_array = np.zeros([x_size,y_size,nt])
-        for i in range(nt):
-            movie_array[:,:,i] = data_array[:,:,coord,i]
+        movie_array = load_volume(input, roi=(slice(None), slice(None), coord))
     else:
         print("Choose a valid axis!")
+    nt = np.shape(movie_array)[2]
     
     # scale movie array
     movie_array = movie_array / np.max(movie_array) * 255
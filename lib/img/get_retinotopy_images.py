@@ -1,6 +1,6 @@
 def get_retinotopy_images(input_patch, input_vfs, input_phase, input_snr, input_white, hemi, 
                           path_output, img_res=0.2, theta=0, alpha=2, buffer=0, phase_fwhm=4, 
-                          sigma=50, cleanup=True):   
+                          sigma=50, path_cache=None, cleanup=True):   
     """
     This function generates images for each step of a given retinotopy phase map from which 
     animations of the temporal phase shift on the flattened surface can be made.
@@ -17,11 +17,12 @@ def get_retinotopy_images(input_patch, input_vfs, input_phase, input_snr, input_
         *buffer: smooth out concave hull.
         *phase_fwhm: smoothing kernel for phase map smoothing in mm.
         *sigma: gaussian kernel size for weighting towards single phase values.
+        *path_cache: path where the orthographic projection is cached (optional).
         *cleanup: delete intermediate files.            
     
     created by Daniel Haenelt
     Date created: 14-02-2019
-    Last modified: 14-02-2019
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
@@ -29,6 +30,7 @@ def get_retinotopy_images(input_patch, input_vfs, input_phase, input_snr, input_
     import shutil as sh
     import matplotlib.pyplot as plt
     from lib.segmentation.orthographic_projection import orthographic_projection
+    from lib.mapping.map2grid_stack import map2grid_stack
 
     def gaussian_filter(x, x0, sigma):
         g = 1/(sigma*np.sqrt(2*np.pi)) * np.exp( -(x-x0)**2 / (2*sigma**2) )
@@ -71,7 +73,8 @@ def get_retinotopy_images(input_patch, input_vfs, input_phase, input_snr, input_
 
     # get orthographic projection
     orthographic_projection(os.path.join(path_surf,hemi+".patch"), 
-                            hemi, img_res, theta, alpha, buffer, path_ortho)
+                            hemi, img_res, theta, alpha, buffer, path_ortho, 
+                            path_cache=path_cache, plot=False)
 
     os.system("mris_fwhm" + \
               " --s " + sub + \
@@ -97,15 +100,10 @@ def get_retinotopy_images(input_patch, input_vfs, input_phase, input_snr, input_
     snr = nb.load(os.path.join(path_surf,hemi+".snr_smooth.mgh")).get_fdata()
 
     # sample onto regular grid
-    vfs_grid = np.zeros_like(cmap)
-    phase_grid = np.zeros_like(cmap)
-    snr_grid = np.zeros_like(cmap)
-    for i in range(np.shape(cmap)[0]):
-        for j in range(np.shape(cmap)[1]):
-            if cmap[i,j] is not 0:
-                vfs_grid[i,j] = vfs[cmap[i,j]]
-                phase_grid[i,j] = phase[cmap[i,j]]
-                snr_grid[i,j] = snr[cmap[i,j]]
+    grid_array = map2grid_stack(cmap, [vfs, phase, snr])
+    vfs_grid = grid_array[:,:,0]
+    phase_grid = grid_array[:,:,1]
+    snr_grid = grid_array[:,:,2]
 
     # normalize snr
     snr_grid = snr_grid / np.max(snr_grid)
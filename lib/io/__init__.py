@@ -3,3 +3,4 @@ from .read_vox2vox import read_vox2vox
 from .get_filename import get_filename
 from .mgh2nii import mgh2nii
 from .copy_header import copy_header
+from .load_volume import load_volume
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+_volume_cache = OrderedDict()
+_volume_cache_size = 8
+
+def load_volume(input, mode="data", dtype="float32", vol=None, slab=None, roi=None,
+                use_cache=True):
+    """
+    This function loads a nifti or mgh volume without reading more data than necessary. The header
+    can be read without touching the image data. Otherwise, only the requested part of the data is
+    read from the file via the nibabel array proxy (memory-mapped for uncompressed files). Single
+    volumes or volume ranges of a time series, slabs of slices along the third axis or a region of
+    interest can be selected. Data is returned as float32 (instead of float64 as by get_fdata) or in
+    the native data type of the file. Opened images are kept in a small LRU cache which is keyed by
+    filename and modification time. Compressed files are opened with a persistent file handle, so
+    that consecutive reads of volume chunks do not decompress the file from the beginning. Since
+    cached images are shared, headers should be copied before they are modified.
+    Inputs:
+        *input: filename or nibabel image.
+        *mode: image (nibabel instance), header, proxy (array proxy for slicing) or data.
+        *dtype: data type of output array (float32, float64, native).
+        *vol: volume index, slice or list of volume indices of a 4D time series.
+        *slab: first and last (exclusive) slice along the third axis.
+        *roi: tuple of slices along the spatial axes (supersedes slab).
+        *use_cache: get opened image from cache.
+    Outputs:
+        *output: nibabel image, header, array proxy or data array depending on mode.
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import os
+    import sys
+    import numpy as np
+    import nibabel as nb
+
+    # open image
+    if isinstance(input, str):
+        file_stat = os.stat(input)
+        key = (os.path.abspath(input), file_stat.st_mtime_ns, file_stat.st_size)
+        if use_cache and key in _volume_cache:
+            img = _volume_cache[key]
+            _volume_cache.move_to_end(key)
+        else:
+            img = nb.load(input, keep_file_open=input.endswith(".gz"))
+            if use_cache:
+                _volume_cache[key] = img
+                if len(_volume_cache) > _volume_cache_size:
+                    _volume_cache.popitem(last=False)
+    else:
+        img = input
+
+    if mode == "image":
+        return img
+    elif mode == "header":
+        return img.header
+    elif mode == "proxy":
+        return img.dataobj
+    elif mode != "data":
+        sys.exit("Choose a valid mode!")
+
+    # spatial index
+    if roi is not None:
+        ind = tuple(roi)
+    elif slab is not None:
+        ind = (slice(None), slice(None), slice(slab[0], slab[1]))
+    else:
+        ind = (slice(None),) * 3
+
+    # read data from array proxy
+    if vol is None or len(img.shape) < 4:
+        data_array = img.dataobj[ind]
+    elif isinstance(vol, (int, np.integer, slice)):
+        data_array = img.dataobj[ind + (vol,)]
+    else:
+        data_array = np.stack([img.dataobj[ind + (int(v),)] for v in vol], axis=-1)
+
+    # data type
+    if dtype == "native":
+        return np.asanyarray(data_array)
+    elif dtype in ["float32", "float64"]:
+        return np.asarray(data_array, dtype=dtype)
+    else:
+        sys.exit("Choose a valid data type!")
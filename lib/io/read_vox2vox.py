@@ -1,18 +1,47 @@
-def read_vox2vox(input_lta):
+def read_vox2vox(input_lta, input_source=None, input_target=None):
     """
-    This function reads a freesurfer lta file and extracts the vox2vox transformation matrix as 
-    numpy array.
+    This function reads a freesurfer lta file and extracts the vox2vox transformation matrix as
+    numpy array. Alternatively, a fsl transformation matrix (e.g. from flirt) can be read. Since fsl
+    matrices transform between scaled millimetre coordinates (voxel coordinates multiplied by voxel
+    sizes with flipped x-axis for images with positive determinant of the vox2ras transformation),
+    source and target images are needed to convert the matrix into a vox2vox transformation.
     Inputs:
-        *input_lta: freesurfer lta file.
+        *input_lta: freesurfer lta file or fsl matrix file (.mat, .txt).
+        *input_source: source (input) image of fsl transformation.
+        *input_target: target (reference) image of fsl transformation.
     Outputs:
         *M: forwards affine transformation matrix.
         *Minv: inverse of M.
-            
+
     created by Daniel Haenelt
     Date created: 19-06-2020
-    Last modified: 19-06-2020
+    Last modified: 18-10-2026
     """
+    import os
+    import sys
     import numpy as np
+    import nibabel as nb
+
+    if os.path.splitext(input_lta)[1] in [".mat", ".txt"]:
+        if input_source is None or input_target is None:
+            sys.exit("Source and target images are needed for fsl transformation matrices!")
+
+        # vox2fsl transformations of source and target images
+        S = []
+        for input in [input_source, input_target]:
+            if isinstance(input, str):
+                input = nb.load(input)
+
+            S_temp = np.diag(list(input.header.get_zooms()[:3]) + [1.0])
+            if np.linalg.det(input.affine) > 0:
+                S_temp[0,0] = -S_temp[0,0]
+                S_temp[0,3] = (input.shape[0] - 1) * input.header.get_zooms()[0]
+            S.append(S_temp)
+
+        M = np.linalg.inv(S[1]).dot(np.loadtxt(input_lta)).dot(S[0])
+        Minv = np.linalg.pinv(M)
+
+        return M, Minv
 
     with open(input_lta, "r") as f:
         x = f.readlines()
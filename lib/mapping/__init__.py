@@ -2,5 +2,6 @@ from .get_vfs import get_vfs
 from .get_weighted_vfs import get_weighted_vfs
 from .map2grid import map2grid
 from .map2stack import map2stack
+from .map2grid_stack import map2grid_stack
 from .map2surface import map2surface
 from .morph2dense import morph2dense
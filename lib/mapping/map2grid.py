@@ -1,53 +1,53 @@
 def map2grid(file_grid, file_input, sigma, path_output="", basename_output="", binary=False, 
-             overwrite=True):
+             overwrite=True, nan_edge=False):
     """
     This script allows you to sample indexed morphological data onto the regular grid. Optional, a 
-    gaussian filter can be applied to the output image.
+    gaussian filter can be applied to the output image. If a list of input files is given, all maps
+    are sampled at once and the output image is a stack of grids.
     Inputs:
         *file_grid: filename of grid coordinate mapping.
-        *file_input: filename of morphological data or *.mgh data.
+        *file_input: filename of morphological data or *.mgh data (or list of filenames).
         *sigma: standard deviation of Gaussian kernel.
         *path_output: path where output is saved.
         *basename_output: basename of written output file.
         *binary: threshold output grid (for curvature file).
         *overwrite: write output to file.
+        *nan_edge: normalize Gaussian filter at the edge of the grid.
     Output:
         *grid_array: file mapped onto array.
     
     created by Daniel Haenelt
     Date created: 01-11-2018             
-    Last modified: 22-04-2020
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
     import nibabel as nb
     from nibabel.freesurfer.io import read_morph_data
-    from scipy.ndimage.filters import gaussian_filter
+    from lib.mapping.map2grid_stack import map2grid_stack
 
     # load data
     grid_img = nb.load(file_grid)
     grid_array = grid_img.get_fdata()
-    if os.path.splitext(file_input)[1] == ".mgh":
-        morph = nb.load(file_input).get_fdata()
+    
+    if len(np.shape(file_input)) > 0:
+        file_list = file_input
     else:
-        morph = read_morph_data(file_input)
-
-    # sample data onto grid
-    for i in range(np.size(grid_array,0)):
-        for j in range(np.size(grid_array,1)):
-            if grid_array[i,j] != 0:
-                grid_array[i,j] = morph[grid_array[i,j].astype(int)]
+        file_list = [file_input]
     
-    # gaussian filter (opt)
-    if sigma != 0:
-        order = 0
-        mode = "reflect"
-        truncate = 4.0
-        grid_array = gaussian_filter(grid_array,
-                                     sigma=sigma,
-                                     order=order,
-                                     mode=mode,
-                                     truncate=truncate)
+    morph = []
+    for file_temp in file_list:
+        if os.path.splitext(file_temp)[1] == ".mgh":
+            morph.append(nb.load(file_temp).get_fdata())
+        else:
+            morph.append(read_morph_data(file_temp))
+
+    # sample data onto grid and apply gaussian filter (opt)
+    stack_array = map2grid_stack(grid_array, morph, sigma, nan_edge)
+    if len(np.shape(file_input)) > 0:
+        grid_array = stack_array
+    else:
+        grid_array = np.reshape(stack_array[:,:,0], np.shape(grid_array))
     
     # binary mode (opt)
     if binary is True:
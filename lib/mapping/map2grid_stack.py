@@ -0,0 +1,58 @@
+def map2grid_stack(grid_array, data, sigma=0, nan_edge=False):
+    """
+    This function samples one or more vertex-wise data arrays onto a regular grid defined by a grid
+    coordinate mapping. The grid contains the vertex index for each pixel and zero for background.
+    Each map is sampled by one indexing operation and the resulting stack is optionally filtered
+    slice-wise by a Gaussian filter. If nan_edge is set, background pixels are excluded from the
+    filter and the filter is normalized within the grid (see gaussian_filter_edge).
+    Inputs:
+        *grid_array: 2D array of grid coordinate mapping.
+        *data: vertex-wise data array (n_vertex) or (n_vertex, n_maps) or list of arrays.
+        *sigma: standard deviation of Gaussian kernel.
+        *nan_edge: normalize Gaussian filter at the edge of the grid.
+    Outputs:
+        *stack_array: data mapped onto grid with shape (x, y, n_maps).
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import numpy as np
+    from scipy.ndimage import gaussian_filter
+    from lib.utils.gaussian_filter_edge import gaussian_filter_edge
+
+    # get data as (n_vertex, n_maps) array
+    if isinstance(data, (list, tuple)):
+        data = np.stack([np.ravel(d) for d in data], axis=1)
+    else:
+        data = np.asarray(data)
+        data = np.reshape(data, (len(data), -1))
+
+    # sample data onto grid
+    grid_array = np.asarray(grid_array)
+    grid_array = np.reshape(grid_array, np.shape(grid_array)[:2])
+    mask_array = grid_array != 0
+    stack_array = np.zeros(np.shape(grid_array)[:2] + (np.shape(data)[1],))
+    stack_array[mask_array,:] = data[grid_array[mask_array].astype(int),:]
+
+    # gaussian filter (opt)
+    if sigma != 0:
+        order = 0
+        mode = "reflect"
+        truncate = 4.0
+        for i in range(np.shape(stack_array)[2]):
+            if nan_edge:
+                stack_temp = stack_array[:,:,i].copy()
+                stack_temp[~mask_array] = np.nan
+                stack_temp = gaussian_filter_edge(stack_temp, sigma)
+                stack_temp[~mask_array] = 0
+                stack_temp[np.isnan(stack_temp)] = 0
+                stack_array[:,:,i] = stack_temp
+            else:
+                stack_array[:,:,i] = gaussian_filter(stack_array[:,:,i],
+                                                     sigma=sigma,
+                                                     order=order,
+                                                     mode=mode,
+                                                     truncate=truncate)
+
+    return stack_array
@@ -1,23 +1,26 @@
-def map2stack(file_data, file_grid, sigma, path_output):
+def map2stack(file_data, file_grid, sigma, path_output, nan_edge=False):
     """
     map2stack
 
     This script allows you to sample surface data to a patch defined on a regular grid. If multiple 
-    data files are given in a list, all grids are stacked together.
+    data files are given in a list, all grids are stacked together. Each slice of the stack is 
+    filtered once.
     Inputs:
         *file_data: filename list of data.
         *file_grid: filename of grid coordinate mapping.
         *sigma: standard deviation of Gaussian kernel.
         *path_output: path where output is saved.
+        *nan_edge: normalize Gaussian filter at the edge of the grid.
+    Outputs:
+        *stack_array: data mapped onto stack.
 
     created by Daniel Haenelt
     Date created: 01-11-2018             
-    Last modified: 18-02-2019
+    Last modified: 18-10-2026
     """
     import os
-    import numpy as np
     import nibabel as nb
-    from scipy.ndimage.filters import gaussian_filter
+    from lib.mapping.map2grid_stack import map2grid_stack
 
     # make output folder
     if not os.path.exists(path_output):
@@ -26,39 +29,14 @@ def map2stack(file_data, file_grid, sigma, path_output):
     # load data
     grid_img = nb.load(file_grid)
     grid_array = grid_img.get_fdata()
+    data_array = [nb.load(file_data[i]).get_fdata() for i in range(len(file_data))]
 
-    # dim
-    x = grid_img.header["dim"][1]
-    y = grid_img.header["dim"][2]
-    z = len(file_data)
-    
-    # sample data onto grid
-    stack_array = np.zeros((x,y,z))
-    for i in range(z):
-    
-        # load data
-        data_img = nb.load(file_data[i])
-        data_array = data_img.get_fdata()
-    
-        # map to stack
-        for j in range(x):
-            for k in range(y):
-                if grid_array[j,k] != 0:
-                    stack_array[j,k,i] = data_array[grid_array[j,k].astype(int)]
-            
-        # gaussian filter (opt)
-        if sigma != 0:
-            order = 0
-            mode = "reflect"
-            truncate = 4.0
-            for i in range(np.size(stack_array,2)):
-                stack_array[:,:,i] = gaussian_filter(stack_array[:,:,i],
-                           sigma=sigma,
-                           order=order,
-                           mode=mode,
-                           truncate=truncate)
+    # sample data onto grid and apply gaussian filter (opt)
+    stack_array = map2grid_stack(grid_array, data_array, sigma, nan_edge)
 
     # write output data
     filenameOUT = os.path.join(path_output,os.path.splitext(os.path.basename(file_data[0]))[0]+"_sigma"+str(sigma)+"_grid.nii")
     output = nb.Nifti1Image(stack_array, grid_img.affine, grid_img.header)
     nb.save(output,filenameOUT)
+    
+    return stack_array
\ No newline at end of file
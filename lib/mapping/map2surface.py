@@ -1,8 +1,12 @@
-def map2surface(input_surf, input_vol, hemi, path_output, input_white=None, input_ind=None, 
-                cleanup=True):
+def map2surface(input_surf, input_vol, hemi, path_output, input_white=None, input_ind=None,
+                cleanup=True, interp_method="nearest", write_output=True):
     """
     This function samples data from the input volume to the input surface and optionally maps those
-    values to a target surface if an index file is given.
+    values to a target surface if an index file is given. Vertex coordinates are transformed to
+    voxel space by the ras2vox-tkr transformation of the input volume (computed from the header by
+    vox2ras as in sample_laminar_profile) and data is sampled at those positions in memory (same as
+    point sampling with mri_vol2surf and registration from header). For a 4D input volume, the whole
+    time series is sampled at once.
     Inputs:
         *input_surf: surface mesh onto which volume data is sampled.
         *input_vol: volume from which data is sampled.
@@ -10,103 +14,66 @@ def map2surface(input_surf, input_vol, hemi, path_output, input_white=None, inpu
         *path_output: path where to save output.
         *input_white: white surface in target surface space (only necessary if index file is given).
         *input_ind: textfile with mapping of vertex indices to target space.
-        *cleanup: remove intermediate files.
-            
+        *cleanup: not used anymore since no intermediate files are written.
+        *interp_method: interpolation method (nearest, trilinear).
+        *write_output: write sampled data as mgh file.
+    Outputs:
+        *vals: sampled data with shape (n_vertices,) or (n_vertices, nt) for 4D input.
+
     created by Daniel Haenelt
-    Date created: 06-02-2019      
-    Last modified: 03-08-2020
+    Date created: 06-02-2019
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
     import nibabel as nb
-    import shutil as sh
     from nibabel.freesurfer.io import read_geometry
-    from nipype.interfaces.freesurfer import SampleToSurface
-    from nipype.interfaces.freesurfer.preprocess import MRIConvert
-
-    # set freesurfer path environment
-    os.environ["SUBJECTS_DIR"] = path_output
-
-    # freesurfer subject
-    tmp = np.random.randint(0, 10, 5)
-    tmp_string = ''.join(str(i) for i in tmp)
-    sub = "tmp_"+tmp_string
+    from lib.io.get_filename import get_filename
+    from lib.surface.vox2ras import vox2ras
+    from lib.utils.sample_volume import sample_volume
 
     # make output folder
-    if not os.path.exists(path_output):
+    if write_output and not os.path.exists(path_output):
         os.makedirs(path_output)
 
-    # mimic freesurfer folder structure (with some additional folder for intermediate files)
-    path_sub = os.path.join(path_output,sub)
-    path_mri = os.path.join(path_sub,"mri")
-    path_surf = os.path.join(path_sub,"surf")
-
-    os.makedirs(path_sub)
-    os.makedirs(path_mri)
-    os.makedirs(path_surf)
-
-    # copy input volume as orig.mgz to mimicked freesurfer folder
-    if os.path.splitext(os.path.basename(input_vol))[1] is not ".mgz":
-        mc = MRIConvert()
-        mc.inputs.in_file = input_vol
-        mc.inputs.out_file = os.path.join(path_mri,"orig.mgz")
-        mc.inputs.out_type = 'mgz'
-        mc.run()
-    else:
-        sh.copyfile(input_vol,os.path.join(path_mri,"orig.mgz"))
+    # input volume and surface file name
+    _, name_vol, _ = get_filename(input_vol)
+    name_surf = os.path.basename(input_surf).split('.')[1]
 
-    # copy input surface to mimicked freesurfer folder
-    sh.copyfile(input_surf, os.path.join(path_surf,hemi+".source"))
+    # load data
+    vtx, _ = read_geometry(input_surf)
+    data_img = nb.load(input_vol)
+    data_array = np.asanyarray(data_img.dataobj)
+    if np.ndim(data_array) > 4:
+        data_array = np.reshape(data_array, np.shape(data_array)[:4])
 
-    # input volume file name
-    if os.path.splitext(os.path.basename(input_vol))[1] == ".gz":
-        name_vol = os.path.splitext(os.path.splitext(os.path.basename(input_vol))[0])[0]
-    else:
-        name_vol = os.path.splitext(os.path.basename(input_vol))[0]
-    name_surf = os.path.basename(input_surf).split('.')[1]
+    # get vertex coordinates in voxel space
+    _, ras2vox_tkr = vox2ras(data_img)
+    vox = np.dot(vtx, ras2vox_tkr[:3,:3].T) + ras2vox_tkr[:3,3]
 
-    # mri_vol2surf
-    sampler = SampleToSurface()
-    sampler.inputs.subject_id = sub
-    sampler.inputs.reg_header = True
-    sampler.inputs.hemi = hemi
-    sampler.inputs.source_file = input_vol
-    sampler.inputs.surface = "source"
-    sampler.inputs.sampling_method = "point"
-    sampler.inputs.sampling_range = 0
-    sampler.inputs.sampling_units = "mm"
-    sampler.inputs.interp_method = "nearest" # or trilinear
-    sampler.inputs.out_type = "mgh"
-    sampler.inputs.out_file = os.path.join(path_surf,hemi+"."+"sampled.mgh")
-    sampler.run()
+    # sample data
+    vals = sample_volume(data_array, vox, interp_method)
 
     if input_ind:
         # read ind
         ind_orig = np.loadtxt(input_ind, dtype=int)
-    
+
         # read white
         vtx_orig, _ = read_geometry(input_white)
-    
-        # read sampled morph data
-        vals_img = nb.load(os.path.join(path_surf,hemi+"."+"sampled.mgh"))
-        vals_array = vals_img.get_fdata()
-    
-        # get anzahl der vertices als Nullen in white
-        vals_orig = np.zeros([len(vtx_orig[:,0]),1,1])
-    
-        # setze sampled data da rein
-        vals_orig[ind_orig] = vals_array
-    
-        # write sampled data in anatomical space      
-        vals_img.header["dims"][0] = len(vals_orig[:,0])
-        vals_img.header["Mdc"] = np.eye(3)
-        res_img = nb.Nifti1Image(vals_orig,vals_img.affine,vals_img.header)
-        nb.save(res_img,os.path.join(path_output,hemi+"."+name_vol+"_"+name_surf+"_def_trans.mgh"))
+
+        # put sampled data into the vertex array of the target surface
+        vals_orig = np.zeros((len(vtx_orig[:,0]),) + np.shape(vals)[1:])
+        vals_orig[ind_orig] = vals
+        vals = vals_orig
+
+        file_out = os.path.join(path_output,hemi+"."+name_vol+"_"+name_surf+"_def_trans.mgh")
     else:
-        # write sampled data in epi space
-        sh.copyfile(os.path.join(path_surf,hemi+"."+"sampled.mgh"),
-                    os.path.join(path_output,hemi+"."+name_vol+"_"+name_surf+"_def.mgh"))
-    
-    # delete intermediate files
-    if cleanup:
-        sh.rmtree(path_sub, ignore_errors=True)
+        file_out = os.path.join(path_output,hemi+"."+name_vol+"_"+name_surf+"_def.mgh")
+
+    # write sampled data (vertices are stored along the first of three spatial dimensions)
+    if write_output:
+        vals_out = np.reshape(vals, (len(vals),1,1) + np.shape(vals)[1:]).astype(np.float32)
+        output = nb.MGHImage(vals_out, np.eye(4))
+        nb.save(output, file_out)
+
+    return vals
@@ -3,3 +3,7 @@ from .get_nuisance_regressor import get_nuisance_regressor
 from .gnl_correction import gnl_correction
 from .slice_timing_correction import slice_timing_correction
 from .deweight_mask import deweight_mask
+from .get_dct_basis import get_dct_basis
+from .baseline_correction import baseline_correction
+from .get_volume_quality import get_volume_quality
+from .get_nuisance_signals import get_nuisance_signals
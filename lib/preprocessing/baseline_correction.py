@@ -0,0 +1,55 @@
+def baseline_correction(img_input, TR, cutoff_highpass, path_output="", name_output="", 
+                        write_output=False):
+    """
+    This function computes a baseline correction of a functional time series and is the python
+    equivalent of baseline_correction.m. Low frequencies are removed by highpass filtering with a
+    DCT basis set as in spm_filter of SPM12. The basis set is orthonormal, i.e. the least-squares
+    fit of the basis set to all voxel time series is a single projection of the (voxels x time)
+    data matrix. The filtered time series is returned in memory. Input is either a 4d nifti volume
+    or a filename.
+    Inputs:
+        *img_input: 4d nifti volume or string to filename.
+        *TR: repetition time in s.
+        *cutoff_highpass: highpass cutoff period in s (1/cutoff frequency in Hz).
+        *path_output: path where output is saved.
+        *name_output: basename of output.
+        *write_output: write nifti volume.
+    Outputs:
+        *output: baseline corrected 4d nifti volume.
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import os
+    import sys
+    import numpy as np
+    import nibabel as nb
+    from lib.preprocessing.get_dct_basis import get_dct_basis
+
+    # load data
+    if isinstance(img_input, nb.Nifti1Image):
+        data_array = img_input.get_fdata()
+    elif isinstance(img_input, str):
+        img_input = nb.load(img_input)
+        data_array = img_input.get_fdata()
+    else:
+        sys.exit("Input must be either string or instance of nibabel class!")
+
+    # get (voxels x time) data matrix
+    dim = np.shape(data_array)
+    data_array = np.reshape(data_array, (-1, dim[-1]))
+
+    # remove low frequencies
+    X0 = get_dct_basis(dim[-1], TR, cutoff_highpass)
+    data_array = data_array - np.dot(np.dot(data_array, X0), X0.T)
+    data_array = np.reshape(data_array, dim)
+
+    # write output
+    output = nb.Nifti1Image(data_array, img_input.affine, img_input.header)
+    if write_output:
+        if len(path_output) > 0 and not os.path.exists(path_output):
+            os.makedirs(path_output)
+        nb.save(output, os.path.join(path_output, name_output+".nii"))
+
+    return output
@@ -0,0 +1,37 @@
+_dct_basis = {}
+
+def get_dct_basis(nt, TR, cutoff_highpass):
+    """
+    This function computes the discrete cosine transform (DCT) basis set which is removed from a
+    time series by a highpass filter. The basis set follows spm_filter in SPM12, i.e. it contains
+    the DCT-II basis functions (spm_dctmtx) with periods longer than the cutoff period without the
+    constant term. The number of basis functions is fix(2*nt*TR/cutoff_highpass + 1). Basis sets
+    are cached for each combination of input parameters.
+    Inputs:
+        *nt: number of time points.
+        *TR: repetition time in s.
+        *cutoff_highpass: highpass cutoff period in s (1/cutoff frequency in Hz).
+    Outputs:
+        *X0: orthonormal DCT basis set with shape (nt, n_basis).
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import numpy as np
+
+    key = (int(nt), float(TR), float(cutoff_highpass))
+    if key not in _dct_basis:
+
+        # number of basis functions including the constant term
+        n = int(np.fix(2 * nt * TR / cutoff_highpass + 1))
+
+        # dct basis functions without the constant term (spm_dctmtx)
+        t = np.arange(nt)[:,None]
+        k = np.arange(1, n)[None,:]
+        X0 = np.sqrt(2 / nt) * np.cos(np.pi * (2 * t + 1) * k / (2 * nt))
+        X0.setflags(write=False)
+
+        _dct_basis[key] = X0
+
+    return _dct_basis[key]
@@ -1,38 +1,32 @@
-def get_nuisance_regressor(input, wm_mask, csf_mask, path_output):
+def get_nuisance_regressor(input, wm_mask, csf_mask, path_output, n_components=0, chunk_size=10):
     """
     This function creates nuisance regressors from a functional time series using wm and csf masks.
+    The mean signal in both masks is extracted in one sequential read of the time series. 
+    Optionally, principal components of both masks (aCompCor) are appended as further regressors.
     Inputs:
         *inupt: (baseline corrected) time series.
         *wm_mask: white matter mask registered to the time series.
         *csf_mask: csf mask registered to the time series.
         *path_output: path where output is saved.
+        *n_components: number of principal components per mask.
+        *chunk_size: number of volumes which are read at once.
 
     created by Daniel Haenelt
     Date created: 02-03-2019    
-    Last modified: 02-03-2019
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
-    import nibabel as nb
     import matplotlib.pyplot as plt
+    from lib.preprocessing.get_nuisance_signals import get_nuisance_signals
 
     # make output folder
     if not os.path.exists(path_output):
         os.mkdir(path_output)
     
-    # get mean signal in mask
-    wm_array = nb.load(wm_mask).get_fdata()
-    csf_array = nb.load(csf_mask).get_fdata()
-
-    # make regressor
-    func_array = nb.load(input).get_fdata()
-    nt = np.shape(func_array)[3]
-
-    # get ROI mean signal
-    nuisance_regressor = np.zeros((nt,2))
-    for i in range(nt):
-        nuisance_regressor[i,0] = np.mean(func_array[:,:,:,i][wm_array == 1])
-        nuisance_regressor[i,1] = np.mean(func_array[:,:,:,i][csf_array == 1])
+    # get ROI mean signal (and principal components)
+    signals = get_nuisance_signals(input, [wm_mask, csf_mask], n_components, chunk_size)
+    nuisance_regressor = np.concatenate([signals["mean"]] + signals["pca"], axis=1)
 
     # save regressor
     np.savetxt(os.path.join(path_output,"nuisance_regressor.txt"),
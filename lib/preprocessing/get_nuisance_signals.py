@@ -0,0 +1,74 @@
+def get_nuisance_signals(input, masks, n_components=0, chunk_size=10):
+    """
+    This function extracts signals of no interest from a functional time series within an
+    arbitrary number of tissue masks. Masks are flattened to voxel index arrays once and the time
+    series is read in chunks of volumes, i.e. all signals are extracted in one sequential read of
+    the time series. For each mask, the mean and the (spatial) variance of each volume are
+    computed. If principal components are requested (aCompCor, cf. Behzadi et al. 2007), mask
+    voxels are gathered into a (voxels x time) float32 array during the same read. Voxel time
+    series are then detrended (constant and linear term) and variance normalized and the temporal
+    components are computed by a singular value decomposition.
+    Inputs:
+        *input: filename or nibabel image of time series.
+        *masks: list of filenames or arrays of masks (voxels with value 1 are used).
+        *n_components: number of principal components per mask.
+        *chunk_size: number of volumes which are read at once.
+    Outputs:
+        *signals: dictionary with mean (nt x n_mask), var (nt x n_mask) and pca (list of
+            nt x n_components arrays).
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import numpy as np
+    from lib.io.load_volume import load_volume
+
+    # time series proxy
+    data_img = load_volume(input, mode="image")
+    nt = data_img.shape[3]
+
+    # mask indices
+    ind = []
+    for mask in masks:
+        if isinstance(mask, str):
+            mask = load_volume(mask, dtype="native")
+        ind.append(np.flatnonzero(np.asarray(mask) == 1))
+
+    # gathered mask voxels for principal components
+    data_pca = []
+    if n_components:
+        data_pca = [np.zeros((len(ind[i]), nt), dtype=np.float32) for i in range(len(ind))]
+
+    # extract signals in chunks of volumes
+    mean_array = np.zeros((nt, len(ind)))
+    var_array = np.zeros((nt, len(ind)))
+    for t in range(0, nt, chunk_size):
+        data_array = load_volume(data_img, vol=slice(t, t+chunk_size), dtype="float64")
+        data_array = np.reshape(data_array, (-1, np.shape(data_array)[3]))
+        for i in range(len(ind)):
+            data_mask = data_array[ind[i]]
+            mean_array[t:t+chunk_size,i] = np.mean(data_mask, axis=0)
+            var_array[t:t+chunk_size,i] = np.var(data_mask, axis=0)
+            if n_components:
+                data_pca[i][:,t:t+chunk_size] = data_mask
+
+    # principal components of detrended and variance normalized voxel time series
+    pca = []
+    if n_components:
+        x = np.arange(nt)
+        Q, _ = np.linalg.qr(np.stack((np.ones(nt), x), axis=1))
+        for i in range(len(ind)):
+            data_mask = data_pca[i].astype(np.float64)
+            data_mask -= np.dot(np.dot(data_mask, Q), Q.T)
+            data_std = np.std(data_mask, axis=1)
+            data_mask = data_mask[data_std > 0] / data_std[data_std > 0, np.newaxis]
+            u, _, _ = np.linalg.svd(data_mask.T, full_matrices=False)
+            pca.append(u[:,:n_components])
+
+    signals = dict()
+    signals["mean"] = mean_array
+    signals["var"] = var_array
+    signals["pca"] = pca
+
+    return signals
@@ -0,0 +1,145 @@
+def get_volume_quality(input, input_ref, input_mask=None, r_threshold=0.95, n_sample=5000,
+                       chunk_size=10, path_output="", name_output="", write_output=False):
+    """
+    This function computes quality metrics for each volume of one or more functional time series to
+    identify corrupted volumes (cf. Marquardt et al. 2017; Bergmann et al. 2019). For each volume,
+    the spatial Pearson correlation to a reference volume and to the previous volume (across runs)
+    and the Shapiro-Wilk test of normality are computed. The reference is masked and z-scored once.
+    Volumes are read in chunks, masked and z-scored as (voxels x time) matrix, i.e. all
+    correlations of one chunk are computed by one matrix-vector product. The Shapiro-Wilk test is
+    computed from a fixed random subsample of voxels (the p-value of the test is not accurate for
+    more than 5000 samples), which keeps the test cheap. Volumes whose
+    correlation to the reference is below threshold are denoted in a regressor of no interest.
+    Optionally, the regressor of each run is written to <run folder>/outlier and a summary file is
+    written to the output folder.
+    Inputs:
+        *input: filename or list of filenames of 4d time series.
+        *input_ref: filename of reference volume.
+        *input_mask: filename of mask in reference space (optional).
+        *r_threshold: threshold for pearson correlation and shapiro-wilk test statistic.
+        *n_sample: number of voxels used for the shapiro-wilk test (all voxels if not set).
+        *chunk_size: number of volumes which are read at once.
+        *path_output: path where summary file is saved.
+        *name_output: basename of summary and regressor files.
+        *write_output: write summary file and regressors.
+    Outputs:
+        *results: dictionary with r- and p-values of each volume (r_pearson_0, p_pearson_0,
+            r_pearson, p_pearson, r_shapiro, p_shapiro), outlier regressor of each run and
+            summary of each run (pearson_run, outlier_pearson_0, outlier_shapiro).
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import os
+    import numpy as np
+    from scipy.stats import shapiro
+    from scipy.special import betainc
+    from lib.io.load_volume import load_volume
+
+    if isinstance(input, str):
+        input = [input]
+
+    # mask
+    data_ref = load_volume(input_ref, dtype="float64")
+    if input_mask:
+        mask_array = load_volume(input_mask, dtype="float64") == 1
+    else:
+        mask_array = np.ones(np.shape(data_ref), dtype=bool)
+    ind_mask = np.flatnonzero(mask_array)
+    n_vox = len(ind_mask)
+
+    # z-scored reference
+    data_ref = data_ref.flatten()[ind_mask]
+    z_ref = (data_ref - np.mean(data_ref)) / np.std(data_ref)
+
+    # voxel subsample for shapiro-wilk test
+    if n_sample and n_sample < n_vox:
+        ind_sample = np.sort(np.random.default_rng(0).choice(n_vox, n_sample, replace=False))
+    else:
+        ind_sample = np.arange(n_vox)
+
+    def zscore(x):
+        x = x - np.mean(x, axis=0)
+        return x / np.sqrt(np.mean(x**2, axis=0))
+
+    def pvalue(r):
+        # two-sided p-value of pearson correlation (same as scipy.stats.pearsonr)
+        r = np.clip(r, -1, 1)
+        return betainc(n_vox / 2 - 1, 0.5, np.maximum(1 - r**2, 0))
+
+    results = dict()
+    results["r_pearson_0"] = []
+    results["r_pearson"] = []
+    results["r_shapiro"] = []
+    results["p_shapiro"] = []
+    results["regressor"] = []
+    results["pearson_run"] = []
+    results["outlier_pearson_0"] = []
+    results["outlier_shapiro"] = []
+    z_prev = None
+    for i in range(len(input)):
+        nt = load_volume(input[i], mode="image").shape[3]
+
+        r_pearson_0 = np.zeros(nt)
+        r_shapiro = np.zeros(nt)
+        p_shapiro = np.zeros(nt)
+        for t in range(0, nt, chunk_size):
+            data_array = load_volume(input[i], vol=slice(t, t+chunk_size), dtype="float64")
+            data_array = np.reshape(data_array, (-1, np.shape(data_array)[3]))[ind_mask]
+            n_chunk = np.shape(data_array)[1]
+
+            # shapiro-wilk test
+            res = [shapiro(x) for x in data_array[ind_sample].T]
+            r_shapiro[t:t+n_chunk] = [r for r, _ in res]
+            p_shapiro[t:t+n_chunk] = [p for _, p in res]
+
+            # pearson correlation to reference and to previous volume
+            z_array = zscore(data_array)
+            r_pearson_0[t:t+n_chunk] = np.dot(z_ref, z_array) / n_vox
+            if z_prev is not None:
+                z_array = np.concatenate((z_prev[:,None], z_array), axis=1)
+            results["r_pearson"].append(np.sum(z_array[:,:-1] * z_array[:,1:], axis=0) / n_vox)
+            z_prev = z_array[:,-1]
+
+        # run summary
+        regressor = (r_pearson_0 < r_threshold).astype(int)
+        results["r_pearson_0"].append(r_pearson_0)
+        results["r_shapiro"].append(r_shapiro)
+        results["p_shapiro"].append(p_shapiro)
+        results["regressor"].append(regressor)
+        results["pearson_run"].append(np.mean(r_pearson_0))
+        results["outlier_pearson_0"].append(np.sum(regressor) / nt * 100)
+        results["outlier_shapiro"].append(np.sum(r_shapiro < r_threshold) / nt * 100)
+
+    for key in ["r_pearson_0", "r_pearson", "r_shapiro", "p_shapiro"]:
+        results[key] = np.concatenate(results[key])
+    results["p_pearson_0"] = pvalue(results["r_pearson_0"])
+    results["p_pearson"] = pvalue(results["r_pearson"])
+
+    # write regressors and summary file
+    if write_output:
+        if not os.path.exists(path_output):
+            os.makedirs(path_output)
+
+        for i in range(len(input)):
+            path_regressor = os.path.join(os.path.dirname(input[i]), "outlier")
+            if not os.path.exists(path_regressor):
+                os.makedirs(path_regressor)
+
+            np.savetxt(os.path.join(path_regressor, "correlation_regressor_"+name_output+".txt"),
+                       results["regressor"][i], fmt="%d")
+
+        with open(os.path.join(path_output, "correlation_"+name_output+".txt"), "w") as file:
+            file.write("Percentage of volumes below threshold\n")
+            file.write("Correlation threshold: "+str(r_threshold)+"\n\n")
+            for i in range(len(input)):
+                file.write("Run: "+str(i+1)+"\n")
+                file.write("----------\n")
+                file.write("Pearson (average within run): "+str(results["pearson_run"][i])+"\n")
+                file.write("Outlier percentage (pearson to ref): " + \
+                           str(results["outlier_pearson_0"][i])+"\n")
+                file.write("Outlier percentage (shapiro): " + \
+                           str(results["outlier_shapiro"][i])+"\n\n\n")
+
+    return results
@@ -1,4 +1,4 @@
-def slice_timing_correction(input, TR_old, TR_new, order, prefix="a"):    
+def slice_timing_correction(input, TR_old, TR_new, order, prefix="a", n_jobs=1):    
     """
     This function performs slice timing correction of a nifti time series. For interleaved slice 
     ordering, interleaved ascending is assumed. The correction is done by temporal interpolation of
@@ -6,25 +6,30 @@ def slice_timing_correction(input, TR_old, TR_new, order, prefix="a"):
     the first and last volumes of the time series are appended at the beginning and at the end,
     respectively. These time points are removed again after the interpolation step. The interpolated
     time series is sampled onto a regular grid with a defined new TR. Therefore, the reference slice 
-    is always the first slice acquired at t = 0. Only for writing the new TR in the header of the
-    output time series, AFNI has to be included in the search path.
+    is always the first slice acquired at t = 0. Since all voxels within one slice share the same
+    acquisition time, the cubic interpolation matrix is computed once per slice and applied to all
+    voxel time series of that slice by one matrix product. Slices can optionally be processed in
+    parallel. Only for writing the new TR in the header of the output time series, AFNI has to be
+    included in the search path.
     Inputs:
         *input: filename of nifti time series.
         *TR_old: TR of time series in seconds.
         *TR_new: TR of slice timing corrected time series in s.
         *order: slice ordering (ascending, descending, interleaved).
         *prefix: prefix of output time series basename.
+        *n_jobs: number of slices which are interpolated in parallel.
             
     created by Daniel Haenelt
     Date created: 11-03-2019
-    Last modified: 18-03-2019
+    Last modified: 18-10-2026
     """
     import os
     import sys
     import numpy as np
     import nibabel as nb
-    from scipy.interpolate import InterpolatedUnivariateSpline as Interp
+    from concurrent.futures import ThreadPoolExecutor
     from lib.io.get_filename import get_filename
+    from lib.utils.temporal_resampler import TemporalResampler
 
     # get filename
     path_file, name_file, ext_file = get_filename(input)
@@ -38,9 +43,9 @@ def slice_timing_correction(input, TR_old, TR_new, order, prefix="a"):
 
     # load array with appended volumes
     data_array = np.zeros((nx, ny, nz, nt+2))
-    data_array[:,:,:,0] = data.get_fdata()[:,:,:,0]
-    data_array[:,:,:,-1] = data.get_fdata()[:,:,:,-1]
     data_array[:,:,:,1:-1] = data.get_fdata()
+    data_array[:,:,:,0] = data_array[:,:,:,1]
+    data_array[:,:,:,-1] = data_array[:,:,:,-2]
 
     # get slice order
     if order is "ascending":
@@ -64,13 +69,18 @@ def slice_timing_correction(input, TR_old, TR_new, order, prefix="a"):
 
     # temporal interpolation
     data_array_corrected = np.zeros((nx,ny,nz,len(t_new)))
-    for z in range(nz):
+    def interpolate_slice(z):
         print("Slice timing correction for slice: "+str(z+1)+"/"+str(nz))
-        for x in range(nx):
-            for y in range(ny):
-                t = np.arange(z*TA-TR_old, z*TA+(nt+1)*TR_old, TR_old)
-                cubic_interper = Interp(t, data_array[x,y,slice_order[z],:], k=3)
-                data_array_corrected[x,y,slice_order[z],:] = cubic_interper(t_new)
+        t = np.arange(z*TA-TR_old, z*TA+(nt+1)*TR_old, TR_old)
+        resampler = TemporalResampler(t, t_new, kind="cubic")
+        data_array_corrected[:,:,slice_order[z],:] = resampler.apply(data_array[:,:,slice_order[z],:])
+
+    if n_jobs > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            list(executor.map(interpolate_slice, range(nz)))
+    else:
+        for z in range(nz):
+            interpolate_slice(z)
 
     # delete appended volumes
     vols_keep1 = t_new >= 0
@@ -79,8 +89,8 @@ def slice_timing_correction(input, TR_old, TR_new, order, prefix="a"):
     data_array_corrected = data_array_corrected[:,:,:,vols_keep]
 
     # clean corrected array
-    data_min = np.min(data.get_fdata())
-    data_max = np.max(data.get_fdata())    
+    data_min = np.min(data_array)
+    data_max = np.max(data_array)
     data_array_corrected[np.isnan(data_array_corrected)] = 0
     data_array_corrected[data_array_corrected < data_min] = data_min
     data_array_corrected[data_array_corrected > data_max] = data_max
@@ -3,3 +3,5 @@ from .estimate_pv import estimate_pv
 from .average_time_series import average_time_series
 from .get_onset_vols import get_onset_vols
 from .demean_time_series import demean_time_series
+from .get_condition_stats import get_condition_stats
+from .get_block_stats import get_block_stats
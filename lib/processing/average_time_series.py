@@ -1,29 +1,36 @@
-def average_time_series(img_input, path_output, name_output):
+def average_time_series(img_input, path_output, name_output, chunk_size=10):
     """
-    This function computes the element-wise average of multiple nifti files.
+    This function computes the element-wise average of multiple nifti files. Time series are read
+    in chunks of volumes.
     Inputs:
         *img_input: list of nifti input paths.
         *path_output: path where output is saved.
         *name_output: basename of output files.
+        *chunk_size: number of volumes which are read at once.
     
     created by Daniel Haenelt
     Date created: 03-05-2019
-    Last modified: 03-05-2019
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
     import nibabel as nb
+    from lib.io.load_volume import load_volume
 
     # make output folder
     if not os.path.exists(path_output):
         os.mkdir(path_output)
 
     # load first dataset to initialize final time series
-    res = nb.load(img_input[0])
-    res_array = np.zeros_like(res.get_fdata())
+    res = load_volume(img_input[0], mode="image")
+    res_array = np.zeros(res.shape)
+    nt = res.shape[3]
     
-    for i in range(len(img_input)):    
-        res_array += nb.load(img_input[i]).get_fdata()
+    for i in range(len(img_input)):
+        for t in range(0, nt, chunk_size):
+            res_array[:,:,:,t:t+chunk_size] += load_volume(img_input[i], 
+                                                           vol=slice(t, t+chunk_size), 
+                                                           dtype="float64")
     
     # divide summed time series by number of time series
     res_array = res_array / len(img_input)
@@ -2,131 +2,82 @@ def estimate_pv(input_target, input_border, path_output, name_output):
     """
     This function estimates the partial volume contribution in each image voxel of a target image 
     from an upsampled binary image depicting the GM/WM or GM/CSF border. Partial voluming is
-    estimated by downsampling the binary image using a moving-average like algorithm and calculating
-    the ratio of both binary elements within each target voxel.
+    estimated by downsampling the binary image and calculating the ratio of both binary elements 
+    within each target voxel. Downsampling is an area-weighted average, i.e. each upsampled voxel is
+    weighted by its fractional overlap with the target voxel. The weights are separable and stored
+    as one sparse weight matrix per axis which are applied consecutively by tensor contraction. NaNs
+    in the upsampled image are excluded from the average. Several border images can be given at
+    once and share the same weight matrices.
     Inputs:
         *input_target: target space for which partial voluming is estimated.
-        *input_border: upsampled binary border depicting the high-resolution tissue border.
+        *input_border: upsampled binary border depicting the high-resolution tissue border (or list).
         *path_output: path where output is saved.
-        *name_output: basename of output image.
+        *name_output: basename of output image (or list).
+    Outputs:
+        *pve_array: partial volume estimate in target space (or list).
         
     created by Daniel Haenelt
     Date created: 27-04-2019
-    Last modified: 29-04-2019
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
     import nibabel as nb
+    import scipy.sparse as sparse
 
-    # load data
+    # load target
     target = nb.load(input_target)
-    border = nb.load(input_border)
-    border_array = border.get_fdata()
-
-    # downsampling parameters
-    matrix_up = border.header["dim"][1:4]
     matrix_down = target.header["dim"][1:4]
-    magn_factor = matrix_up/matrix_down
 
-    # sampling steps
-    p = np.arange(0,matrix_down[0]*magn_factor[0],magn_factor[0])
-    q = np.arange(0,matrix_down[1]*magn_factor[1],magn_factor[1])
-    r = np.arange(0,matrix_down[2]*magn_factor[2],magn_factor[2])
+    # single border input
+    if not isinstance(input_border, (list, tuple)):
+        return estimate_pv(input_target, [input_border], path_output, [name_output])[0]
 
-    # initialise matrices
-    M = np.zeros(target.header["dim"][1:4]);
-    start_weight = np.zeros(3)
-    end_weight = np.zeros(3)
+    def get_weights(n_down, n_up):
+        # overlap of each upsampled voxel [j, j+1) with target voxel [start, end)
+        start = np.arange(n_down) * n_up / n_down
+        end = np.append(start[1:], n_up)
+        j = np.arange(n_up)
+        W = np.minimum(j[None,:]+1, end[:,None]) - np.maximum(j[None,:], start[:,None])
+        W[W < 0] = 0
+        return sparse.csr_matrix(W)
 
-    # downsampling using a moving-average like algorithm
-    for i in range(len(p)):
-           
-        # weightings (start_weight)
-        if np.mod(p[i],1) != 0:
-            start_weight[0] = 1 - np.mod(p[i],1)
-        else:
-            start_weight[0] = 1
-        
-        # weightings (end_weight)
-        if i == len(p)-1:
-            end_weight[0] = 1
-        else:
-            if np.mod(p[i+1],1) != 0:
-                end_weight[0] = np.mod(p[i+1],1)
-            else:
-                end_weight[0] = 1
-        
-        for j in range(len(q)):
-            
-            # weightings (start_weight)
-            if np.mod(q[j],1) != 0:
-                start_weight[1] = 1 - np.mod(q[j],1)
-            else:
-                start_weight[1] = 1
+    def contract(W, arr, axis):
+        arr = np.moveaxis(arr, axis, 0)
+        dim = np.shape(arr)
+        arr = W.dot(np.reshape(arr, (dim[0], -1)))
+        arr = np.reshape(arr, (W.shape[0],) + dim[1:])
+        return np.moveaxis(arr, 0, axis)
+
+    W = None
+    pve_array = []
+    for i in range(len(input_border)):
+
+        # load border
+        border = nb.load(input_border[i])
+        border_array = border.get_fdata()
         
-            # weightings (end_weight)
-            if j == len(q)-1:
-                end_weight[1] = 1
-            else:
-                if np.mod(q[j+1],1) != 0:
-                    end_weight[1] = np.mod(q[j+1],1)
-                else:
-                    end_weight[1] = 1
-            
-            for k in range(len(r)):
-                
-                # weightings (start_weight)
-                if np.mod(r[k],1) != 0:
-                    start_weight[2] = 1 - np.mod(r[k],1)
-                else:
-                    start_weight[2] = 1
+        # weight matrices (computed once for all borders of the same size)
+        matrix_up = border.header["dim"][1:4]
+        if W is None or np.any(matrix_up != matrix_up_prev):
+            W = [get_weights(matrix_down[j], matrix_up[j]) for j in range(3)]
+            matrix_up_prev = matrix_up
+
+        # exclude nans
+        mask_array = (~np.isnan(border_array)).astype(float)
+        border_array[np.isnan(border_array)] = 0
         
-                # weightings (end_weight)
-                if k == len(r)-1:
-                    end_weight[2] = 1
-                else:
-                    if np.mod(r[k+1],1) != 0:
-                        end_weight[2] = np.mod(r[k+1],1)
-                    else:
-                        end_weight[2] = 1
-                
-                # p-coordinates
-                if i == len(p)-1:
-                    x = np.arange(np.round(p[-1]-0.5),matrix_up[0],1).astype(int)
-                else:
-                    x = np.arange(np.round(p[i]-0.5),np.round(p[i+1]-0.5),1).astype(int)
-                
-                # q-coordinates
-                if j == len(q)-1:
-                    y = np.arange(np.round(q[-1]-0.5),matrix_up[1],1).astype(int)
-                else:
-                    y = np.arange(np.round(q[j]-0.5),np.round(q[j+1]-0.5),1).astype(int)
-                
-                # r-coordinates
-                if k == len(r)-1:
-                    z = np.arange(np.round(r[-1]-0.5),matrix_up[2],1).astype(int)
-                else:
-                    z = np.arange(np.round(r[k]-0.5),np.round(r[k+1]-0.5),1).astype(int)
-                
-                # define submatrix
-                X = border_array[x,:,:]
-                X = X[:,y,:]
-                X = X[:,:,z]
-                
-                # apply weightings
-                X[0,:,:] = start_weight[0] * X[0,:,:];
-                X[:,0,:] = start_weight[1] * X[:,0,:];
-                X[:,:,0] = start_weight[2] * X[:,:,0];
-                X[-1,:,:] = end_weight[0] * X[-1,:,:];
-                X[:,-1,:] = end_weight[1] * X[:,-1,:];
-                X[:,:,-1] = end_weight[2] * X[:,:,-1];                   
-                
-                X = np.reshape(X, np.size(X))
-                X = X[~np.isnan(X)]
-                
-                # voxel value in target space
-                M[i,j,k] = np.sum(X) / len(X)
-    
-    # save data
-    output = nb.Nifti1Image(M, target.affine, target.header)
-    nb.save(output, os.path.join(path_output,name_output+"_pve.nii"))
\ No newline at end of file
+        # weighted sum and weighted number of upsampled voxels in each target voxel
+        for j in range(3):
+            border_array = contract(W[j], border_array, j)
+            mask_array = contract(W[j], mask_array, j)
+
+        M = np.full(matrix_down, np.nan)
+        np.divide(border_array, mask_array, out=M, where=mask_array > 0)
+        pve_array.append(M)
+
+        # save data
+        output = nb.Nifti1Image(M, target.affine, target.header)
+        nb.save(output, os.path.join(path_output,name_output[i]+"_pve.nii"))
+
+    return pve_array
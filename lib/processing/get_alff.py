@@ -1,89 +1,119 @@
-def get_alff(input, TR, path_output, hp_freq=0.01, lp_freq=0.08, cleanup=True):
+def get_alff(input, TR, path_output, hp_freq=0.01, lp_freq=0.08, cleanup=True, mask=None, 
+             chunk_size=10000):
     """
     This function calculates ALFF and fALFF from a preprocessed (motion correction, nuisance 
-    regression, etc.) resting-state time series. ALFF is computed by bandpass filtering the time 
-    time series and computing the voxel-wise standard deviation of the filtered time series. fALFF
-    is computed by dividing ALFF by the voxel-wise standard deviation of the unfiltered time series.
-    Additionally, ALFF and fALFF are expressed in z-score. This function follows the script found in
+    regression, etc.) resting-state time series. ALFF is the voxel-wise standard deviation of the
+    bandpass filtered time series. fALFF is computed by dividing ALFF by the voxel-wise standard 
+    deviation of the unfiltered time series. Additionally, ALFF and fALFF are expressed in z-score.
+    This function follows the script found in
     https://github.com/FCP-INDI/C-PAC/blob/master/CPAC/alff/alff.py
+    Instead of writing filtered time series, both standard deviations are computed from one real
+    FFT of the (voxels x time) matrix using Parseval's theorem. The quadratic trend is removed
+    before the FFT (as done by default in 3dBandpass). Voxels are processed in chunks and can be 
+    restricted to a mask. In that case, z-scores are computed within the mask.
     Inputs:
         *input: input time series.
         *TR: repetition time in s.
+        *path_output: path where output is saved.
         *hp_freq: highpass cutoff frequency in Hz.
         *lp_freq: lowpass cutoff frequency in Hz.
-        *cleanup: delete intermediate files.
+        *cleanup: not used anymore since no intermediate files are written.
+        *mask: binary mask array or filename (optional).
+        *chunk_size: number of voxel time series which are transformed at once.
+    Outputs:
+        *alff_array: alff array.
+        *falff_array: falff array.
 
     created by Daniel Haenelt
     Date created: 27-02-2019        
-    Last modified: 15-04-2020
+    Last modified: 18-10-2026
     """
     import os
+    import numpy as np
     import nibabel as nb
     from scipy.stats import zscore
-    from nipype.interfaces.afni.preprocess import Bandpass
-    from nipype.interfaces.afni.utils import TStat, Calc
-    from lib.io.get_filename import get_filename
+    from lib.io.load_volume import load_volume
 
     # make output folder
     if not os.path.exists(path_output):
         os.makedirs(path_output)
 
-    # get path and filename
-    _, file, _ = get_filename(input)
-    
-    # filtering
-    bandpass = Bandpass()
-    bandpass.inputs.in_file = input
-    bandpass.inputs.highpass = hp_freq
-    bandpass.inputs.lowpass = lp_freq
-    bandpass.inputs.tr = TR
-    bandpass.inputs.outputtype = 'NIFTI'
-    bandpass.inputs.out_file = os.path.join(path_output,file + "_filtered.nii")
-    bandpass.run() 
-    
-    # standard deviation over frequency
-    stddev_filtered = TStat()
-    stddev_filtered.inputs.in_file = os.path.join(path_output,file + "_filtered.nii")
-    stddev_filtered.inputs.args = "-stdev"
-    stddev_filtered.inputs.outputtype = 'NIFTI'
-    stddev_filtered.inputs.out_file = os.path.join(path_output,'alff.nii')
-    stddev_filtered.run()
-    
-    # standard deviation of the unfiltered nuisance corrected image
-    stddev_unfiltered = TStat()
-    stddev_unfiltered.inputs.in_file = input
-    stddev_unfiltered.inputs.args = "-stdev"
-    stddev_unfiltered.inputs.outputtype = 'NIFTI'
-    stddev_unfiltered.inputs.out_file = os.path.join(path_output,'temp.nii')
-    stddev_unfiltered.run()
-    
-    # falff calculations
-    falff = Calc()
-    falff.inputs.in_file_a = os.path.join(path_output,'alff.nii')
-    falff.inputs.in_file_b = os.path.join(path_output,'temp.nii')
-    falff.inputs.args = '-float'
-    falff.inputs.expr = '(1.0*a)/(1.0*b)'
-    falff.inputs.outputtype = 'NIFTI'
-    falff.inputs.out_file = os.path.join(path_output,'falff.nii')
-    falff.run()
-    
-    # alff in z-score
-    alff_img = nb.load(os.path.join(path_output,"alff.nii"))
-    alff_array = alff_img.get_fdata()
-    alff_array = zscore(alff_array, axis=None)
-    
-    output = nb.Nifti1Image(alff_array, alff_img.affine, alff_img.header)
-    nb.save(output, os.path.join(path_output,"alff_z.nii"))
-    
-    # falff in z-score
-    falff_img = nb.load(os.path.join(path_output,"falff.nii"))
-    falff_array = falff_img.get_fdata()
-    falff_array = zscore(falff_array, axis=None)
-    
-    output = nb.Nifti1Image(falff_array, falff_img.affine, falff_img.header)
-    nb.save(output, os.path.join(path_output,"falff_z.nii"))
+    # load data
+    data_img = load_volume(input, mode="image")
+    data_array = load_volume(data_img, dtype="native")
+    dim = np.shape(data_array)[:3]
+    nt = np.shape(data_array)[3]
+    data_array = np.reshape(data_array, (-1, nt))
+
+    # voxels to be processed
+    if mask is None:
+        mask_array = np.ones(np.prod(dim), dtype=bool)
+    else:
+        if isinstance(mask, str):
+            mask = load_volume(mask, dtype="native")
+        mask_array = np.reshape(mask, -1) != 0
+    ind = np.where(mask_array)[0]
     
-    # cleanup
-    if cleanup:
-        os.remove(os.path.join(path_output,"temp.nii"))
-        os.remove(os.path.join(path_output,file + "_filtered.nii"))
\ No newline at end of file
+    # orthonormal basis for quadratic detrending
+    t = np.arange(nt)
+    Q, _ = np.linalg.qr(np.stack((np.ones(nt), t, t**2), axis=1).astype(np.float64))
+
+    # parseval weights of all and of bandpass filtered frequencies
+    freq = np.fft.rfftfreq(nt, d=TR)
+    weight = 2 * np.ones(len(freq))
+    weight[0] = 1
+    if not np.mod(nt, 2):
+        weight[-1] = 1
+    weight_band = weight * ( freq >= hp_freq ) * ( freq <= lp_freq )
+
+    def get_std(power, dc, w):
+        # standard deviation (n-1) from power spectrum
+        sum_sq = np.dot(power, w) / nt
+        mean = dc * w[0] / nt
+        return np.sqrt(np.maximum(sum_sq - nt * mean**2, 0) / (nt - 1))
+
+    # alff and standard deviation of unfiltered time series
+    alff_array = np.zeros(np.prod(dim))
+    std_array = np.zeros(np.prod(dim))
+    for i in range(0, len(ind), chunk_size):
+        ind_chunk = ind[i:i+chunk_size]
+        y = data_array[ind_chunk].astype(np.float64)
+        y_max = np.max(np.abs(y), axis=1)
+        y = y - np.dot(np.dot(y, Q), Q.T)
+
+        Y = np.fft.rfft(y, axis=1)
+        power = np.abs(Y)**2
+        alff = get_std(power, Y[:,0].real, weight_band)
+        std = get_std(power, Y[:,0].real, weight)
+
+        # time series which are constant apart from rounding errors
+        alff[std <= 1e-10 * y_max] = 0
+        std[std <= 1e-10 * y_max] = 0
+
+        alff_array[ind_chunk] = alff
+        std_array[ind_chunk] = std
+
+    # falff (set to zero where the time series is constant)
+    falff_array = np.zeros(np.prod(dim))
+    np.divide(alff_array, std_array, out=falff_array, where=std_array > 0)
+
+    # z-score
+    alff_z_array = np.zeros(np.prod(dim))
+    falff_z_array = np.zeros(np.prod(dim))
+    alff_z_array[mask_array] = zscore(alff_array[mask_array], axis=None)
+    falff_z_array[mask_array] = zscore(falff_array[mask_array], axis=None)
+
+    # write output
+    header = data_img.header.copy()
+    header["dim"][0] = 3
+    header["dim"][4] = 1
+    header.set_data_dtype(np.float32)
+    for name, array in zip(["alff", "falff", "alff_z", "falff_z"],
+                           [alff_array, falff_array, alff_z_array, falff_z_array]):
+        output = nb.Nifti1Image(np.reshape(array, dim), data_img.affine, header)
+        nb.save(output, os.path.join(path_output, name+".nii"))
+
+    alff_array = np.reshape(alff_array, dim)
+    falff_array = np.reshape(falff_array, dim)
+
+    return alff_array, falff_array
@@ -0,0 +1,119 @@
+def get_block_stats(img_input, cond_input=None, outlier_input=None, condition0=None, 
+                    condition1=None, condition2=None, TR=1, skip_vol=0, cutoff_highpass=None, 
+                    mask=None, baseline_calculation="mean", tsnr_max=0, chunk_size=10):
+    """
+    This function computes statistical maps of a block design session consisting of several runs. 
+    Each run is read only once (see get_condition_stats) and all maps are computed from the 
+    condition-wise mean and standard deviation of the (highpass filtered) time series. For each 
+    run, the following maps are computed if the necessary conditions are given and averaged across 
+    runs afterwards:
+        *tsnr: temporal signal-to-noise ratio of all volumes (thresholded by tsnr_max if > 0).
+        *psc1, psc2: percent signal change between condition1 and condition2 (both contrast 
+        directions) relative to the baseline condition0.
+        *cnr1, cnr2: contrast-to-noise ratio between condition1 (condition2) and the baseline
+        condition0.
+        *od1, od2: ocular dominance index between condition1 and condition2 (both contrast 
+        directions) relative to the mean or maximum response within the mask.
+    Inputs:
+        *img_input: list of 4d nifti time series.
+        *cond_input: list of block design condition .mat files.
+        *outlier_input: list of regressor of no interest .txt files (optional).
+        *condition0: name of baseline condition.
+        *condition1: name of experimental condition 1.
+        *condition2: name of experimental condition 2.
+        *TR: repetition time in s.
+        *skip_vol: number of skipped time point of each block.
+        *cutoff_highpass: highpass cutoff period in s (no highpass filtering if not set).
+        *mask: binary mask array for od index baseline calculation.
+        *baseline_calculation: od index baseline calculation (mean, max).
+        *tsnr_max: threshold unrealistic high tsnr values of single runs (applied if set > 0).
+        *chunk_size: number of volumes which are loaded at once.
+    Outputs:
+        *results: averaged maps and single run tsnr maps (tsnr_runs) (dict).
+        
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import sys
+    import numpy as np
+    from lib.io.load_volume import load_volume
+    from lib.processing.get_onset_vols import get_onset_vols
+    from lib.processing.get_condition_stats import get_condition_stats
+
+    # get outlier dummy array if not outlier input
+    if not outlier_input:
+        outlier_input = np.zeros(len(img_input))
+
+    if mask is not None and baseline_calculation not in ["mean", "max"]:
+        sys.exit("Choose a valid baseline calculation!")
+
+    results = dict()
+    results["tsnr_runs"] = []
+    for i in range(len(img_input)):
+
+        # condition names and onsets (tsnr is computed from all volumes)
+        nt = load_volume(img_input[i], mode="image").shape[3]
+        name = []
+        onsets = [np.arange(nt)]
+        for condition in [condition0, condition1, condition2]:
+            if cond_input and condition:
+                name.append(condition)
+                onsets.append(get_onset_vols(cond_input[i], outlier_input[i], condition, TR, 
+                                             skip_vol))
+
+        # read time series once
+        mean_array, std_array = get_condition_stats(img_input[i], onsets, TR, cutoff_highpass, 
+                                                    chunk_size)
+        mean_all = mean_array[:,:,:,0]
+        std_all = std_array[:,:,:,0]
+        mean = dict(zip(name, np.moveaxis(mean_array[:,:,:,1:], 3, 0)))
+        std = dict(zip(name, np.moveaxis(std_array[:,:,:,1:], 3, 0)))
+
+        # maps of single run
+        res = dict()
+        
+        std_all[std_all == 0] = np.nan
+        res["tsnr"] = mean_all / std_all
+        res["tsnr"][np.isnan(res["tsnr"])] = 0
+        if tsnr_max:
+            res["tsnr"][res["tsnr"] > tsnr_max] = tsnr_max
+        results["tsnr_runs"].append(res["tsnr"])
+            
+        if condition0 in mean and condition1 in mean and condition2 in mean:
+            mean0 = mean[condition0].copy()
+            mean0[mean0 == 0] = np.nan
+            res["psc1"] = ( mean[condition1] - mean[condition2] ) / mean0 * 100
+            res["psc2"] = ( mean[condition2] - mean[condition1] ) / mean0 * 100
+            res["psc1"][np.isnan(res["psc1"])] = 0
+            res["psc2"][np.isnan(res["psc2"])] = 0
+
+        if condition0 in mean:
+            std0 = std[condition0].copy()
+            std0[std0 == 0] = np.nan
+            for j, condition in enumerate([condition1, condition2]):
+                if condition in mean:
+                    cnr = np.abs(mean[condition] - mean[condition0]) / std0 * 100
+                    cnr[np.isnan(cnr)] = 0
+                    res["cnr"+str(j+1)] = cnr
+
+        if mask is not None and condition1 in mean and condition2 in mean:
+            if baseline_calculation == "mean":
+                baseline1 = np.mean(mean[condition1][mask == 1])
+                baseline2 = np.mean(mean[condition2][mask == 1])
+            else:
+                baseline1 = np.max(mean[condition1][mask == 1])
+                baseline2 = np.max(mean[condition2][mask == 1])
+            res["od1"] = ( mean[condition1] / baseline1 - mean[condition2] / baseline2 ) * 100
+            res["od2"] = ( mean[condition2] / baseline2 - mean[condition1] / baseline1 ) * 100
+
+        # sum maps for each run
+        for key in res:
+            results[key] = results.get(key, 0) + res[key]
+
+    # divide by number of runs
+    for key in results:
+        if key != "tsnr_runs":
+            results[key] /= len(img_input)
+
+    return results
@@ -0,0 +1,91 @@
+def get_condition_stats(input, onsets, TR=None, cutoff_highpass=None, chunk_size=10):
+    """
+    This function computes the voxel-wise mean and standard deviation of the volumes belonging to
+    one or more experimental conditions of a time series. The time series is streamed once in chunks
+    of volumes from the image proxy (memory mapped for uncompressed nifti files) and running sums,
+    sums of squares and counts are accumulated for each condition. Optionally, the time series is
+    highpass filtered with the DCT basis set of spm_filter (see baseline_correction). Because the
+    filter is a projection, it is applied to the accumulated sums by additionally accumulating the
+    projections of the time series onto the basis set, i.e. the filtered time series is never held
+    in memory. To avoid cancellation errors in the sums of squares, the first volume is subtracted
+    from the time series before accumulation.
+    Inputs:
+        *input: filename of 4d nifti time series.
+        *onsets: list of volume indices of each condition (e.g. from get_onset_vols).
+        *TR: repetition time in s (only necessary for highpass filtering).
+        *cutoff_highpass: highpass cutoff period in s (no highpass filtering if not set).
+        *chunk_size: number of volumes which are loaded at once.
+    Outputs:
+        *mean_array: mean of each condition with shape (x, y, z, n_conditions).
+        *std_array: standard deviation of each condition with shape (x, y, z, n_conditions).
+        
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import numpy as np
+    from lib.io.load_volume import load_volume
+    from lib.preprocessing.get_dct_basis import get_dct_basis
+
+    # load proxy
+    data_img = load_volume(input, mode="image")
+    dim = data_img.shape[:3]
+    nt = data_img.shape[3]
+    n_vox = np.prod(dim)
+    n_cond = len(onsets)
+
+    # number of occurrences of each volume in each condition
+    C = np.zeros((nt, n_cond))
+    for i in range(n_cond):
+        np.add.at(C[:,i], np.asarray(onsets[i]).astype(int), 1)
+    counts = np.sum(C, axis=0)
+
+    # dct basis set
+    if cutoff_highpass:
+        X0 = get_dct_basis(nt, TR, cutoff_highpass)
+    else:
+        X0 = np.zeros((nt, 0))
+    n_basis = np.shape(X0)[1]
+
+    # reference volume
+    ref_array = load_volume(data_img, vol=0, dtype="float64").reshape(n_vox)
+
+    # accumulate running sums
+    S1 = np.zeros((n_vox, n_cond))
+    S2 = np.zeros((n_vox, n_cond))
+    P = np.zeros((n_cond, n_vox, n_basis))
+    beta = np.zeros((n_vox, n_basis))
+    for t in range(0, nt, chunk_size):
+        data_array = load_volume(data_img, vol=slice(t, t+chunk_size), dtype="float64")
+        data_array = np.reshape(data_array, (n_vox, -1)) - ref_array[:,None]
+
+        S1 += np.dot(data_array, C[t:t+chunk_size])
+        S2 += np.dot(data_array**2, C[t:t+chunk_size])
+        if n_basis:
+            beta += np.dot(data_array, X0[t:t+chunk_size])
+            for i in range(n_cond):
+                P[i] += np.dot(data_array * C[t:t+chunk_size,i], X0[t:t+chunk_size])
+
+    # mean and standard deviation of (filtered) time series
+    mean_array = np.zeros((n_vox, n_cond))
+    std_array = np.zeros((n_vox, n_cond))
+    for i in range(n_cond):
+        if not counts[i]:
+            mean_array[:,i] = np.nan
+            std_array[:,i] = np.nan
+            continue
+
+        # remove fitted basis functions from sums and sums of squares
+        fit_sum = np.dot(beta, np.dot(X0.T, C[:,i]))
+        G = np.dot(X0.T * C[:,i], X0)
+        sum1 = S1[:,i] - fit_sum
+        sum2 = S2[:,i] - 2 * np.sum(beta * P[i], axis=1) + np.sum(np.dot(beta, G) * beta, axis=1)
+
+        mean_array[:,i] = sum1 / counts[i]
+        std_array[:,i] = np.sqrt(np.maximum(sum2 / counts[i] - mean_array[:,i]**2, 0))
+        mean_array[:,i] += ref_array
+
+    mean_array = np.reshape(mean_array, dim + (n_cond,))
+    std_array = np.reshape(std_array, dim + (n_cond,))
+
+    return mean_array, std_array
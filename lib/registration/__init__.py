@@ -4,3 +4,4 @@ from .mask_ana import mask_ana
 from .mask_epi import mask_epi
 from .clean_ana import clean_ana
 from .apply_registration import apply_registration
+from .apply_coordinate_mapping4d import apply_coordinate_mapping4d
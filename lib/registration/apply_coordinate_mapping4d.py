@@ -0,0 +1,58 @@
+def apply_coordinate_mapping4d(data_array, cmap_array, interpolation="linear", padding="closest",
+                               chunk_size=10, n_jobs=1):
+    """
+    This function applies a coordinate mapping to a whole 4D time series in memory. The coordinate
+    mapping contains for each voxel in target space the voxel coordinates in source space. The
+    interpolation indices and weights are computed once from the coordinate mapping and stored as
+    sparse matrix which is then applied to chunks of volumes. Chunks can optionally be processed by
+    a pool of worker threads. Interpolation and padding follow apply_coordinate_mappings in nighres.
+    Inputs:
+        *data_array: 3D or 4D array in source space.
+        *cmap_array: 4D coordinate mapping (source coordinates in target space).
+        *interpolation: interpolation method (nearest, linear).
+        *padding: padding method (zero, closest).
+        *chunk_size: number of volumes which are transformed at once.
+        *n_jobs: number of chunks which are transformed in parallel.
+    Outputs:
+        *res: transformed array in target space.
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import numpy as np
+    from concurrent.futures import ThreadPoolExecutor
+    from lib.utils.get_interpolation_matrix import get_interpolation_matrix
+
+    # target and source dimensions
+    dim_target = np.shape(cmap_array)[:3]
+    dim_source = np.shape(data_array)[:3]
+
+    # interpolation matrix (computed once for all volumes)
+    vox = np.reshape(cmap_array, (-1, np.shape(cmap_array)[-1]))[:,:3]
+    M = get_interpolation_matrix(vox, dim_source, interpolation, padding)
+
+    # flatten source data to (voxels x time) matrix
+    is_4d = np.ndim(data_array) > 3
+    nt = np.shape(data_array)[3] if is_4d else 1
+    data_array = np.reshape(data_array, (np.prod(dim_source), nt))
+
+    # transform volumes in chunks
+    res = np.zeros((np.prod(dim_target), nt))
+    def transform_chunk(t):
+        res[:,t:t+chunk_size] = M.dot(data_array[:,t:t+chunk_size])
+
+    if n_jobs > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            list(executor.map(transform_chunk, range(0, nt, chunk_size)))
+    else:
+        for t in range(0, nt, chunk_size):
+            transform_chunk(t)
+
+    # reshape to target space
+    if is_4d:
+        res = np.reshape(res, dim_target + (nt,))
+    else:
+        res = np.reshape(res, dim_target)
+
+    return res
@@ -14,37 +14,27 @@ def apply_registration(file_in, cmap_in, file_out, interpolation="linear", r=[0.
     
     created by Daniel Haenelt
     Date created: 30-05-2020
-    Last modified: 02-06-2020
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
     import nibabel as nb
     from nighres.registration import apply_coordinate_mappings
-    from lib.io.get_filename import get_filename
     from lib.utils.upsample_volume import upsample_volume
        
     # make output folder     
     path_output = os.path.dirname(file_out)
     if not os.path.exists(path_output):
         os.makedirs(path_output)
-      
-    # filename for temporary cmap copy
-    _, _, ext_cmap = get_filename(cmap_in)  
-    tmp = np.random.randint(0, 10, 5)
-    tmp_string = ''.join(str(i) for i in tmp)
-    file_tmp = os.path.join(path_output,"tmp_"+tmp_string+ext_cmap)
-    file_tmp2 = os.path.join(path_output,"tmp2_"+tmp_string+ext_cmap)
     
     # adjust coordinate mapping
     if r:
     
-        # upsample cmap
-        upsample_volume(cmap_in, file_tmp, dxyz = r, rmode = "Linear")
-        upsample_volume(cmap_in, file_tmp2, dxyz = r, rmode = "NN")
+        # upsample cmap in memory
+        cmap = upsample_volume(cmap_in, dxyz = r, rmode = "Linear", write_output = False)
+        mask = upsample_volume(cmap_in, dxyz = r, rmode = "NN", write_output = False)
         
         # mask upsampled cmap
-        cmap = nb.load(file_tmp)
-        mask = nb.load(file_tmp2)
         
         cmap_array = cmap.get_fdata()
         mask_array = mask.get_fdata()
@@ -75,10 +65,5 @@ def apply_registration(file_in, cmap_in, file_out, interpolation="linear", r=[0.
     
     # write output
     nb.save(res["result"], file_out)
-    
-    # remove temporary files
-    if r:
-        os.remove(file_tmp)
-        os.remove(file_tmp2)
 
     return res["result"]
\ No newline at end of file
@@ -2,9 +2,9 @@ def get_flash2orig(file_flash, file_inv2, file_orig, path_output, cleanup=False)
     """
     This function computes the deformation field for the registration between a partial coverage
     GRE image and the freesurfer orig file. The following steps are performed: (1) set output 
-    folder structure, (2) get scanner transform GRE <-> inv2 and inv2 -> orig, (3) generate flash
-    cmap, (4) apply scanner transform inv2 -> GRE, (5) get flirt registration GRE -> inv2, (6) apply
-    flirt to GRE cmap, (7) apply scanner transform to GRE cmap, (8) apply final deformation to GRE.
+    folder structure, (2) get scanner transform GRE <-> inv2 and inv2 -> orig, (3) apply scanner
+    transform inv2 -> GRE, (4) get flirt registration GRE -> inv2, (5) compose flirt and scanner
+    transforms into one cmap in a single interpolation step, (6) apply final deformation to GRE.
     The function needs the FSL environment set.
     Inputs:
         *file_flash: input path for GRE image.
@@ -15,15 +15,14 @@ def get_flash2orig(file_flash, file_inv2, file_orig, path_output, cleanup=False)
     
     created by Daniel Haenelt
     Date created: 18-04-2019
-    Last modified: 16-05-2019
+    Last modified: 18-10-2026
     """
     import os
     import shutil as sh
     from nipype.interfaces.fsl import FLIRT
-    from nipype.interfaces.fsl.preprocess import ApplyXFM
     from nipype.interfaces.freesurfer.preprocess import MRIConvert
     from nighres.registration import apply_coordinate_mappings
-    from lib.cmap import generate_coordinate_mapping
+    from lib.cmap import compose_coordinate_mapping
     from lib.registration.get_scanner_transform import get_scanner_transform
 
     """
@@ -58,11 +57,6 @@ def get_flash2orig(file_flash, file_inv2, file_orig, path_output, cleanup=False)
     get_scanner_transform(os.path.join(path_temp,"flash.nii"), os.path.join(path_temp,"inv2.nii"), path_temp, False)
     get_scanner_transform(os.path.join(path_temp,"inv2.nii"), os.path.join(path_temp,"orig.nii"), path_temp, False)
 
-    """
-    generate coordinate mapping
-    """
-    generate_coordinate_mapping(os.path.join(path_temp,"flash.nii"), 0, path_temp, "flash", False, True)
-    
     """
     scanner transform inv2 to flash
     """
@@ -92,32 +86,18 @@ def get_flash2orig(file_flash, file_inv2, file_orig, path_output, cleanup=False)
     flirt.run()
     
     """
-    apply flirt to flash cmap
-    """
-    applyxfm = ApplyXFM()
-    applyxfm.inputs.in_file = os.path.join(path_temp,"cmap_flash.nii")
-    applyxfm.inputs.reference = os.path.join(path_temp,"flash.nii")
-    applyxfm.inputs.in_matrix_file = os.path.join(path_temp,"flirt_matrix.txt")
-    applyxfm.inputs.interp = "trilinear"
-    applyxfm.inputs.padding_size = 0
-    applyxfm.inputs.output_type = "NIFTI_GZ"
-    applyxfm.inputs.out_file = os.path.join(path_temp,"cmap_apply_flirt_def-img.nii.gz")
-    applyxfm.inputs.apply_xfm = True
-    applyxfm.run() 
-    
-    """
-    apply scanner transform to flash cmap
-    """
-    apply_coordinate_mappings(os.path.join(path_temp,"cmap_apply_flirt_def-img.nii.gz"),
-                              os.path.join(path_temp,"flash_2_inv2_scanner.nii"), # cmap 1
-                              os.path.join(path_temp,"inv2_2_orig_scanner.nii"), # cmap 2
-                              interpolation = "linear", # nearest or linear
-                              padding = "zero", # closest, zero or max
-                              save_data = True, # save output data to file (boolean)
-                              overwrite = True, # overwrite existing results (boolean)
-                              output_dir = path_temp, # output directory
-                              file_name = "cmap_apply_scanner" # base name with file extension for output
-                              )
+    merge flirt and scanner transforms
+    """
+    compose_coordinate_mapping([(os.path.join(path_temp,"flirt_matrix.txt"), # flirt matrix
+                                 os.path.join(path_temp,"flash.nii"), # flirt input
+                                 os.path.join(path_temp,"flash.nii")), # flirt reference (flash grid)
+                                os.path.join(path_temp,"flash_2_inv2_scanner.nii"), # cmap 1
+                                os.path.join(path_temp,"inv2_2_orig_scanner.nii"), # cmap 2
+                                ],
+                               interpolation = "linear", # nearest or linear
+                               padding = "zero", # closest or zero
+                               file_out = os.path.join(path_temp,"cmap_apply_scanner_def-img.nii.gz"),
+                               )
     
     """
     apply deformation to source image
@@ -16,7 +16,7 @@ def mask_epi(file_epi, file_t1, file_mask, niter, sigma, file_reg=""):
         
     created by Daniel Haenelt
     Date created: 13-02-2019
-    Last modified: 10-09-2020
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
@@ -27,6 +27,7 @@ def mask_epi(file_epi, file_t1, file_mask, niter, sigma, file_reg=""):
     from nighres.registration import embedded_antsreg, apply_coordinate_mappings
     from lib.registration.get_scanner_transform import get_scanner_transform
     from lib.io.get_filename import get_filename
+    from lib.cmap.compose_coordinate_mapping import compose_coordinate_mapping
     from lib.cmap.expand_coordinate_mapping import expand_coordinate_mapping
 
     # get paths and filenames
@@ -118,19 +119,13 @@ def mask_epi(file_epi, file_t1, file_mask, niter, sigma, file_reg=""):
                               write_output=True)
         
     # apply ants cmap to header transformation
-    cmap_def = apply_coordinate_mappings(file_cmap_reg, # input
-                                         file_cmap_ants,
-                                         interpolation="linear", # nearest or linear
-                                         padding="zero", # closest, zero or max
-                                         save_data=False,
-                                         overwrite=False,
-                                         output_dir=None,
-                                         file_name=None
-                                         )
-    nb.save(cmap_def["result"], file_cmap_def)
+    cmap_def = compose_coordinate_mapping([file_cmap_reg, file_cmap_ants],
+                                          interpolation="linear", # nearest or linear
+                                          padding="zero", # closest or zero
+                                          ).get_nifti(dtype="float32")
     
     # remove outliers and expand
-    arr_cmap = cmap_def["result"].get_fdata()
+    arr_cmap = cmap_def.get_fdata()
     
     pts_cmap0 = arr_cmap[0,0,0,0]
     pts_cmap1 = arr_cmap[0,0,0,1]
@@ -141,7 +136,7 @@ def mask_epi(file_epi, file_t1, file_mask, niter, sigma, file_reg=""):
     arr_cmap[arr_cmap == pts_cmap1] = 0
     arr_cmap[arr_cmap == pts_cmap2] = 0
 
-    output = nb.Nifti1Image(arr_cmap, cmap_def["result"].affine, cmap_def["result"].header)
+    output = nb.Nifti1Image(arr_cmap, cmap_def.affine, cmap_def.header)
     nb.save(output, file_cmap_def)
     
     expand_coordinate_mapping(cmap_in=file_cmap_def, 
@@ -13,3 +13,4 @@ from .orthographic_projection import orthographic_projection
 from .robust_combination import robust_combination
 from .shift_white import shift_white
 from .include_pial_correction import include_pial_correction
+from .voxelize_surface import voxelize_surface
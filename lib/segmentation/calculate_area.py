@@ -19,7 +19,7 @@ def calculate_area(filename_surf,filename_area = ""):
         
     created by Daniel Haenelt
     Date created: 01-11-2018             
-    Last modified: 17-12-2018
+    Last modified: 18-10-2026
     """
     import numpy as np
     from numpy.linalg import norm
@@ -28,7 +28,6 @@ def calculate_area(filename_surf,filename_area = ""):
     # Read the surface file
     vtx, fac = read_geometry(filename_surf);
     nV = len(vtx)
-    nF = len(fac)
 
     # compute area per face (DPF)
     facvtx = np.concatenate([vtx[fac[:,0]], vtx[fac[:,1]], vtx[fac[:,2]]], axis=1)
@@ -38,14 +37,11 @@ def calculate_area(filename_surf,filename_area = ""):
     print("Total area (facewise): "+str(np.sum(dpf)))
  
     # compute area per vertex (DPV)
-    dpv = np.zeros(nV)
-
     # for speed, divide the dpf by 3
     dpf = dpf / 3
 
-    # redistribute
-    for f in range(nF):
-        dpv[fac[f,:]] = dpv[fac[f,:]] + dpf[f]
+    # redistribute (scatter-add of face areas to corner vertices)
+    dpv = np.bincount(fac.ravel(), weights=np.repeat(dpf, 3), minlength=nV)
         
     print("Total area (vertexwise): "+str(np.sum(dpv)))
 
@@ -19,19 +19,23 @@ def calculate_distortion(file_patch, file_white, path_output, hemi):
     Note that only points within the patch are taken into account which have full faces within the 
     point cloud of the patch corresponding to the original white surface. I.e., a few border points 
     are excluded from the analysis and set to zero in the morphological output file. The number of 
-    excluded points is returned for each metric.   
+    excluded points is returned for each metric.
+    
+    Face and vertex memberships are computed with boolean lookup tables and vertex-wise sums by 
+    scatter-add. Several patches of the same white surface can be processed in one call by passing
+    a list of patch filenames. In this case, lists of parameters are returned.
     Inputs:
-        *file_patch: filename of flattened patch.
+        *file_patch: filename of flattened patch (or list of filenames).
         *file_white: filename of white surface.
         *path_output: path where output is written.
         *hemi: hemisphere.
     Outputs:
         *VAD_params: Descriptive parameters of areal distortion.
-        *VLD_paramd: Descriptive parameters of line distortion.
+        *VLD_params: Descriptive parameters of line distortion.
     
     created by Daniel Haenelt
     Date created: 01-11-2018             
-    Last modified: 15-01-2020
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
@@ -44,96 +48,109 @@ def calculate_distortion(file_patch, file_white, path_output, hemi):
     if not os.path.exists(path_output):
         os.makedirs(path_output)
     
-    # load data
+    # load white surface
     vtx_white, fac_white = read_geometry(file_white)
-    _, _, _, ind_patch = read_patch(file_patch) 
-    vtx_patch = np.zeros((len(ind_patch),3))  
-    vtx_patch[:,0], vtx_patch[:,1], vtx_patch[:,2], _ = read_patch(file_patch)
-
-    # look for faces which exist in the patch
-    fac_patch = []
-    for i in range(len(fac_white)):
-        if np.any(fac_white[i,0]==ind_patch) and np.any(fac_white[i,1]==ind_patch) and np.any(fac_white[i,2]==ind_patch):
-            fac_patch.append(fac_white[i,:])
-    fac_patch = np.array(fac_patch)
-
-    """
-    Areal distortion
-    """
-
-    # calculate face-wise areal distortion (before flattening)
-    facvtx_white = np.concatenate([vtx_white[fac_patch[:,0]], vtx_white[fac_patch[:,1]], vtx_white[fac_patch[:,2]]], axis=1)
-    facvtx0_white = facvtx_white[:,0:6] - np.concatenate([facvtx_white[:,6:9], facvtx_white[:,6:9]], axis=1) # place 3rd vtx at origin
-    cp = np.cross(facvtx0_white[:,0:3],facvtx0_white[:,3:6], axisa=1, axisb=1) # cross product
-    A_white = norm(cp, axis=1) / 2 # half of the norm
+    nV = len(vtx_white)
     
-    # calculate face-wise areal distortion (after flattening)
-    vtx_patch_all = np.zeros_like(vtx_white).astype(float)
-    for i in range(len(ind_patch)):
-        vtx_patch_all[ind_patch[i],:] = vtx_patch[i,:]
+    # face-wise area of white surface
+    A_white_all = norm(np.cross(vtx_white[fac_white[:,0]] - vtx_white[fac_white[:,2]],
+                                vtx_white[fac_white[:,1]] - vtx_white[fac_white[:,2]]), axis=1) / 2
     
-    facvtx_patch = np.concatenate([vtx_patch_all[fac_patch[:,0]], vtx_patch_all[fac_patch[:,1]], vtx_patch_all[fac_patch[:,2]]], axis=1)
-    facvtx0_patch = facvtx_patch[:,0:6] - np.concatenate([facvtx_patch[:,6:9], facvtx_patch[:,6:9]], axis=1) # place 3rd vtx at origin
-    cp = np.cross(facvtx0_patch[:,0:3],facvtx0_patch[:,3:6], axisa=1, axisb=1) # cross product
-    A_patch = norm(cp, axis=1) / 2 # half of the norm
+    if len(np.shape(file_patch)) > 0:
+        file_patch_list = file_patch
+    else:
+        file_patch_list = [file_patch]
     
-    # calculate face-wise distortion
-    A_dist = A_patch/A_white
-
-    # convert to vertex-wise representation
-    VAD = np.zeros(len(vtx_white)).astype(float)
-    VAD_miss = 0 
-    for i in range(len(ind_patch)):
-        temp = np.where(fac_patch==ind_patch[i])
-        if np.any(temp[0]):
-            VAD[ind_patch[i]] = np.sum(A_dist[temp[0]])/len(temp[0])
-        else:
-            VAD_miss+=1
-
-    VAD_params = [np.mean(VAD[ind_patch]),
-                  np.std(VAD[ind_patch]),
-                  sem(VAD[ind_patch]),
-                  np.min(VAD[ind_patch]),
-                  np.max(VAD[ind_patch]),
-                  VAD_miss]
-   
-    # save morphological data
-    write_morph_data(os.path.join(path_output, os.path.basename(file_patch)+".areal_distortion"), VAD)
+    VAD_params_list = []
+    VLD_params_list = []
+    for file_patch_single in file_patch_list:
     
-    """
-    Linear distortion
-    """
-
-    VLD = np.zeros(len(vtx_white)).astype(float)
-    VLD_miss = 0
-    for i in range(len(ind_patch)):
-        node_patch = vtx_patch_all[ind_patch[i]]
-        node_white = vtx_white[ind_patch[i]]
-        
-        ind_temp = fac_patch[np.where(fac_patch==ind_patch[i])[0],:]
-        ind_temp = np.reshape(ind_temp,len(ind_temp)*3)
-        ind_temp = np.unique(ind_temp)
-        ind_temp = np.delete(ind_temp,np.where(ind_temp==ind_patch[i]))
+        # load patch
+        x, y, z, ind_patch = read_patch(file_patch_single)
+        ind_patch = np.asarray(ind_patch).astype(int)
+        
+        # look up table for vertices in the patch
+        in_patch = np.zeros(nV, dtype=bool)
+        in_patch[ind_patch] = True
+        
+        vtx_patch_all = np.zeros_like(vtx_white).astype(float)
+        vtx_patch_all[ind_patch,0] = x
+        vtx_patch_all[ind_patch,1] = y
+        vtx_patch_all[ind_patch,2] = z
+        
+        # look for faces which exist in the patch
+        fac_keep = np.all(in_patch[fac_white], axis=1)
+        fac_patch = fac_white[fac_keep]
+    
+        """
+        Areal distortion
+        """
+        
+        # calculate face-wise areal distortion (before and after flattening)
+        A_white = A_white_all[fac_keep]
+        A_patch = norm(np.cross(vtx_patch_all[fac_patch[:,0]] - vtx_patch_all[fac_patch[:,2]],
+                                vtx_patch_all[fac_patch[:,1]] - vtx_patch_all[fac_patch[:,2]]), 
+                       axis=1) / 2
+        
+        # calculate face-wise distortion
+        A_dist = A_patch/A_white
+        
+        # convert to vertex-wise representation (mean over neighbouring faces)
+        n_face = np.bincount(fac_patch.ravel(), minlength=nV)
+        A_sum = np.bincount(fac_patch.ravel(), weights=np.repeat(A_dist, 3), minlength=nV)
+        
+        VAD = np.zeros(nV).astype(float)
+        VAD[n_face > 0] = A_sum[n_face > 0] / n_face[n_face > 0]
+        VAD_miss = np.sum(n_face[ind_patch] == 0)
+        
+        VAD_params = [np.mean(VAD[ind_patch]),
+                      np.std(VAD[ind_patch]),
+                      sem(VAD[ind_patch]),
+                      np.min(VAD[ind_patch]),
+                      np.max(VAD[ind_patch]),
+                      VAD_miss]
+        
+        # save morphological data
+        write_morph_data(os.path.join(path_output, 
+                                      os.path.basename(file_patch_single)+".areal_distortion"), VAD)
+        
+        """
+        Linear distortion
+        """
+        
+        # edges of faces within the patch
+        edge_patch = np.concatenate((fac_patch[:,[0,1]], fac_patch[:,[1,2]], fac_patch[:,[2,0]]), 
+                                    axis=0)
+        edge_patch = np.unique(np.sort(edge_patch, axis=1), axis=0)
+        
+        # edge lengths before and after flattening
+        L_patch = norm(vtx_patch_all[edge_patch[:,0]] - vtx_patch_all[edge_patch[:,1]], axis=1)
+        L_white = norm(vtx_white[edge_patch[:,0]] - vtx_white[edge_patch[:,1]], axis=1)
+        
+        # sum over all neighbouring nodes
+        n_edge = np.bincount(edge_patch.ravel(), minlength=nV)
+        VLD_patch = np.bincount(edge_patch.ravel(), weights=np.repeat(L_patch, 2), minlength=nV)
+        VLD_white = np.bincount(edge_patch.ravel(), weights=np.repeat(L_white, 2), minlength=nV)
+        
+        VLD = np.zeros(nV).astype(float)
+        VLD[n_edge > 0] = VLD_patch[n_edge > 0] / VLD_white[n_edge > 0]
+        VLD_miss = np.sum(n_edge[ind_patch] == 0)
+        
+        VLD_params = [np.mean(VLD[ind_patch]),
+                      np.std(VLD[ind_patch]),
+                      sem(VLD[ind_patch]),
+                      np.min(VLD[ind_patch]),
+                      np.max(VLD[ind_patch]),
+                      VLD_miss]
+        
+        # save morphological data
+        write_morph_data(os.path.join(path_output, 
+                                      os.path.basename(file_patch_single)+".line_distortion"), VLD)
+        
+        VAD_params_list.append(VAD_params)
+        VLD_params_list.append(VLD_params)
     
-        if np.any(ind_temp):
-            VLD_patch = 0
-            VLD_white = 0
-            for j in range(len(ind_temp)):
-                VLD_patch += norm(node_patch-vtx_patch_all[ind_temp[j]])
-                VLD_white += norm(node_white-vtx_white[ind_temp[j]])
-                
-            VLD[ind_patch[i]] = VLD_patch/VLD_white
-        else:
-            VLD_miss+=1
-
-    VLD_params = [np.mean(VLD[ind_patch]),
-                  np.std(VLD[ind_patch]),
-                  sem(VLD[ind_patch]),
-                  np.min(VLD[ind_patch]),
-                  np.max(VLD[ind_patch]),
-                  VLD_miss]
-
-    # save morphological data
-    write_morph_data(os.path.join(path_output, os.path.basename(file_patch)+".line_distortion"), VLD)
-
-    return VAD_params, VLD_params
\ No newline at end of file
+    if len(np.shape(file_patch)) > 0:
+        return VAD_params_list, VLD_params_list
+    else:
+        return VAD_params_list[0], VLD_params_list[0]
\ No newline at end of file
@@ -1,13 +1,19 @@
-def calculate_equivolumetric_surfaces(file_white, file_pial, n_surfs, factor, niter, hemi, 
-                                      path_output):
+_area_cache = {}
+
+def calculate_equivolumetric_surfaces(file_white, file_pial, n_surfs, factor, niter, hemi,
+                                      path_output, write_output=True, dtype="float32",
+                                      file_stack=None):
     """
-    The script calculates intracortical surfaces based on equi-volumetric layering. It is an 
-    adaption of Konrad Wagstyl's function in surface_tools. Here, the io_mesh is not used anymore 
-    and the call to a freesurfer function is omitted. Instead, vertex-wise area is calculated in a 
-    separate function and we use the nibabel to read the surface geometry. First, vertex-wise area 
-    is calculated from both input geometries. Smoothing to the areas is optional and done if factor 
-    is set to a non-zero value. Then, based on vertex-wise area, equi-volumetric surfaces are 
-    computed.
+    The script calculates intracortical surfaces based on equi-volumetric layering. It is an
+    adaption of Konrad Wagstyl's function in surface_tools. Here, the io_mesh is not used anymore
+    and the call to a freesurfer function is omitted. Instead, vertex-wise area is calculated in a
+    separate function and we use the nibabel to read the surface geometry. First, vertex-wise area
+    is calculated from both input geometries. Smoothing to the areas is optional and done if factor
+    is set to a non-zero value. Smoothed areas are cached per mesh file, i.e. smoothing is only done
+    once per mesh if surfaces with different numbers of layers are computed. Then, based on
+    vertex-wise area, the distance fractions (betas) of all equi-volumetric surfaces are computed at
+    once and all surfaces are returned as one array (optionally as memory-mapped npy file). Layer
+    surfaces are only written if requested.
     Inputs:
         *file_white: input of GM/WM surface.
         *file_pial: input of GM/CSF surface.
@@ -16,57 +22,82 @@ def calculate_equivolumetric_surfaces(file_white, file_pial, n_surfs, factor, ni
         *niter: number of smoothing iterations.
         *hemi: declare hemisphere for output file.
         *path_output: path where output is saved.
-    
+        *write_output: write single layer surfaces.
+        *dtype: data type of vertex array.
+        *file_stack: filename of memory-mapped npy file for vertex array (optional).
+    Outputs:
+        *vtx_layer: vertex coordinates of all surfaces with shape (n_surfs, n_vertices, 3).
+        *betas: distance fractions from pial to white surface with shape (n_surfs, n_vertices).
+
     created by Daniel Haenelt
-    Date created: 01-11-2018             
-    Last modified: 10-06-2020
+    Date created: 01-11-2018
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
-    from nibabel.freesurfer.io import read_geometry, write_geometry 
+    from nibabel.freesurfer.io import read_geometry, write_geometry
     from cortex.polyutils import Surface
     from lib.segmentation.calculate_area import calculate_area
 
     def beta(alpha, aw, ap):
         """Compute euclidean distance fraction, beta, that will yield the desired
-        volume fraction, alpha, given vertex areas in the white matter surface, 
-        aw, and on the pial surface, ap.
-    
-        A surface with `alpha` fraction of the cortical volume below it and 
-        `1 - alpha` fraction above it can then be constructed from pial, px, and 
+        volume fraction, alpha, given vertex areas in the white matter surface,
+        aw, and on the pial surface, ap. Alpha is an array of volume fractions
+        and betas of all volume fractions are returned at once.
+
+        A surface with `alpha` fraction of the cortical volume below it and
+        `1 - alpha` fraction above it can then be constructed from pial, px, and
         white matter, pw, surface coordinates as `beta * px + (1 - beta) * pw`.
         """
-        if alpha == 0:
-            return np.zeros_like(aw)
-        elif alpha == 1:
-            return np.ones_like(aw)
-        else:
-            return 1-(1 / (ap - aw) * (-aw + np.sqrt((1-alpha)*ap**2 + alpha*aw**2)))
+        alpha = alpha[:,np.newaxis]
+        res = 1-(1 / (ap - aw) * (-aw + np.sqrt((1-alpha)*ap**2 + alpha*aw**2)))
+        res[alpha[:,0] == 0] = 0
+        res[alpha[:,0] == 1] = 1
+        return res
+
+    def smoothed_area(file_in, vtx, fac):
+        """Vertex-wise area of a surface mesh which is smoothed once per mesh file
+        and smoothing parameters."""
+        key = (os.path.abspath(file_in), os.path.getmtime(file_in), factor, niter)
+        if key not in _area_cache:
+            area = calculate_area(file_in)
+            if factor != 0:
+                area = Surface(vtx, fac).smooth(area, factor=factor, iterations=niter)
+            if len(_area_cache) > 3:
+                _area_cache.clear()
+            _area_cache[key] = area
+        return _area_cache[key]
 
     # make output folder
-    if not os.path.exists(path_output):
+    if write_output and not os.path.exists(path_output):
         os.makedirs(path_output)
 
     # load geometry and area data
     wm_vtx, wm_fac = read_geometry(file_white)
     pial_vtx, pial_fac = read_geometry(file_pial)
-    wm_vertexareas = calculate_area(file_white)
-    pial_vertexareas = calculate_area(file_pial)
-
-    # smoothing area files (optional)
-    if factor != 0:
-        wm_vertexareas = Surface(wm_vtx,wm_fac).smooth(wm_vertexareas, factor=factor, iterations=niter)
-        pial_vertexareas = Surface(pial_vtx,pial_fac).smooth(pial_vertexareas, factor=factor, iterations=niter)
+    wm_vertexareas = smoothed_area(file_white, wm_vtx, wm_fac)
+    pial_vertexareas = smoothed_area(file_pial, pial_vtx, pial_fac)
 
     # number of equally space intracortical surfaces
     vectors = wm_vtx - pial_vtx
-    tmp_vtx = pial_vtx.copy()
-    tmp_fac = pial_fac.copy()
     mask = vectors.sum(axis=1) != 0 # create mask where vertex coordinates match
-    
+
+    # distance fractions of all surfaces
+    alpha = np.arange(n_surfs) / (n_surfs-1)
+    betas = np.zeros((n_surfs, len(pial_vtx)))
+    betas[:,mask] = np.nan_to_num(beta(alpha, wm_vertexareas[mask], pial_vertexareas[mask]))
+
+    # vertex coordinates of all surfaces
+    if file_stack:
+        vtx_layer = np.lib.format.open_memmap(file_stack, mode="w+", dtype=dtype,
+                                              shape=(n_surfs,) + np.shape(pial_vtx))
+    else:
+        vtx_layer = np.zeros((n_surfs,) + np.shape(pial_vtx), dtype=dtype)
+
     for depth in range(n_surfs):
-        print("creating surface " + str(depth +1))
-        betas = beta(float(depth)/(n_surfs-1), wm_vertexareas[mask], pial_vertexareas[mask])
-        betas = np.nan_to_num(betas)
-        tmp_vtx[mask] = pial_vtx[mask] + vectors[mask]* np.array([betas]).T
-        write_geometry(os.path.join(path_output,hemi+"."+"layer"+str(depth)), tmp_vtx,tmp_fac)
+        vtx_layer[depth] = pial_vtx + vectors * betas[depth,:,np.newaxis]
+        if write_output:
+            write_geometry(os.path.join(path_output,hemi+"."+"layer"+str(depth)),
+                           vtx_layer[depth], pial_fac)
+
+    return vtx_layer, betas
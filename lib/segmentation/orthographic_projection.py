@@ -1,4 +1,5 @@
-def orthographic_projection(file_patch, hemi, img_res, theta, alpha, buffer, path_output):
+def orthographic_projection(file_patch, hemi, img_res, theta, alpha, buffer, path_output,
+                            path_cache=None, plot=True):
     """
     This script computes a regular grid representation of a flattened patch. It is similar to the 
     approach by Kendrick Kay (cvnlookupimages). First, a patch is read and the patch coordinates are 
@@ -7,6 +8,11 @@ def orthographic_projection(file_patch, hemi, img_res, theta, alpha, buffer, pat
     chosen image resolution. The x-axis of the regular grid is flipped to be consistent with the RAS 
     coordinate system. Each vertex index is interpolated onto the regular grid using nearest 
     neighbours interpolation. A concave hull is computed to mask the patch on the regular grid.    
+    All points are rotated at once and one search tree is built per patch for the nearest neighbour
+    interpolation. Optionally, the resulting grid (cmap) and mask are cached on disk. The cache 
+    filename is derived from a hash of the patch file, the image resolution, the rotation angle 
+    and the concave hull parameters. Vertex-wise data can then be sampled onto the grid by 
+    map2grid_stack.
     Inputs:
         *file_patch: filename of flattened patch.
         *hemi: hemisphere.
@@ -15,21 +21,22 @@ def orthographic_projection(file_patch, hemi, img_res, theta, alpha, buffer, pat
         *alpha: alpha shape value for concave hull computation.
         *buffer: smooth out concave hull.
         *path_output: path where output is saved.
+        *path_cache: path where the grid is cached (optional).
+        *plot: save plots of point cloud and concave hull.
     Outputs:
         *n_voxel: number of voxels representing the patch on the regular grid.
         *ind_ratio: ratio of unique indices on the patch.
         
     created by Daniel Haenelt
     Date created: 01-11-2018             
-    Last modified: 17-12-2018
+    Last modified: 18-10-2026
     """
     import os
+    import hashlib
     import numpy as np
     import nibabel as nb
-    import matplotlib.pyplot as plt
     from numpy.linalg import norm
-    from scipy.interpolate import griddata
-    from descartes import PolygonPatch
+    from scipy.spatial import cKDTree
     from shapely.geometry import mapping
     from skimage.draw import polygon
     from lib.io.read_patch import read_patch
@@ -47,7 +54,7 @@ def orthographic_projection(file_patch, hemi, img_res, theta, alpha, buffer, pat
     yc = np.sum(y)/np.size(y)
 
     # new origin of the patch as vertex with minimum distance to the barycentre
-    dist = [norm(np.array((x,y))[:,i] - [xc,yc]) for i in range(len(x))]
+    dist = norm(np.transpose(np.array((x,y))) - [xc,yc], axis=1)
     x = x - x[np.argmin(dist)]
     y = y - y[np.argmin(dist)]
 
@@ -55,8 +62,7 @@ def orthographic_projection(file_patch, hemi, img_res, theta, alpha, buffer, pat
     theta = np.radians(theta)
     c, s = np.cos(theta), np.sin(theta)
     R = np.array(((c,-s), (s, c)))
-    for i in range(len(x)):
-        x[i], y[i] = np.dot(R,[x[i],y[i]])
+    x, y = np.dot(R, np.array((x,y))).astype(x.dtype)
 
     # target grid to interpolate to
     x_min = np.floor(np.min(x))
@@ -71,75 +77,95 @@ def orthographic_projection(file_patch, hemi, img_res, theta, alpha, buffer, pat
     # interpolate index values to grid
     x_plane_reshape = x_plane.reshape(len(xf)*len(yf),)
     y_plane_reshape = y_plane.reshape(len(xf)*len(yf),)
-
-    # grid interpolation of index data
     coord_orig = np.transpose(np.array((x,y)))
     coord_plane = np.transpose(np.array((x_plane_reshape, y_plane_reshape)))
-    method = "nearest" # can also be linear or cubic
-    ind_plane = griddata(coord_orig, ind, coord_plane, method)
-    ind_plane = ind_plane.reshape(len(yf),len(xf))
-
-    # get concave hull (alpha shape)
-    concave_hull, _ = alpha_shape(coord_orig.tolist(), alpha=alpha)
-
-    # get coordinates of the concave hull
-    concave_mapping = mapping(concave_hull.buffer(buffer))
-    coord_hull = np.squeeze(np.asarray(concave_mapping["coordinates"]))
-
-    # plot points (swap axes)
-    fig1 = plt.figure(figsize=(10,10))
-    ax = fig1.add_subplot(111)
-    margin = .3
-    ax.set_xlim([x_max+margin, x_min-margin])
-    ax.set_ylim([y_max+margin, y_min-margin])
-    ax.set_xlabel("x in mm")
-    ax.set_ylabel("y in mm")
-    ax.set_title("Point cloud of flat patch")
-    plt.plot(x,y,"o", 
-             color="#f16824", 
-             markersize=0.5)
-    plt.savefig(os.path.join(path_output,os.path.basename(file_patch)+".points.png"))
+
+    # load cached grid
+    file_cache = None
+    if path_cache:
+        with open(file_patch, "rb") as f:
+            patch_hash = hashlib.sha1(f.read()).hexdigest()
+        file_cache = os.path.join(path_cache, 
+                                  "ortho_"+patch_hash+"_res"+repr(float(img_res))+ \
+                                  "_theta"+repr(float(theta))+"_alpha"+repr(float(alpha))+ \
+                                  "_buffer"+repr(float(buffer))+".npz")
     
-    # plot concave hull (swap axes)
-    fig2 = plt.figure(figsize=(10,10,))
-    ax = fig2.add_subplot(111)
-    margin = .3
-    ax.set_xlim([x_max+margin, x_min-margin])
-    ax.set_ylim([y_max+margin, y_min-margin])
-    ax.set_xlabel("x in mm")
-    ax.set_ylabel("y in mm")
-    ax.set_title("Concave hull of flat patch")
-    polyg = concave_hull.buffer(buffer)
-    patch = PolygonPatch(polyg, 
-                         fc="#999999",
-                         ec="#000000", 
-                         fill=True,
-                         zorder=-1)
-    ax.add_patch(patch)              
-    plt.savefig(os.path.join(path_output,os.path.basename(file_patch)+".concave_hull.png"))
-
-    # get nearest neighbour coordinates of concave hull on regular grid
-    coord_nn = np.zeros_like(coord_hull)
-    for i in range(np.size(coord_hull[:,0])):
-        for j in range(np.size(coord_hull[0,:])):
-            temp = np.mod(coord_hull[i,j],img_res)
-            if temp < img_res/2:
-                coord_nn[i,j] = coord_hull[i,j] - temp
-            else:
-                coord_nn[i,j] = coord_hull[i,j] + img_res - temp
-        
-            if j == 0:
-                coord_nn[i,j] = np.argmin(np.abs(xf-coord_nn[i,j]))
-            else:
-                coord_nn[i,j] = np.argmin(np.abs(yf-coord_nn[i,j]))
-
-    # convert to integer
-    coord_nn = coord_nn.astype(int)
-
-    # mask
-    mask_plane = np.zeros_like(ind_plane)
-    rr, cc = polygon(coord_nn[:,1],coord_nn[:,0])
-    mask_plane[rr, cc] = 1
+    concave_hull = None
+    if file_cache and os.path.exists(file_cache):
+        cache = np.load(file_cache)
+        ind_plane = cache["ind_plane"]
+        mask_plane = cache["mask_plane"]
+    else:
+        # nearest neighbour interpolation of index data (one search tree for all grid points)
+        _, ind_nn = cKDTree(coord_orig).query(coord_plane)
+        ind_plane = ind[ind_nn].astype(np.float64)
+        ind_plane = ind_plane.reshape(len(yf),len(xf))
+
+        # get concave hull (alpha shape)
+        concave_hull, _ = alpha_shape(coord_orig.tolist(), alpha=alpha)
+
+        # get coordinates of the concave hull
+        concave_mapping = mapping(concave_hull.buffer(buffer))
+        coord_hull = np.squeeze(np.asarray(concave_mapping["coordinates"]))
+
+        # get nearest neighbour coordinates of concave hull on regular grid
+        temp = np.mod(coord_hull,img_res)
+        coord_nn = np.where(temp < img_res/2, coord_hull - temp, coord_hull + img_res - temp)
+        coord_nn[:,0] = np.argmin(np.abs(xf[np.newaxis,:]-coord_nn[:,0,np.newaxis]), axis=1)
+        coord_nn[:,1] = np.argmin(np.abs(yf[np.newaxis,:]-coord_nn[:,1,np.newaxis]), axis=1)
+
+        # convert to integer
+        coord_nn = coord_nn.astype(int)
+
+        # mask
+        mask_plane = np.zeros_like(ind_plane)
+        rr, cc = polygon(coord_nn[:,1],coord_nn[:,0])
+        mask_plane[rr, cc] = 1
+
+        # save grid
+        if file_cache:
+            if not os.path.exists(path_cache):
+                os.makedirs(path_cache)
+            np.savez(file_cache, ind_plane=ind_plane, mask_plane=mask_plane)
+
+    if plot:
+        import matplotlib.pyplot as plt
+        from descartes import PolygonPatch
+
+        if concave_hull is None:
+            concave_hull, _ = alpha_shape(coord_orig.tolist(), alpha=alpha)
+
+        # plot points (swap axes)
+        fig1 = plt.figure(figsize=(10,10))
+        ax = fig1.add_subplot(111)
+        margin = .3
+        ax.set_xlim([x_max+margin, x_min-margin])
+        ax.set_ylim([y_max+margin, y_min-margin])
+        ax.set_xlabel("x in mm")
+        ax.set_ylabel("y in mm")
+        ax.set_title("Point cloud of flat patch")
+        plt.plot(x,y,"o", 
+                 color="#f16824", 
+                 markersize=0.5)
+        plt.savefig(os.path.join(path_output,os.path.basename(file_patch)+".points.png"))
+    
+        # plot concave hull (swap axes)
+        fig2 = plt.figure(figsize=(10,10,))
+        ax = fig2.add_subplot(111)
+        margin = .3
+        ax.set_xlim([x_max+margin, x_min-margin])
+        ax.set_ylim([y_max+margin, y_min-margin])
+        ax.set_xlabel("x in mm")
+        ax.set_ylabel("y in mm")
+        ax.set_title("Concave hull of flat patch")
+        polyg = concave_hull.buffer(buffer)
+        patch = PolygonPatch(polyg, 
+                             fc="#999999",
+                             ec="#000000", 
+                             fill=True,
+                             zorder=-1)
+        ax.add_patch(patch)              
+        plt.savefig(os.path.join(path_output,os.path.basename(file_patch)+".concave_hull.png"))
 
     # write niftis
     empty_header = nb.Nifti1Header()
@@ -0,0 +1,93 @@
+def voxelize_surface(vtx, fac, dims, ras2vox=None, fill=False, chunk_size=500000):
+    """
+    This function voxelizes a triangle surface mesh. All voxels which are intersected by a face of
+    the mesh are marked, i.e. the mesh does not have to be upsampled before voxelization. For each
+    face, all voxels within its bounding box are tested for intersection with the triangle by the
+    separating axis theorem (cf. Akenine-Möller 2001). The separating axes (box normals, triangle
+    normal and cross products of box normals and triangle edges) and the vertex projections onto
+    these axes are computed once per face and the test of all candidate voxels is vectorized in
+    chunks of face-voxel pairs. Voxel centers are located at integer voxel coordinates. Optionally,
+    voxels enclosed by the mesh are filled in 3D. Enclosed voxels are all voxels which are not
+    connected (6-connectivity) to the volume border without crossing the mesh. Volume borders along
+    the third axis are treated as closed, i.e. meshes which are cut at the first and last slice of a
+    slab are filled as well.
+    Inputs:
+        *vtx: array of vertex coordinates.
+        *fac: array of faces.
+        *dims: dimensions of the output volume.
+        *ras2vox: transformation from vertex coordinates to voxel space (identity if not set).
+        *fill: fill voxels enclosed by the mesh.
+        *chunk_size: number of face-voxel pairs which are tested at once.
+    Outputs:
+        *vox_array: array with intersected voxels (1) and enclosed voxels (2).
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import numpy as np
+    from nibabel.affines import apply_affine
+    from scipy.ndimage import label
+
+    # vertex coordinates in voxel space
+    dims = tuple(int(d) for d in dims[:3])
+    if ras2vox is not None:
+        vtx = apply_affine(ras2vox, vtx)
+    tri = np.asarray(vtx, dtype=np.float64)[np.asarray(fac)]
+
+    # voxel bounding box of each face
+    vox_min = np.floor(np.min(tri, axis=1) + 0.5).astype(np.int64)
+    vox_max = np.floor(np.max(tri, axis=1) + 0.5).astype(np.int64)
+    vox_min = np.maximum(vox_min, 0)
+    vox_max = np.minimum(vox_max, np.array(dims) - 1)
+    ext = np.maximum(vox_max - vox_min + 1, 0)
+    n_cand = np.prod(ext, axis=1)
+
+    # separating axes of each face
+    edges = np.stack((tri[:,1] - tri[:,0], tri[:,2] - tri[:,1], tri[:,0] - tri[:,2]), axis=1)
+    axes_box = np.broadcast_to(np.eye(3), (len(tri), 3, 3))
+    axes_tri = np.cross(edges[:,0], edges[:,1])[:,np.newaxis]
+    axes_edge = np.cross(np.eye(3)[np.newaxis,:,np.newaxis], edges[:,np.newaxis])
+    axes = np.concatenate((axes_box, axes_tri, np.reshape(axes_edge, (-1, 9, 3))), axis=1)
+
+    # projection interval of each face and projection radius of the voxel onto each axis
+    proj = np.einsum("fak,fvk->fav", axes, tri)
+    proj_min = np.min(proj, axis=2)
+    proj_max = np.max(proj, axis=2)
+    radius = 0.5 * np.sum(np.abs(axes), axis=2)
+
+    # test face-voxel pairs in chunks of faces
+    vox_array = np.zeros(dims, dtype=np.uint8)
+    n_cum = np.cumsum(n_cand)
+    i = 0
+    while i < len(tri):
+        j = max(np.searchsorted(n_cum, n_cum[i] - n_cand[i] + chunk_size, side="right"), i+1)
+        ind_fac = np.repeat(np.arange(i, j), n_cand[i:j])
+        ind_cand = np.arange(len(ind_fac)) - np.repeat(n_cum[i:j] - n_cand[i:j] - \
+                                                       (n_cum[i] - n_cand[i]), n_cand[i:j])
+
+        # voxel indices of candidates
+        ext_cand = ext[ind_fac]
+        vox = np.stack((ind_cand // (ext_cand[:,1] * ext_cand[:,2]),
+                        ind_cand // ext_cand[:,2] % ext_cand[:,1],
+                        ind_cand % ext_cand[:,2]), axis=1) + vox_min[ind_fac]
+
+        # no separating axis exists for intersecting pairs
+        d = np.einsum("pak,pk->pa", axes[ind_fac], vox)
+        r = radius[ind_fac]
+        intersect = np.all((proj_min[ind_fac] - d <= r) & (proj_max[ind_fac] - d >= -r), axis=1)
+        vox = vox[intersect]
+        vox_array[vox[:,0], vox[:,1], vox[:,2]] = 1
+
+        i = j
+
+    # fill enclosed voxels
+    if fill:
+        shell_array = np.pad(vox_array == 1, ((0, 0), (0, 0), (1, 1)), constant_values=True)
+        label_array, _ = label(~shell_array)
+        label_border = np.unique(np.concatenate((label_array[[0,-1],:,:].flatten(),
+                                                 label_array[:,[0,-1],:].flatten())))
+        inside_array = (label_array > 0) & ~np.isin(label_array, label_border)
+        vox_array[inside_array[:,:,1:-1]] = 2
+
+    return vox_array
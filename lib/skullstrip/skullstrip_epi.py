@@ -1,7 +1,10 @@
 def skullstrip_epi(input, pathFSL=None, roi_size=5, scale=0.75, nerode=2, ndilate=1, savemask=False, cleanup=True):
     """
     Skullstrip input volume by defining an intensity threshold from the inner of the brain volume. 
-    From a defined mid-point, a brain mask is grown inside the brain. A binary filling holes 
+    From a defined mid-point, a brain mask is grown inside the brain (computed as connected 
+    component of all voxels above threshold in one labelling step). Unlike the former voxel-wise 
+    growing, the mid-point is always kept in the mask, i.e. also if its only neighbours above 
+    threshold are located at the volume border. A binary filling holes 
     algorithm is applied. To reduce remaining skull within the brain mask, the mask is eroded and 
     dilated several times.    
     Inputs:
@@ -16,12 +19,13 @@ def skullstrip_epi(input, pathFSL=None, roi_size=5, scale=0.75, nerode=2, ndilat
     
     created by Daniel Haenelt
     Date created: 06-11-2018             
-    Last modified: 01-02-2019
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
     import nibabel as nb
     from nipype.interfaces.fsl import ErodeImage, DilateImage
+    from scipy.ndimage import label, binary_dilation
     from scipy.ndimage.morphology import binary_fill_holes
 
     # prepare path and filename
@@ -41,12 +45,6 @@ def skullstrip_epi(input, pathFSL=None, roi_size=5, scale=0.75, nerode=2, ndilat
     y_mean = np.uint8(np.round((np.max(inds[:,1])+np.min(inds[:,1]))/2))
     z_mean = np.uint8(np.round((np.max(inds[:,2])+np.min(inds[:,2]))/2))
     
-    # initialise mask
-    mask_array = np.zeros_like(data_array)
-    mask_temp_array = np.zeros_like(data_array)
-    mask_array[x_mean,y_mean,z_mean] = 1
-    mask_temp_array[x_mean,y_mean,z_mean] = 1
-        
     # compute threshold
     roi = np.zeros((2*roi_size,2*roi_size,2*roi_size), dtype='uint16')
     roi = data_array[np.uint8(np.round(x_mean-roi_size/2)):np.uint8(np.round(x_mean+roi_size-1/2)),
@@ -54,37 +52,19 @@ def skullstrip_epi(input, pathFSL=None, roi_size=5, scale=0.75, nerode=2, ndilat
                      np.uint8(np.round(z_mean-roi_size/2)):np.uint8(np.round(z_mean+roi_size-1/2))]
     roi_mean = roi.mean()
 
-    # grow mask
-    while True:
-            
-        coords = np.transpose(np.nonzero(mask_array > 0))
-    
-        coords = coords[coords[:,0] > 0,:]
-        coords = coords[coords[:,1] > 0,:]
-        coords = coords[coords[:,2] > 0,:]
-        coords = coords[coords[:,0] < np.size(data_array,0)-1]
-        coords = coords[coords[:,1] < np.size(data_array,1)-1]
-        coords = coords[coords[:,2] < np.size(data_array,2)-1]
-   
-        # calculate neighbour coordinate
-        mask_temp_array[coords[:,0]-1,coords[:,1],coords[:,2]] = 1
-        mask_temp_array[coords[:,0],coords[:,1]-1,coords[:,2]] = 1
-        mask_temp_array[coords[:,0],coords[:,1],coords[:,2]-1] = 1
-        mask_temp_array[coords[:,0]+1,coords[:,1],coords[:,2]] = 1
-        mask_temp_array[coords[:,0],coords[:,1]+1,coords[:,2]] = 1
-        mask_temp_array[coords[:,0],coords[:,1],coords[:,2]+1] = 1
-   
-        # delete all old mask elements
-        mask_temp_array = mask_temp_array - mask_array      
-        mask_temp_array[data_array < scale*roi_mean] = 0
+    # grow mask (connected component of voxels above threshold which contains the seed point,
+    # voxels at the volume border are added to the mask but the mask is not grown from them)
+    grow_array = ~(data_array < scale*roi_mean)
+    grow_array[x_mean,y_mean,z_mean] = True
+    border_array = np.ones_like(grow_array)
+    border_array[1:-1,1:-1,1:-1] = False
+    label_array, _ = label(grow_array & ~border_array)
     
-        # reinitialise mask_temp
-        mask_array = mask_array + mask_temp_array
-
-        # check break condition
-        coords = np.transpose(np.nonzero(mask_temp_array == True))
-        if len(coords) == 0:
-            break
+    mask_array = np.zeros_like(grow_array)
+    mask_array[x_mean,y_mean,z_mean] = True
+    if label_array[x_mean,y_mean,z_mean] > 0:
+        mask_array = label_array == label_array[x_mean,y_mean,z_mean]
+        mask_array = mask_array | binary_dilation(mask_array) & grow_array & border_array
 
     # flood filling on brain mask
     mask_array = binary_fill_holes(mask_array, structure=np.ones((2,2,2)))
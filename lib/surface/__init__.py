@@ -14,4 +14,7 @@ from .mesh_sampling import mesh_sampling
 from .mesh_sampling_layer import mesh_sampling_layer
 from .mesh_sampling_layer_other import mesh_sampling_layer_other
 from .heat_kernel_smoothing import heat_kernel_smoothing
-from .make_sphere import make_sphere
\ No newline at end of file
+from .get_heat_kernel import get_heat_kernel
+from .make_sphere import make_sphere
+from .remove_vertices import remove_vertices
+from .sample_laminar_profile import sample_laminar_profile
\ No newline at end of file
@@ -0,0 +1,76 @@
+def get_heat_kernel(vtx, fac, sigma, adjm=None, path_cache=None):
+    """
+    This function computes the heat kernel smoothing operator of a triangle mesh as sparse matrix.
+    Each row contains the normalized heat kernel weights of one vertex and its first order
+    neighbours, i.e. one smoothing iteration of vertex-wise data is a sparse matrix product. The
+    neighbourhood is taken from the edges of the faces if no adjacency matrix is given. Optionally,
+    the operator is cached on disk. The cache filename is derived from a hash of the mesh and the
+    kernel bandwidth.
+    Inputs:
+        *vtx: vertex points of surface mesh.
+        *fac: faces of surface mesh.
+        *sigma: kernel bandwidth.
+        *adjm: adjacency matrix (optional).
+        *path_cache: path where the operator is cached (optional).
+    Outputs:
+        *W: sparse heat kernel smoothing operator (csr matrix).
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import os
+    import hashlib
+    import numpy as np
+    import scipy.sparse as sparse
+
+    vtx = np.asarray(vtx, dtype=np.float64)
+    fac = np.asarray(fac, dtype=np.int64)
+    n_vertex = len(vtx)
+
+    # load cached operator
+    if path_cache:
+        mesh_hash = hashlib.sha1()
+        mesh_hash.update(np.ascontiguousarray(vtx).tobytes())
+        mesh_hash.update(np.ascontiguousarray(fac).tobytes())
+        if adjm is not None:
+            adjm_coo = sparse.coo_matrix(adjm)
+            mesh_hash.update(np.ascontiguousarray(adjm_coo.row).tobytes())
+            mesh_hash.update(np.ascontiguousarray(adjm_coo.col).tobytes())
+        file_cache = os.path.join(path_cache,
+                                  "hk_"+mesh_hash.hexdigest()+"_sigma"+repr(float(sigma))+".npz")
+
+        if os.path.exists(file_cache):
+            return sparse.load_npz(file_cache).tocsr()
+
+    # get unique edges (both directions)
+    if adjm is not None:
+        adjm_coo = sparse.coo_matrix(adjm)
+        row = adjm_coo.row
+        col = adjm_coo.col
+    else:
+        row = np.concatenate((fac[:,0], fac[:,1], fac[:,2], fac[:,1], fac[:,2], fac[:,0]))
+        col = np.concatenate((fac[:,1], fac[:,2], fac[:,0], fac[:,0], fac[:,1], fac[:,2]))
+
+    A = sparse.coo_matrix((np.ones(len(row)), (row, col)), shape=(n_vertex, n_vertex)).tocsr()
+    A.setdiag(0)
+    A.eliminate_zeros()
+    A = A.tocoo()
+
+    # heat kernel of neighbours and current vertex (distance 0)
+    distance = np.sum(( vtx[A.row] - vtx[A.col] ) ** 2, axis=1)
+    row = np.concatenate((np.arange(n_vertex), A.row))
+    col = np.concatenate((np.arange(n_vertex), A.col))
+    weight = np.exp(-np.concatenate((np.zeros(n_vertex), distance))/(4*sigma))
+
+    # normalize weights of each vertex
+    W = sparse.coo_matrix((weight, (row, col)), shape=(n_vertex, n_vertex)).tocsr()
+    W = sparse.diags(1 / np.asarray(W.sum(axis=1)).ravel()).dot(W).tocsr()
+
+    # save operator
+    if path_cache:
+        if not os.path.exists(path_cache):
+            os.makedirs(path_cache)
+        sparse.save_npz(file_cache, W)
+
+    return W
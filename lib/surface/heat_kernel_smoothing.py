@@ -1,4 +1,4 @@
-def heat_kernel_smoothing(vtx, fac, data, adjm, sigma, n_smooth):
+def heat_kernel_smoothing(vtx, fac, data, adjm, sigma, n_smooth, path_cache=None):
     """
     This function performs heat kernel smoothing [1,2,3] on a triangle mesh. The code is mainly 
     adapted from the matlab code by Chung et al. (http://pages.stat.wisc.edu/~mchung/softwares/hk/
@@ -21,72 +21,34 @@ def heat_kernel_smoothing(vtx, fac, data, adjm, sigma, n_smooth):
     spherical harmonics.  Satistica Sinica 18:1269-1291 
     http://www.stat.wisc.edu/%7Emchung/papers/sinica.2008.pdf
     
+    The smoothing operator is a sparse matrix which is built once from the faces of the mesh and
+    optionally cached on disk (see get_heat_kernel). Several maps can be smoothed at once by
+    passing a 2D data array with vertices in the first dimension.
+    
     Inputs:
         *vtx: vertex points of surface mesh.
         *fac: faces of surface mesh.
-        *data: array of vertex-wise sampled data points.
-        *adjm: adjacency matrix.
+        *data: array of vertex-wise sampled data points (n_vertex or n_vertex x n_maps).
+        *adjm: adjacency matrix (optional, otherwise taken from the faces).
         *sigma: kernel bandwidth.
         *n_smooth: number of iterations.
+        *path_cache: path where the smoothing operator is cached (optional).
     Outputs:
         *res: array of vertex-wise smoothed data points.
         
     created by Daniel Haenelt
     Date created: 04-03-2020
-    Last modified: 04-03-2020
+    Last modified: 18-10-2026
     """
     import numpy as np
-    from lib_gbb.neighbor.nn_2d import nn_2d
-
-    # number of vertices
-    n_vertex = len(vtx)
+    from lib.surface.get_heat_kernel import get_heat_kernel
 
-    # heat kernel shape
-    K = lambda x, sigma : np.exp(-x/(4*sigma))/np.sum(np.exp(-x/(4*sigma)))
-    
-    # get max degree (number of first order neighbors)
-    max_degree = 0
-    for i in range(n_vertex):
-        nn = nn_2d(i, adjm, 0)
-        degree = len(nn)
-        if degree > max_degree:
-            max_degree = degree
-    
-    # heat kernel weight computation
-    neighbor = np.zeros((n_vertex, max_degree+1)).astype(int) # including the current vertex
-    weight = np.zeros((n_vertex, max_degree+1)) # including the current vertex
-    for i in range(n_vertex):
-        
-        # get vertex neighbors
-        nn = nn_2d(i, adjm, 0)
-        degree = len(nn)
-
-        # get distance to vertex neighbors
-        distance = 0
-        for j in range(degree):
-            distance = np.append(distance, np.sum(( vtx[nn[j]] - vtx[i,:] ) ** 2))
-            
-        # get heat kernel weighting for each neighbor
-        weight[i,:1+degree] = K(distance, sigma)
-        
-        # get corresponding neighbor (add 1 because of dummy row)
-        neighbor[i,:1+degree] = np.append([i],nn) + 1        
-
-    # add dummy row
-    data = np.append(1, data)
+    # get smoothing operator
+    W = get_heat_kernel(vtx, fac, sigma, adjm, path_cache)
     
     # iterative kernel smoothing
+    res = np.asarray(data, dtype=np.float64)
     for i in range(n_smooth):
+        res = W.dot(res)
     
-        # add weights
-        res = np.zeros_like(data)
-        for j in range(max_degree):
-            res[1:] += data[neighbor[:,j]] * weight[:,j]
-        
-        # initialize new data array
-        data = res.copy()
-    
-    # remove dummy row    
-    res = res[1:]
-    
-    return res
+    return res
\ No newline at end of file
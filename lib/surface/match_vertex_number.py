@@ -13,11 +13,12 @@ def match_vertex_number(input_white_surf, input_pial_surf, input_white_ind, inpu
         
     created by Daniel Haenelt
     Date created: 10-12-2019
-    Last modified: 09-01-2020
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
     from nibabel.freesurfer.io import read_geometry, write_geometry
+    from lib.surface.remove_vertices import remove_vertices
 
     # make output folder
     if not os.path.exists(path_output):
@@ -36,54 +37,12 @@ def match_vertex_number(input_white_surf, input_pial_surf, input_white_ind, inpu
     ind_remove.extend(set(white_ind) - set(pial_ind))
     ind_remove = np.sort(ind_remove) 
 
-    # sort vertices of white surface
-    i = 0
-    c_white = np.zeros_like(white_ind)
-    while i < np.size(white_ind):
-        if np.any(ind_remove == white_ind[i]):
-            c_white[i] = 1
-    
-        i += 1    
-
-    # sort vertices of pial surface
-    i = 0
-    c_pial = np.zeros_like(pial_ind)
-    while i < np.size(pial_ind):
-        if np.any(ind_remove == pial_ind[i]):
-            c_pial[i] = 1
-
-        i += 1  
-
-    # sort faces
-    fac_old = fac_white.copy()
-    fac_new = fac_white.copy()
-    fac_outlier = np.zeros_like(fac_white)
-    c_step = 0
-    n_step = [10,20,30,40,50,60,70,80,90,100]
-    for i in range(len(ind_remove)):
-        check_remove = np.where(ind_remove[i] == white_ind)[0]
-        if len(check_remove):
-            row, col = np.where(fac_old == check_remove)
-            fac_outlier[row,col] = 1 # remember which faces to remove
-            fac_temp = fac_new.copy() # update face numbering
-            fac_temp[fac_old > check_remove] = -1
-            fac_temp[fac_temp != -1] = 0
-            fac_new += fac_temp
-    
-        i += 1
-        
-        # print status
-        counter = np.floor(i / len(ind_remove) * 100).astype(int)
-        if counter == n_step[c_step]:
-            print("sort faces: "+str(counter)+" %")
-            c_step += 1
-
-    # remove outlier faces
-    fac_outlier = np.sum(fac_outlier,1)
-    fac_new = fac_new[fac_outlier == 0]
+    # mark vertices which are removed
+    c_white = np.isin(white_ind, ind_remove)
+    c_pial = np.isin(pial_ind, ind_remove)
 
-    # remove outliers in vertices
-    vtx_white = vtx_white[c_white == 0]
+    # remove outliers in vertices and faces
+    vtx_white, fac_new, _ = remove_vertices(vtx_white, fac_white, np.where(c_white == 0)[0])
     vtx_pial = vtx_pial[c_pial == 0]
 
     # remove outliers in ind
@@ -19,7 +19,7 @@ def mesh_sampling_layer(surf_in, file_in, boundaries_in, path_output, layer, r=[
     
     created by Daniel Haenelt
     Date created: 18-12-2019
-    Last modified: 24-07-2020
+    Last modified: 18-10-2026
     """
     import os
     import sys
@@ -82,23 +82,25 @@ def mesh_sampling_layer(surf_in, file_in, boundaries_in, path_output, layer, r=[
     tmp2_string = ''.join(str(i) for i in tmp2)
     if not average_layer:
         
-        for i in range(len(layer)):
-            data_array = data.get_fdata()[:,:,:,layer[i]]
-            out = nb.Nifti1Image(data_array, data.affine, data.header)
-            nb.save(out, join(path_output,"temp_"+tmp2_string+".nii"))
-            
-            # do the mapping
-            map2surface(surf_in, 
-                        join(path_output,"temp_"+tmp2_string+".nii"),
-                        hemi, 
-                        path_output,
-                        input_white=None, 
-                        input_ind=None, 
-                        cleanup=True)
+        data_array = data.get_fdata()[:,:,:,layer]
+        out = nb.Nifti1Image(data_array, data.affine, data.header)
+        nb.save(out, join(path_output,"temp_"+tmp2_string+".nii"))
+        
+        # do the mapping of all layers at once
+        vals = map2surface(surf_in, 
+                           join(path_output,"temp_"+tmp2_string+".nii"),
+                           hemi, 
+                           path_output,
+                           input_white=None, 
+                           input_ind=None, 
+                           cleanup=True,
+                           write_output=False)
 
-            # rename mapping file
-            os.rename(join(path_output,hemi+".temp_"+tmp2_string+"_"+name_surf+"_def.mgh"),
-                      join(path_output,hemi+"."+name_file+"_layer"+str(layer[i])+".mgh"))
+        # write mapping file of single layers
+        for i in range(len(layer)):
+            vals_layer = np.reshape(vals[:,i], (len(vals),1,1)).astype(np.float32)
+            out = nb.MGHImage(vals_layer, np.eye(4))
+            nb.save(out, join(path_output,hemi+"."+name_file+"_layer"+str(layer[i])+".mgh"))
 
     else:
 
@@ -15,11 +15,12 @@ def remove_vertex_outliers(input_surf, input_ind, n=5, overwrite=True):
         
     created by Daniel Haenelt
     Date created: 08-12-2019 
-    Last modified: 09-12-2019
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
     from nibabel.freesurfer.io import read_geometry, write_geometry
+    from lib.surface.remove_vertices import remove_vertices
 
     # load geometry
     vtx, fac = read_geometry(input_surf)
@@ -46,35 +47,10 @@ def remove_vertex_outliers(input_surf, input_ind, n=5, overwrite=True):
     # distance threshold
     vtx_dist_threshold = vtx_dist_mean + n * vtx_dist_std
 
-    # sort faces
-    fac_old = fac.copy()
-    fac_outlier = np.zeros_like(fac)
-    n_outlier = np.zeros(len(vtx))
-    c_step = 0
-    n_step = [10,20,30,40,50,60,70,80,90,100]
-    for i in range(len(vtx)):    
-        if vtx_dist[i] > vtx_dist_threshold:
-            row, col = np.where(fac_old == i)
-            fac_outlier[row, col] = 1 # remember which faces to remove
-            n_outlier[i] = 1 # remember which vertices to remove
-            fac_temp = fac.copy() # update face numbering
-            fac_temp[fac_old >= i] = -1
-            fac_temp[fac_temp != -1] = 0
-            fac += fac_temp
-
-        # print status
-        counter = np.floor(i / len(vtx) * 100).astype(int)
-        if counter == n_step[c_step]:
-            print("remove outliers: "+str(counter)+" %")
-            c_step += 1
-
-    # remove outlier faces
-    fac_outlier = np.sum(fac_outlier,1)
-    fac = fac[fac_outlier == 0]
-
-    # remove outliers in vertex and ind
-    vtx = vtx[n_outlier == 0]
-    ind = ind[n_outlier == 0]
+    # remove outliers in vertices, faces and ind
+    ind_keep = np.where(vtx_dist <= vtx_dist_threshold)[0]
+    vtx, fac, _ = remove_vertices(vtx, fac, ind_keep)
+    ind = ind[ind_keep]
 
     # write output
     if overwrite:
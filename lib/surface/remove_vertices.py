@@ -0,0 +1,42 @@
+def remove_vertices(vtx, fac, ind_keep, remove_singularities=False):
+    """
+    This function removes vertices from a surface mesh and updates the faces accordingly. Faces are
+    only kept if all of their vertices are kept. Face indices are remapped by a lookup table which
+    assigns each old vertex index its new index (or -1 for removed vertices). Optionally,
+    singularities, i.e. vertices which are not part of any remaining face, are removed as well.
+    Inputs:
+        *vtx: array of vertex coordinates.
+        *fac: array of corresponding faces.
+        *ind_keep: indices of vertices to keep (in increasing order).
+        *remove_singularities: remove vertices without faces.
+    Outputs:
+        *vtx_new: remaining vertices.
+        *fac_new: remaining faces with new indices.
+        *ind_keep: indices of remaining vertices in the input mesh.
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import numpy as np
+
+    ind_keep = np.asarray(ind_keep, dtype=int)
+
+    # lookup table from old to new vertex indices
+    lut = np.full(len(vtx), -1, dtype=int)
+    lut[ind_keep] = np.arange(len(ind_keep))
+
+    # keep only faces whose vertices are all kept and remap indices
+    fac_new = lut[fac]
+    fac_new = fac_new[np.all(fac_new != -1, axis=1)]
+    vtx_new = vtx[ind_keep]
+
+    # remove singularities (vertices without faces)
+    if remove_singularities:
+        n_face = np.bincount(fac_new.ravel(), minlength=len(vtx_new))
+        lut = np.cumsum(n_face != 0) - 1
+        fac_new = lut[fac_new]
+        vtx_new = vtx_new[n_face != 0]
+        ind_keep = ind_keep[n_face != 0]
+
+    return vtx_new, fac_new.astype(fac.dtype), ind_keep
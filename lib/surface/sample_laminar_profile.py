@@ -0,0 +1,83 @@
+def sample_laminar_profile(surf_white, surf_pial, input_vol, depths=11, betas=None,
+                           interpolation="trilinear", chunk_size=10000):
+    """
+    This function samples volume data at several cortical depths between corresponding vertices of
+    white and pial surface meshes. Sampling points are linear combinations of pial and white vertex
+    coordinates, i.e. no intermediate surfaces have to be written and no external sampling
+    process is started. Depths are given as distance fractions from the pial (0) to the white
+    surface (1) which is the same convention as the layer numbering of equivolumetric surfaces
+    (layer0 = pial). Instead of equidistant depths, a vertex-wise distance fraction field (e.g. the
+    betas of equivolumetric layering) can be given. Vertex coordinates are transformed to voxel
+    space by the ras2vox-tkr transformation of the volume which is computed from the header by
+    vox2ras (same as in map2surface) and all depths and volumes of a 4D time series are sampled at
+    once. Vertices are processed in chunks to bound memory usage.
+    Inputs:
+        *surf_white: filename of white surface or array of vertex coordinates.
+        *surf_pial: filename of pial surface or array of vertex coordinates.
+        *input_vol: filename or nibabel image of 3D or 4D volume.
+        *depths: number of equidistant depths or array of distance fractions.
+        *betas: distance fractions with shape (n_depths, n_vertices) (supersedes depths).
+        *interpolation: interpolation method (nearest, trilinear).
+        *chunk_size: number of vertices which are sampled at once.
+    Outputs:
+        *vals: sampled data with shape (n_vertices, n_depths) or (n_vertices, n_depths, nt).
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import sys
+    import numpy as np
+    from nibabel.freesurfer.io import read_geometry
+    from lib.io.load_volume import load_volume
+    from lib.surface.vox2ras import vox2ras
+    from lib.utils.sample_volume import sample_volume
+
+    # load vertices
+    if isinstance(surf_white, str):
+        surf_white, _ = read_geometry(surf_white)
+    if isinstance(surf_pial, str):
+        surf_pial, _ = read_geometry(surf_pial)
+
+    if np.shape(surf_white) != np.shape(surf_pial):
+        sys.exit("White and pial surface must have the same number of vertices!")
+
+    n_vertex = len(surf_white)
+
+    # distance fractions
+    if betas is None:
+        if np.ndim(depths) == 0:
+            depths = np.linspace(0, 1, int(depths))
+        betas = np.repeat(np.asarray(depths, dtype=np.float64)[:,np.newaxis], n_vertex, axis=1)
+    else:
+        betas = np.asarray(betas)
+        if np.shape(betas)[1] != n_vertex:
+            sys.exit("Distance fractions do not match the number of vertices!")
+    n_depth = len(betas)
+
+    # load volume
+    data_img = load_volume(input_vol, mode="image")
+    data_array = load_volume(data_img, dtype="float32")
+    if np.ndim(data_array) > 4:
+        data_array = np.reshape(data_array, np.shape(data_array)[:4])
+
+    # ras2vox-tkr transformation from header
+    _, ras2vox_tkr = vox2ras(data_img)
+
+    # vertex coordinates in voxel space
+    vox_white = np.dot(surf_white, ras2vox_tkr[:3,:3].T) + ras2vox_tkr[:3,3]
+    vox_pial = np.dot(surf_pial, ras2vox_tkr[:3,:3].T) + ras2vox_tkr[:3,3]
+
+    # sample data in chunks of vertices
+    vals = np.zeros((n_vertex, n_depth) + np.shape(data_array)[3:], dtype=np.float32)
+    for i in range(0, n_vertex, chunk_size):
+        b = betas[:,i:i+chunk_size,np.newaxis]
+        vox = vox_pial[np.newaxis,i:i+chunk_size] + \
+            b * (vox_white[np.newaxis,i:i+chunk_size] - vox_pial[np.newaxis,i:i+chunk_size])
+        n_chunk = np.shape(vox)[1]
+
+        res = sample_volume(data_array, np.reshape(vox, (-1, 3)), interpolation)
+        res = np.reshape(res, (n_depth, n_chunk) + np.shape(data_array)[3:])
+        vals[i:i+n_chunk] = np.swapaxes(res, 0, 1)
+
+    return vals
@@ -1,22 +1,38 @@
-def vox2ras(file_in):
+def vox2ras(file_in, use_header=False):
     """
     This function reads an input volume and computes the transformation between voxel space and
     freesurfer vertex RAS (right-anterior-superior) coordinate system from the header information.
-    Transformation for both directions are returned.
+    Transformation for both directions are returned. The transformation is read with mri_info or,
+    if use_header is set or a nibabel image is given, computed from the image header (voxel axes
+    scaled by voxel size and centre of the voxel grid at the origin, same as mri_info 
+    --vox2ras-tkr).
     Inputs:
-        *file_in: filename of reference volume.
+        *file_in: filename of reference volume or nibabel image.
+        *use_header: compute transformation from the header instead of calling mri_info.
     Outputs:
         *vox2ras_tkr: vox2ras transformation matrix.
         *ras2voxs_tkr: ras2vox transformation matrix.
     
     created by Daniel Haenelt
     Date created: 18-12-2019
-    Last modified: 29-05-2020
+    Last modified: 18-10-2026
     """
     import subprocess
     import numpy as np
+    import nibabel as nb
     from numpy.linalg import inv
 
+    # get affine vox2ras-tkr and ras2vox-tkr transformation from header
+    if use_header or not isinstance(file_in, str):
+        if isinstance(file_in, str):
+            file_in = nb.load(file_in)
+        
+        vox2ras_tkr = file_in.affine.copy()
+        vox2ras_tkr[:3,3] = -np.dot(file_in.affine[:3,:3], np.array(file_in.shape[:3]) / 2)
+        ras2vox_tkr = inv(vox2ras_tkr)
+        
+        return vox2ras_tkr, ras2vox_tkr
+
     # get affine vox2ras-tkr and ras2vox-tkr transformation to reference volume
     transformation = subprocess.check_output(['mri_info', file_in, '--{}'.format("ras2vox-tkr")]).decode()
     
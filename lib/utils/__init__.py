@@ -19,3 +19,9 @@ from .upsample_volume import upsample_volume
 from .regrid_time_series import regrid_time_series
 from .regrid_time_series import regrid_time_series_afni
 from .remove_nans import remove_nans
+from .get_spline_matrix import get_spline_matrix
+from .temporal_resampler import TemporalResampler
+from .sample_volume import sample_volume
+from .gaussian_filter_edge import gaussian_filter_edge
+from .get_interpolation_matrix import get_interpolation_matrix
+from .get_interpolation_weights import get_interpolation_weights
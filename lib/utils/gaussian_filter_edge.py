@@ -0,0 +1,30 @@
+def gaussian_filter_edge(U, sigma):
+    """
+    This function calculates a Gaussian filter considering the voxels set to NaN ouside the grid.
+    The filtered image is normalized by the filtered mask of valid voxels, i.e. voxels close to the
+    edge of the grid are not biased by the background.
+    Inputs:
+        *U: input array with NaN outside of the grid.
+        *sigma: standard deviation of Gaussian kernel.
+    Outputs:
+        *res: filtered array.
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import numpy as np
+    from scipy.ndimage import gaussian_filter
+    
+    V = U.copy()
+    V[U!=U] = 0
+    VV = gaussian_filter(V,sigma)
+
+    W = 0*U.copy()+1
+    W[U!=U] = 0
+    WW = gaussian_filter(W,sigma)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        res = VV/WW
+
+    return res
@@ -0,0 +1,46 @@
+def get_interpolation_matrix(vox, dim, interpolation="linear", padding="zero"):
+    """
+    This function computes a sparse matrix which samples a volume at arbitrary voxel coordinates.
+    Each row contains the interpolation weights of one sample point with respect to the flattened
+    source volume (C order). Once computed, the matrix can be applied to all volumes of a time
+    series by a sparse matrix product, i.e. interpolation indices and weights are only computed
+    once. Nearest neighbour interpolation rounds half-way coordinates up. With zero padding, points
+    outside of the source volume are set to zero. With closest padding, coordinates are clamped to
+    the volume borders (similar to apply_coordinate_mappings in nighres). Interpolation indices and
+    weights are taken from get_interpolation_weights (same as in sample_volume).
+    Inputs:
+        *vox: array of voxel coordinates with shape (n_points, 3).
+        *dim: dimensions of source volume.
+        *interpolation: interpolation method (nearest, linear).
+        *padding: padding method (zero, closest).
+    Outputs:
+        *M: sparse interpolation matrix of shape (n_points, n_voxels).
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import sys
+    import numpy as np
+    import scipy.sparse as sparse
+    from lib.utils.get_interpolation_weights import get_interpolation_weights
+
+    vox = np.asarray(vox, dtype=np.float64)
+    dim = np.asarray(dim[:3]).astype(int)
+    n_points = len(vox)
+
+    # clamp coordinates to volume
+    if padding == "closest":
+        vox = np.clip(vox, 0, dim - 1)
+    elif padding != "zero":
+        sys.exit("Choose a valid padding method!")
+
+    # interpolation indices and weights of points inside the volume
+    ind_inside, ijk, weight = get_interpolation_weights(vox, dim, interpolation)
+    row = np.tile(ind_inside, len(weight))
+    col = np.ravel_multi_index(np.reshape(ijk, (-1, 3)).T, dim)
+    weight = np.ravel(weight)
+
+    M = sparse.csr_matrix((weight, (row, col)), shape=(n_points, np.prod(dim)))
+
+    return M
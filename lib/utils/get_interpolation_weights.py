@@ -0,0 +1,61 @@
+def get_interpolation_weights(vox, dim, interpolation="linear"):
+    """
+    This function computes the voxel indices and weights which are needed to interpolate a volume
+    at arbitrary voxel coordinates. Nearest neighbour interpolation takes the closest voxel centre
+    (half-way coordinates are rounded up). Linear interpolation takes the eight neighbouring voxels
+    with trilinear weights (same as scipy.ndimage.map_coordinates with order=1). Only points within
+    the volume are considered. The function is shared by sample_volume and
+    get_interpolation_matrix to keep both consistent.
+    Inputs:
+        *vox: array of voxel coordinates with shape (n_points, 3).
+        *dim: dimensions of source volume.
+        *interpolation: interpolation method (nearest, linear).
+    Outputs:
+        *ind_inside: indices of points within the volume.
+        *ijk: voxel indices with shape (n_corners, n_inside, 3).
+        *weight: interpolation weights with shape (n_corners, n_inside).
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import sys
+    import numpy as np
+
+    vox = np.asarray(vox, dtype=np.float64)
+    dim = np.asarray(dim[:3]).astype(int)
+
+    if interpolation == "nearest":
+        ijk = np.floor(vox + 0.5).astype(int)
+        ind_inside = np.where(np.all((ijk >= 0) & (ijk < dim), axis=1))[0]
+        ijk = ijk[np.newaxis,ind_inside]
+        weight = np.ones((1, len(ind_inside)))
+    elif interpolation == "linear":
+        ind_inside = np.where(np.all((vox >= 0) & (vox <= dim - 1), axis=1))[0]
+        vox = vox[ind_inside]
+
+        # lower and upper corner and fractional distance
+        ijk0 = np.clip(np.floor(vox).astype(int), 0, dim - 1)
+        ijk1 = np.clip(ijk0 + 1, 0, dim - 1)
+        w1 = vox - ijk0
+        w0 = 1 - w1
+
+        # eight neighbouring voxels
+        ijk = []
+        weight = []
+        for cx in range(2):
+            for cy in range(2):
+                for cz in range(2):
+                    ijk.append(np.stack((ijk1[:,0] if cx else ijk0[:,0],
+                                         ijk1[:,1] if cy else ijk0[:,1],
+                                         ijk1[:,2] if cz else ijk0[:,2]), axis=1))
+                    weight.append(( w1[:,0] if cx else w0[:,0] ) * \
+                                  ( w1[:,1] if cy else w0[:,1] ) * \
+                                  ( w1[:,2] if cz else w0[:,2] ))
+
+        ijk = np.stack(ijk)
+        weight = np.stack(weight)
+    else:
+        sys.exit("Choose a valid interpolation method!")
+
+    return ind_inside, ijk, weight
@@ -1,70 +1,58 @@
-def get_mean(input, path_output, name_output, type="mean"):
+def get_mean(input, path_output, name_output, type="mean", chunk_size=10):
     """
-    This function computes the mean image of one or more time series.
+    This function computes the mean image of one or more time series. For the mean, volumes are read
+    in chunks and summed up, i.e. the time series are never completely loaded into memory. For the 
+    median, all time series are loaded as float32 arrays.
     Inputs:
         *input: single file or list of files.
         *path_output: path where to save mean image
         *name_output: output file name without file extension.
         *type: can be either mean or median.
+        *chunk_size: number of volumes which are read at once.
         
     created by Daniel Haenelt
     Date created: 04-02-2019         
-    Last modified: 24-10-2019
+    Last modified: 18-10-2026
     """
     import os
-    import copy
     import numpy as np
     import nibabel as nb
+    from lib.io.load_volume import load_volume
     
     # make subfolders
     if not os.path.exists(path_output):
         os.makedirs(path_output)
     
-    if len(np.shape(input)) > 0:
-        
-        # get dimensions
-        data_img = nb.load(input[0])
-        
-        x_size = data_img.header["dim"][1]
-        y_size = data_img.header["dim"][2]
-        z_size = data_img.header["dim"][3]
-        
-        t_size = 0
-        for i in range(len(input)):
-            data_img = nb.load(input[i])
-            t_size += data_img.header["dim"][4]
-        
-        data_all_array = np.zeros([x_size, y_size, z_size, t_size])
-        t_start = 0
-        for i in range(len(input)):
-            data_img = nb.load(input[i])
-            data_array = data_img.get_fdata()
-            t_end = data_img.header["dim"][4] + t_start     
-            data_all_array[:,:,:,t_start:t_end] = data_array
-            t_start = copy.deepcopy(t_end)
-                
-    else:
-               
-        # load data
-        data_img = nb.load(input)
-        data_all_array = data_img.get_fdata()
+    if len(np.shape(input)) == 0:
+        input = [input]
+    
+    # get dimensions
+    data_img = load_volume(input[0], mode="image")
+    dim = data_img.shape[:3]
     
     # calculate mean
-    if type is "mean":
-        data_mean_array = np.mean(data_all_array,axis=3)
-    elif type is "median":
-        data_mean_array = np.median(data_all_array,axis=3)
+    if type == "mean":
+        t_size = 0
+        data_mean_array = np.zeros(dim)
+        for i in range(len(input)):
+            nt = np.prod(load_volume(input[i], mode="image").shape[3:], dtype=int)
+            for t in range(0, nt, chunk_size):
+                data_array = load_volume(input[i], vol=slice(t, t+chunk_size), dtype="float64")
+                data_mean_array += np.sum(np.reshape(data_array, dim + (-1,)), axis=3)
+            t_size += nt
+        data_mean_array /= t_size
+    elif type == "median":
+        data_all_array = np.concatenate([np.reshape(load_volume(input[i]), dim + (-1,)) 
+                                         for i in range(len(input))], axis=3)
+        data_mean_array = np.median(data_all_array, axis=3)
     else:
         print("Choose a valid mean type!")
     
     # write output
-    if len(np.shape(input)) > 0:
-        data_img = nb.load(input[0])
-    else:
-        data_img = nb.load(input)
-    data_img.header["dim"][0] = 3
-    data_img.header["dim"][4] = 1
+    header = data_img.header.copy()
+    header["dim"][0] = 3
+    header["dim"][4] = 1
     
     # write mean image
-    mean_img = nb.Nifti1Image(data_mean_array, data_img.affine, data_img.header)
+    mean_img = nb.Nifti1Image(data_mean_array, data_img.affine, header)
     nb.save(mean_img,os.path.join(path_output,"mean_"+name_output+".nii"))
\ No newline at end of file
@@ -1,21 +1,24 @@
-def get_mean4d(input, path_output="", name_output="", write_output=False):
+def get_mean4d(input, path_output="", name_output="", write_output=False, chunk_size=10):
     """
-    This function computes the mean time series of one or more time series.
+    This function computes the mean time series of one or more time series. Time series are read
+    in chunks of volumes, i.e. only the output time series is completely held in memory.
     Inputs:
         *input: list of 4d nifti files.
         *path_output: path where to save mean image
         *name_output: output file name without file extension.
         *write_output: write nifti volume.
+        *chunk_size: number of volumes which are read at once.
     Outputs:
         *output: mean time series.
         
     created by Daniel Haenelt
     Date created: 31-10-2019         
-    Last modified: 11-11-2019
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
     import nibabel as nb
+    from lib.io.load_volume import load_volume
     
     # make subfolders
     if len(path_output) > 0:
@@ -23,11 +26,16 @@ def get_mean4d(input, path_output="", name_output="", write_output=False):
             os.makedirs(path_output)
         
     # get dimensions
-    data_img = nb.load(input[0])
+    data_img = load_volume(input[0], mode="image")
+    nt = data_img.shape[3]
     
-    res_array = np.zeros_like(data_img.get_fdata())
+    # sum time series in chunks of volumes
+    res_array = np.zeros(data_img.shape)
     for i in range(len(input)):
-        res_array += nb.load(input[i]).get_fdata()
+        for t in range(0, nt, chunk_size):
+            res_array[:,:,:,t:t+chunk_size] += load_volume(input[i], 
+                                                           vol=slice(t, t+chunk_size), 
+                                                           dtype="float64")
 
     res_array = res_array / len(input)
     
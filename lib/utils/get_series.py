@@ -1,6 +1,7 @@
 def get_series(input, path_out, name_output):
     """
-    This function creates a 4D nifti time series from a set of 3D nifti files.
+    This function creates a 4D nifti time series from a set of 3D nifti files. The time series is
+    held in memory as float32 array (float64 for float64 input).
     Inputs:
         *input: array of filenames containing single 3D nifti volumes.
         *path_output: path where output is saved.
@@ -8,22 +9,25 @@ def get_series(input, path_out, name_output):
         
     created by Daniel Haenelt
     Date created: 28.06.2019       
-    Last modified: 28.06.2019
+    Last modified: 18.10.2026
     """
     import os
     import numpy as np
     import nibabel as nb
+    from lib.io.load_volume import load_volume
 
     # load 3D nifti to get array size
-    data = nb.load(os.path.join(input[0]))
-    data.header["dim"][0] = 4
-    data.header["dim"][4] = len(input)
+    data = load_volume(os.path.join(input[0]), mode="image")
+    header = data.header.copy()
+    header["dim"][0] = 4
+    header["dim"][4] = len(input)
 
-    res = np.zeros(data.header["dim"][1:5])
+    dtype = np.result_type(np.float32, header.get_data_dtype())
+    res = np.zeros(header["dim"][1:5], dtype=dtype)
     for i in range(len(input)):
 
-        img = nb.load(os.path.join(input[i])).get_fdata() 
+        img = load_volume(os.path.join(input[i]), dtype="native", use_cache=False)
         res[:,:,:,i] = img
     
-    output = nb.Nifti1Image(res, data.affine, data.header)
+    output = nb.Nifti1Image(res, data.affine, header)
     nb.save(output,os.path.join(path_out,name_output+".nii"))
\ No newline at end of file
@@ -0,0 +1,30 @@
+def get_spline_matrix(t_old, t_new):
+    """
+    This function computes the matrix which maps samples on the time grid t_old onto the time grid
+    t_new by cubic spline interpolation. Since spline interpolation is linear in the data, the
+    matrix is obtained by interpolating the columns of the identity matrix once. The spline uses
+    not-a-knot end conditions and is therefore identical to the interpolation performed by
+    InterpolatedUnivariateSpline with k=3. A time series array with time in the last dimension is
+    then interpolated by the matrix product data @ M.T.
+    Inputs:
+        *t_old: time points of input grid (strictly increasing).
+        *t_new: time points of output grid.
+    Outputs:
+        *M: interpolation matrix of shape (len(t_new), len(t_old)).
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import numpy as np
+    from scipy.interpolate import CubicSpline
+
+    t_old = np.asarray(t_old, dtype=np.float64)
+    t_new = np.asarray(t_new, dtype=np.float64)
+
+    # interpolate identity matrix (extrapolation outside of t_old as in InterpolatedUnivariateSpline)
+    cubic_interper = CubicSpline(t_old, np.eye(len(t_old)), axis=0, bc_type="not-a-knot",
+                                 extrapolate=True)
+    M = cubic_interper(t_new)
+
+    return M
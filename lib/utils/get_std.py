@@ -1,70 +1,63 @@
-def get_std(input, path_output, name_output, set_outlier=None):
+def get_std(input, path_output, name_output, set_outlier=None, chunk_size=10):
     """
-    This function computes the standard deviation of one or more time series.
+    This function computes the standard deviation of one or more time series. Volumes are read in
+    chunks and first and second moments are accumulated relative to the first volume, i.e. the
+    time series are never completely loaded into memory.
     Inputs:
         *input: single file or list of files.
         *path_output: path where to save mean image
         *name_output: output file name without file extension.
         *set_outlier: can be nan, zero or None.
+        *chunk_size: number of volumes which are read at once.
         
     created by Daniel Haenelt
     Date created: 04-02-2019         
-    Last modified: 10-01-2020
+    Last modified: 18-10-2026
     """
     import os
-    import copy
     import numpy as np
     import nibabel as nb
+    from lib.io.load_volume import load_volume
     
     # make subfolders
     if not os.path.exists(path_output):
         os.makedirs(path_output)
     
-    if len(np.shape(input)) > 0:
-        
-        # get dimensions
-        data_img = nb.load(input[0])
-        
-        x_size = data_img.header["dim"][1]
-        y_size = data_img.header["dim"][2]
-        z_size = data_img.header["dim"][3]
-        
-        t_size = 0
-        for i in range(len(input)):
-            data_img = nb.load(input[i])
-            t_size += data_img.header["dim"][4]
-        
-        data_all_array = np.zeros([x_size, y_size, z_size, t_size])
-        t_start = 0
-        for i in range(len(input)):
-            data_img = nb.load(input[i])
-            data_array = data_img.get_fdata()
-            t_end = data_img.header["dim"][4] + t_start                  
-            data_all_array[:,:,:,t_start:t_end] = data_array
-            t_start = copy.deepcopy(t_end)            
-                
-    else:
-               
-        # load data
-        data_img = nb.load(input)
-        data_all_array = data_img.get_fdata()
+    if len(np.shape(input)) == 0:
+        input = [input]
+    
+    # get dimensions
+    data_img = load_volume(input[0], mode="image")
+    dim = data_img.shape[:3]
+    
+    # accumulate moments relative to first volume
+    ref_array = np.reshape(load_volume(input[0], vol=0, dtype="float64"), dim + (1,))
+    sum_array = np.zeros(dim)
+    sum2_array = np.zeros(dim)
+    t_size = 0
+    for i in range(len(input)):
+        nt = np.prod(load_volume(input[i], mode="image").shape[3:], dtype=int)
+        for t in range(0, nt, chunk_size):
+            data_array = load_volume(input[i], vol=slice(t, t+chunk_size), dtype="float64")
+            data_array = np.reshape(data_array, dim + (-1,)) - ref_array
+            sum_array += np.sum(data_array, axis=3)
+            sum2_array += np.sum(data_array**2, axis=3)
+        t_size += nt
     
     # calculate std
-    data_std_array = np.std(data_all_array,axis=3)
+    data_std_array = sum2_array / t_size - (sum_array / t_size)**2
+    data_std_array = np.sqrt(np.maximum(data_std_array, 0))
     
-    if set_outlier is "nan":
+    if set_outlier == "nan":
         data_std_array[data_std_array == 0] = np.nan # set zeroes to nan
-    elif set_outlier is "zero":
+    elif set_outlier == "zero":
         data_std_array[data_std_array == 0] = 0
        
     # write output
-    if len(np.shape(input)) > 0:
-        data_img = nb.load(input[0])
-    else:
-        data_img = nb.load(input)
-    data_img.header["dim"][0] = 3
-    data_img.header["dim"][4] = 1
+    header = data_img.header.copy()
+    header["dim"][0] = 3
+    header["dim"][4] = 1
     
     # write mean image
-    mean_img = nb.Nifti1Image(data_std_array, data_img.affine, data_img.header)
+    mean_img = nb.Nifti1Image(data_std_array, data_img.affine, header)
     nb.save(mean_img, os.path.join(path_output,"std_"+name_output+".nii"))
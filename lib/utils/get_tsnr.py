@@ -1,38 +1,54 @@
-def get_tsnr(input, tsnr_max=200, write_output=False, path_output="", name_output=""):
+def get_tsnr(input, tsnr_max=200, write_output=False, path_output="", name_output="",
+             chunk_size=10):
     """
-    This function computes the tsnr of one time series.
+    This function computes the tsnr of one time series. Volumes are read in chunks and mean and
+    standard deviation are accumulated, i.e. the time series is never completely loaded into memory.
     Inputs:
-        *input: input time series.
+        *input: 4d nifti volume or string to filename of input time series.
         *tsnr_max: threshold unrealistic high tsnr values (applied if set > 0).
         *write output: write output nifti file.
         *path_output: path where to save mean image
-        *name_output: basename of output file.
+        *name_output: basename of output file (only used for nifti volume input).
+        *chunk_size: number of volumes which are read at once.
     Outputs:
         *data_tsnr_array: tsnr array.
         
     created by Daniel Haenelt
     Date created: 05-02-2019         
-    Last modified: 28-05-2020
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
     import nibabel as nb
     from lib.io.get_filename import get_filename
+    from lib.io.load_volume import load_volume
 
     # make subfolders
     if write_output and not os.path.exists(path_output):
         os.makedirs(path_output)
     
-    # get filename
-    _, file, ext = get_filename(input)
-
     # load time series
-    data_img = nb.load(input)
-    data_array = data_img.get_fdata()
+    if isinstance(input, nb.Nifti1Image):
+        file = name_output
+        ext = ".nii"
+    else:
+        _, file, ext = get_filename(input)
+    data_img = load_volume(input, mode="image")
+    dim = data_img.shape[:3]
+    nt = data_img.shape[3]
     
-    # get mean and std
-    data_mean_array = np.mean(data_array, axis=3)
-    data_std_array = np.std(data_array, axis=3)
+    # get mean and std from moments relative to first volume
+    ref_array = load_volume(data_img, vol=0, dtype="float64")
+    sum_array = np.zeros(dim)
+    sum2_array = np.zeros(dim)
+    for t in range(0, nt, chunk_size):
+        data_array = load_volume(data_img, vol=slice(t, t+chunk_size), dtype="float64")
+        data_array -= ref_array[:,:,:,np.newaxis]
+        sum_array += np.sum(data_array, axis=3)
+        sum2_array += np.sum(data_array**2, axis=3)
+
+    data_mean_array = ref_array + sum_array / nt
+    data_std_array = np.sqrt(np.maximum(sum2_array / nt - (sum_array / nt)**2, 0))
     data_std_array[data_std_array == 0] = np.nan # set zeroes to nan
     
     # get tsnr of time series
@@ -45,10 +61,11 @@ def get_tsnr(input, tsnr_max=200, write_output=False, path_output="", name_outpu
     
     # write output    
     if write_output:
-        data_img.header["dim"][0] = 3
-        data_img.header["dim"][4] = 1
+        header = data_img.header.copy()
+        header["dim"][0] = 3
+        header["dim"][4] = 1
 
-        data_img = nb.Nifti1Image(data_tsnr_array, data_img.affine, data_img.header)
+        data_img = nb.Nifti1Image(data_tsnr_array, data_img.affine, header)
         nb.save(data_img, os.path.join(path_output,"tsnr_"+file+ext))
     
     return data_tsnr_array
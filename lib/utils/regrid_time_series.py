@@ -1,7 +1,8 @@
-def regrid_time_series(input, path_output, TR_old, TR_new, t_start=0):
+def regrid_time_series(input, path_output, TR_old, TR_new, t_start=0, block_size=100000):
     """
-    This function interpolates the time series onto a new time grid using cubic interpolation. Only 
-    for writing the new TR in the header of the output time series, AFNI has to be included in the 
+    This function interpolates the time series onto a new time grid using cubic interpolation. The
+    interpolation operator is computed once and applied to all voxel time series at once. Only for 
+    writing the new TR in the header of the output time series, AFNI has to be included in the 
     search path.
     Inputs:
         *input: time series filename.
@@ -9,16 +10,17 @@ def regrid_time_series(input, path_output, TR_old, TR_new, t_start=0):
         *TR_old: TR of time series in s.
         *TR_new: TR of regridded time series in s.
         *t_start: shift time series in s (t_start >= 0 and <= TR_old).
+        *block_size: number of voxels which are interpolated at once.
         
     created by Daniel Haenelt
     Date created: 19-02-2020           
-    Last modified: 12-03-2020
+    Last modified: 18-10-2026
     """
     import os
     import numpy as np
     import nibabel as nb
-    from scipy.interpolate import InterpolatedUnivariateSpline as Interp
     from lib.io.get_filename import get_filename
+    from lib.utils.temporal_resampler import TemporalResampler
 
     # get filename
     _, name_input, ext_input = get_filename(input)    
@@ -52,16 +54,12 @@ def regrid_time_series(input, path_output, TR_old, TR_new, t_start=0):
     data_array = np.zeros((nx, ny, nz, nt+2*n_append))
     data_array[:,:,:,n_append:-n_append] = data.get_fdata()
     for i in range(n_append):
-        data_array[:,:,:,i] = data.get_fdata()[:,:,:,0]
-        data_array[:,:,:,-(i+1)] = data.get_fdata()[:,:,:,-1]
+        data_array[:,:,:,i] = data_array[:,:,:,n_append]
+        data_array[:,:,:,-(i+1)] = data_array[:,:,:,-(n_append+1)]
     
     # temporal interpolation
-    data_array_regrid = np.zeros((nx,ny,nz,len(t_new)))
-    for x in range(nx):
-        for y in range(ny):
-            for z in range(nz):
-                cubic_interper = Interp(t_old, data_array[x,y,z,:], k=3)
-                data_array_regrid[x,y,z,:] = cubic_interper(t_new)
+    resampler = TemporalResampler(t_old, t_new, kind="cubic", block_size=block_size)
+    data_array_regrid = resampler.apply(data_array)
     
     # delete appended volumes
     vols_keep1 = t_new >= 0
@@ -0,0 +1,45 @@
+def sample_volume(data_array, vox, interpolation="nearest", cval=0):
+    """
+    This function samples a 3D or 4D array at arbitrary voxel coordinates. Interpolation weights
+    are computed once for all points and applied to all volumes along the 4th dimension at once.
+    Nearest neighbour sampling takes the value of the closest voxel centre. Trilinear interpolation
+    equals scipy.ndimage.map_coordinates with order=1. Points outside of the volume get the 
+    constant value cval. Interpolation indices and weights are taken from
+    get_interpolation_weights.
+    Inputs:
+        *data_array: 3D or 4D array.
+        *vox: array of voxel coordinates with shape (n_points, 3).
+        *interpolation: interpolation method (nearest, trilinear).
+        *cval: value of points outside of the volume.
+    Outputs:
+        *res: sampled data with shape (n_points,) for 3D and (n_points, nt) for 4D input.
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    import sys
+    import numpy as np
+    from lib.utils.get_interpolation_weights import get_interpolation_weights
+
+    # interpolation indices and weights of points inside the volume
+    if interpolation == "nearest":
+        ind_inside, ijk, weight = get_interpolation_weights(vox, np.shape(data_array), "nearest")
+    elif interpolation == "trilinear":
+        ind_inside, ijk, weight = get_interpolation_weights(vox, np.shape(data_array), "linear")
+    else:
+        sys.exit("Choose a valid interpolation method!")
+
+    res = np.full((len(vox),) + np.shape(data_array)[3:], cval, dtype=np.float64)
+    if not len(ind_inside):
+        return res
+
+    # weighted sum over neighbouring voxels
+    res_inside = 0
+    for i in range(len(weight)):
+        w = np.reshape(weight[i], (len(weight[i]),) + (1,) * (np.ndim(data_array) - 3))
+        res_inside = res_inside + w * data_array[ijk[i,:,0], ijk[i,:,1], ijk[i,:,2]]
+
+    res[ind_inside] = res_inside
+
+    return res
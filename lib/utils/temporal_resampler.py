@@ -0,0 +1,73 @@
+class TemporalResampler:
+    """
+    This class resamples time series from one time grid onto another by a precomputed linear
+    operator of shape (len(t_new), len(t_old)). The operator is computed once when the object is
+    created and can then be applied to arbitrary arrays with time in the last dimension, e.g. a
+    whole 4D nifti array. Voxels are processed in blocks to bound the memory of intermediate
+    copies. Two operators are available. With kind="cubic", the operator performs cubic spline
+    interpolation with not-a-knot end conditions (same as InterpolatedUnivariateSpline with k=3).
+    With kind="overlap", an output time point gets the sum of all input time points whose
+    acquisition window [t, t+TR) overlaps with its own acquisition window. This can be used to
+    transfer binary regressors (e.g. outlier volumes) onto the new time grid.
+    Inputs:
+        *t_old: time points of input grid in s (strictly increasing).
+        *t_new: time points of output grid in s.
+        *kind: type of operator (cubic, overlap).
+        *block_size: number of voxels which are resampled at once.
+
+    created by Daniel Haenelt
+    Date created: 18-10-2026
+    Last modified: 18-10-2026
+    """
+    def __init__(self, t_old, t_new, kind="cubic", block_size=100000):
+        import sys
+        import numpy as np
+        from lib.utils.get_spline_matrix import get_spline_matrix
+
+        self.t_old = np.asarray(t_old, dtype=np.float64)
+        self.t_new = np.asarray(t_new, dtype=np.float64)
+        self.kind = kind
+        self.block_size = block_size
+
+        # get operator
+        if kind == "cubic":
+            M = get_spline_matrix(self.t_old, self.t_new)
+        elif kind == "overlap":
+            TR_old = self.t_old[1] - self.t_old[0]
+            TR_new = self.t_new[1] - self.t_new[0]
+            M = ( self.t_new[:,None] > self.t_old[None,:] - TR_new ) * \
+                ( self.t_new[:,None] < self.t_old[None,:] + TR_old )
+            M = M.astype(np.float64)
+        else:
+            sys.exit("Choose a valid operator kind!")
+
+        # store transposed operator for right multiplication of (voxels x time) matrices
+        self.M = M
+        self.MT = np.ascontiguousarray(M.T)
+
+    def apply(self, data_array):
+        """
+        Applies the temporal operator to an array with time in the last dimension.
+        Inputs:
+            *data_array: array of shape (..., len(t_old)).
+        Outputs:
+            *data_array_resampled: array of shape (..., len(t_new)).
+        """
+        import sys
+        import numpy as np
+
+        data_array = np.asarray(data_array)
+        if data_array.shape[-1] != len(self.t_old):
+            sys.exit("Last dimension of input array does not match the input time grid!")
+
+        # flatten to (voxels x time) matrix
+        shape_out = data_array.shape[:-1] + (len(self.t_new),)
+        data_array = np.reshape(data_array, (-1, len(self.t_old)))
+        data_array_resampled = np.zeros((np.shape(data_array)[0], len(self.t_new)))
+
+        # resample in voxel blocks
+        for i in range(0, np.shape(data_array)[0], self.block_size):
+            data_array_resampled[i:i+self.block_size,:] = \
+                np.dot(data_array[i:i+self.block_size,:], self.MT)
+
+        return np.reshape(data_array_resampled, shape_out)
@@ -1,43 +1,149 @@
-def upsample_volume(file_in, file_out, dxyz=[0.4, 0.4, 0.4], rmode="Cu"):
+_upsample_cache = {}
+
+def upsample_volume(file_in, file_out=None, dxyz=[0.4, 0.4, 0.4], rmode="Cu", write_output=True,
+                    chunk_size=10, use_cache=False):
     """
-    This function upsamples a nifti volume using the afni function 3dresample. Before running the
-    function, set the afni environment by calling AFNI in the terminal. Output is an upsampled nifti
-    volume.
+    This function resamples a nifti volume to a new voxel size in the same way as the afni function
+    3dresample -dxyz. The new matrix size is int(n*d/d_new + 0.499) along each axis and the grid is
+    shifted such that the outer voxel edges of input and output grid coincide. Since both grids
+    share the same orientation, interpolation is separable and done by one sparse interpolation
+    matrix per axis applied by tensor contraction. Indices outside the input grid are clamped to the
+    border as in afni. 4D inputs are processed in chunks of volumes. Integer data types are kept
+    by rounding unless the data is scaled (scl_slope, scl_inter), in which case the output is
+    written as float32. Optionally, the output is only returned in memory and results of identical calls
+    (same input file, modification time and parameters) are cached in memory.
     Inputs:
-        *file_in: nifti input filename.
+        *file_in: nifti input filename or nibabel instance.
         *file_out: nifti output filename.
         *dxyz: array of target resolution in single dimensions.
-        *rmode: interpolation methods (Linear, NN, Cu, Bk).
+        *rmode: interpolation methods (NN, Li/Linear, Cu/Cubic).
+        *write_output: write output to file_out.
+        *chunk_size: number of volumes which are interpolated at once.
+        *use_cache: keep the result in memory for identical calls.
+    Outputs:
+        *output: upsampled nifti volume.
         
     created by Daniel Haenelt
     Date created: 16-12-2019        
-    Last modified: 29-05-2020
+    Last modified: 18-10-2026
     """
     import os
+    import sys
     import numpy as np
-    from sh import gunzip
-    from shutil import copyfile
-    from lib.io.get_filename import get_filename
-    
-    # get path and file extension of input file
-    path_in, _, ext_in = get_filename(file_in)
-    
-    # make temporary copy of input file
-    tmp = np.random.randint(0, 10, 5)
-    tmp_string = ''.join(str(i) for i in tmp)
-    file_tmp = os.path.join(path_in,"tmp_"+tmp_string+ext_in)
-    copyfile(file_in, file_tmp)
-    
-    if os.path.splitext(file_tmp)[1] == ".gz":
-        gunzip(file_tmp)
-        file_tmp = os.path.splitext(file_tmp)[0]
-
-    # upsample volume
-    os.system("3dresample " + \
-              "-dxyz " + str(dxyz[0]) + " " + str(dxyz[1]) + " " + str(dxyz[2]) + " " +\
-              "-rmode " + str(rmode) + " " + \
-              "-inset " + file_tmp + " " + \
-              "-prefix " + file_out)
+    import nibabel as nb
+    import scipy.sparse as sparse
+
+    # load input
+    if isinstance(file_in, str):
+        data_img = nb.load(file_in)
+        key = (os.path.abspath(file_in), os.path.getmtime(file_in), tuple(np.ravel(dxyz)), rmode)
+    else:
+        data_img = file_in
+        key = None
+
+    if use_cache and key in _upsample_cache:
+        output = _upsample_cache[key]
+        output = nb.Nifti1Image(np.array(output.dataobj), output.affine, output.header)
+    else:
+        
+        # interpolation method
+        if rmode in ["NN"]:
+            order = 0
+        elif rmode in ["Li", "Linear"]:
+            order = 1
+        elif rmode in ["Cu", "Cubic"]:
+            order = 3
+        else:
+            sys.exit("Choose a valid interpolation method!")
+
+        def get_weights(x, n):
+            # interpolation matrix for sample points x on a 1D grid of size n
+            if order == 0:
+                ind = [np.floor(x + 0.5)]
+                w = [np.ones_like(x)]
+            elif order == 1:
+                i0 = np.floor(x)
+                f = x - i0
+                ind = [i0, i0 + 1]
+                w = [1 - f, f]
+            else:
+                # cubic lagrange polynomial on the four nearest points
+                i0 = np.floor(x)
+                f = x - i0
+                ind = [i0 - 1, i0, i0 + 1, i0 + 2]
+                w = [-f * (f - 1) * (f - 2) / 6,
+                     (f + 1) * (f - 1) * (f - 2) / 2,
+                     -(f + 1) * f * (f - 2) / 2,
+                     (f + 1) * f * (f - 1) / 6]
+
+            row = np.tile(np.arange(len(x)), len(ind))
+            col = np.clip(np.concatenate(ind), 0, n - 1).astype(int)
+            return sparse.csr_matrix((np.concatenate(w), (row, col)), shape=(len(x), n))
+
+        def contract(W, arr, axis):
+            arr = np.moveaxis(arr, axis, 0)
+            dim = np.shape(arr)
+            arr = W.dot(np.reshape(arr, (dim[0], -1)))
+            arr = np.reshape(arr, (W.shape[0],) + dim[1:])
+            return np.moveaxis(arr, 0, axis)
+
+        # new grid (outer voxel edges are preserved)
+        dim = np.array(data_img.shape[:3])
+        pixdim = np.array(data_img.header.get_zooms()[:3], dtype=np.float64)
+        scale = np.asarray(dxyz, dtype=np.float64) / pixdim
+        dim_new = ( dim * pixdim / np.asarray(dxyz, dtype=np.float64) + 0.499 ).astype(int)
+        origin = -0.5 + 0.5 * scale
+
+        W = [get_weights(origin[i] + np.arange(dim_new[i]) * scale[i], dim[i]) for i in range(3)]
+
+        # new affine
+        T = np.diag(np.append(scale, 1))
+        T[:3,3] = origin
+        affine = np.dot(data_img.affine, T)
+
+        # output data type (integer data is only kept if not scaled by slope and intercept)
+        dtype = data_img.get_data_dtype()
+        slope = getattr(data_img.dataobj, "slope", 1)
+        inter = getattr(data_img.dataobj, "inter", 0)
+        if slope != 1 or inter != 0:
+            dtype = np.dtype(np.float32)
+
+        # interpolate volumes in chunks
+        nt = data_img.shape[3:]
+        res = np.zeros(tuple(dim_new) + nt, dtype=dtype)
+        res_view = np.reshape(res, tuple(dim_new) + (-1,))
+        data_proxy = data_img.dataobj
+        n_vol = int(np.prod(nt))
+        for t in range(0, n_vol, chunk_size):
+            if len(nt):
+                data_array = np.asarray(data_proxy[...,t:t+chunk_size], dtype=np.float64)
+                data_array = np.reshape(data_array, tuple(dim) + (-1,))
+            else:
+                data_array = np.asarray(data_proxy, dtype=np.float64)[...,None]
+
+            for i in range(3):
+                data_array = contract(W[i], data_array, i)
+
+            if np.issubdtype(dtype, np.integer):
+                data_array = np.clip(np.round(data_array), np.iinfo(dtype).min, 
+                                     np.iinfo(dtype).max)
+            res_view[...,t:t+chunk_size] = data_array
+
+        # output image
+        header = data_img.header.copy()
+        header.set_data_dtype(dtype)
+        header.set_slope_inter(1, 0)
+        header.set_zooms(tuple(np.ravel(dxyz)) + header.get_zooms()[3:])
+        output = nb.Nifti1Image(res, affine, header)
+        
+        # cache result
+        if use_cache and key is not None:
+            _upsample_cache.clear()
+            _upsample_cache[key] = output
+            output = nb.Nifti1Image(np.array(res), affine, header)
+
+    # write output
+    if write_output and file_out:
+        nb.save(output, file_out)
     
-    # remove temporary copy
-    os.remove(file_tmp)
\ No newline at end of file
+    return output
@@ -6,14 +6,13 @@ series on the cortical surface.
 
 created by Daniel Haenelt
 Date created: 12-11-2019
-Last modified: 12-11-2019
+Last modified: 18-10-2026
 """
 import os
-import shutil as sh
 import numpy as np
 import nibabel as nb
-from nighres.registration import apply_coordinate_mappings
-from lib.utils.get_mean4d import get_mean4d
+from lib.registration.apply_coordinate_mapping4d import apply_coordinate_mapping4d
+from lib.preprocessing.baseline_correction import baseline_correction
 from lib.processing.demean_time_series import demean_time_series
 from lib.mapping import map2surface
 
@@ -40,56 +39,33 @@ start_vol = 0
 end_vol = 0
 interpolation = "nearest" # can be linear or nearest
 
-# path to SPM12 folder
-pathSPM = "/data/pt_01880/source/spm12"
-pathLIB = "/data/hu_haenelt/projects/scripts/lib/preprocessing"
-
 """ do not edit below """
 
-# prefix
-tmp = np.random.randint(0, 10, 5)
-prefix = ''.join(str(i) for i in tmp)+'_'
-
-# change to lib folder
-os.chdir(pathLIB)
-
 # make output folders
-path_series = os.path.join(path_output,"series")
-path_native = os.path.join(path_output,"native")
 path_def = os.path.join(path_output,"def")
 path_surf = os.path.join(path_output,"surf")
 
 if not os.path.exists(path_output):
     os.mkdir(path_output)
 
-if not os.path.exists(path_series):
-    os.mkdir(path_series)
-
-if not os.path.exists(path_native):
-    os.mkdir(path_native)
-    
 if not os.path.exists(path_def):
     os.mkdir(path_def)
 
 if not os.path.exists(path_surf):
     os.mkdir(path_surf)
 
-# look for baseline corrected time series
+# get mean of baseline corrected time series
 for i in range(len(input_series)):
-    os.system("matlab" + \
-              " -nodisplay -nodesktop -r " + \
-              "\"baseline_correction(\'{0}\', {1}, {2}, \'{3}\', \'{4}\'); exit;\"". \
-              format(input_series[i], TR, cutoff_highpass, pathSPM, prefix))
-    
-    # move baseline corrected time series to output folder
-    sh.move(os.path.join(os.path.dirname(input_series[i]),prefix+os.path.basename(input_series[i])),
-            os.path.join(path_series,str(i+1)+".nii"))
-    
-    # rename input images
-    input_series[i] = os.path.join(path_series,str(i+1)+".nii")
+    data = baseline_correction(input_series[i], TR, cutoff_highpass)
+    if i == 0:
+        data_array = data.get_fdata()
+    else:
+        data_array += data.get_fdata()
+
+data_array /= len(input_series)
 
 # get demeaned mean time series
-data = get_mean4d(input_series, path_output="", name_output="", write_output=False)
+data = nb.Nifti1Image(data_array, data.affine, data.header)
 data = demean_time_series(data, write_output=False)
 data_array = data.get_fdata()
     
@@ -100,24 +76,19 @@ if start_vol != 0:
 if end_vol != 0:
     data_array = data_array[:,:,:,:-end_vol]
 
-# write single volumes
-data.header["dim"][4] = 1
-data.header["dim"][0] = 3
-for i in range(np.shape(data_array)[3]):
-    output = nb.Nifti1Image(data_array[:,:,:,i], data.affine, data.header)
-    nb.save(output, os.path.join(path_native,str(i+1)+".nii")) 
+# apply deformation to whole time series
+cmap = nb.load(input_deformation)
+data_def_array = apply_coordinate_mapping4d(data_array, 
+                                            cmap.get_fdata(), 
+                                            interpolation=interpolation, 
+                                            padding='closest')
 
-# apply deformation    
-for i in range(np.shape(data_array)[3]):
-    apply_coordinate_mappings(os.path.join(path_native,str(i+1)+".nii"), 
-                              input_deformation, 
-                              interpolation=interpolation, 
-                              padding='closest', 
-                              save_data=True, 
-                              overwrite=True, 
-                              output_dir=path_def,
-                              file_name=None,
-                              )
+# write single volumes
+cmap.header["dim"][0] = 3
+cmap.header["dim"][4] = 1
+for i in range(np.shape(data_def_array)[3]):
+    output = nb.Nifti1Image(data_def_array[:,:,:,i], cmap.affine, cmap.header)
+    nb.save(output, os.path.join(path_def,str(i+1)+"_def-img.nii.gz"))
 
 # map to ana
 for i in range(np.shape(data_array)[3]):
@@ -2,19 +2,21 @@
 Bold correction of VASO data
 
 This scripts corrects a vaso time series for bold contamination. First, both time series are 
-upsampled and the vaso time series is shifted by one time step. BOLD correction is performed by
-dividing both time series. In the end, unrealistic vaso values are removed.
+upsampled by cubic interpolation and the vaso time series is shifted by one time step. BOLD 
+correction is performed by dividing both time series. In the end, unrealistic vaso values are 
+removed.
 
 Before running the script, login to queen via ssh and set the afni environment by calling AFNI in 
 the terminal.
 
 created by Daniel Haenelt
 Date created: 02-05-2018
-Last modified: 05-06-2020
+Last modified: 18-10-2026
 """
 import os
 import numpy as np
 import nibabel as nb
+from lib.utils.regrid_time_series import regrid_time_series
 
 # input data
 img_vaso = ["/data/pt_01880/Experiment1_ODC/p5/odc/VASO2/Run_1/uvaso.nii",
@@ -42,7 +44,8 @@ img_bold = ["/data/pt_01880/Experiment1_ODC/p5/odc/VASO2/Run_1/ubold.nii",
             ]
 
 # parameters
-TR = 2.5
+TR_old = 5 # effective TR of bold+vaso
+TR_new = 2.5 # TR of upsampled time series
 vaso_threshold = 6
 
 """ do not edit below """
@@ -56,13 +59,8 @@ for i in range(len(img_vaso)):
     file_bold = os.path.splitext(os.path.basename(img_bold[i]))[0]
 
     # upsample vaso and bold time series
-    os.system("3dUpsample -overwrite -datum short " + \
-              "-prefix " + os.path.join(path_vaso,file_vaso + "_upsampled.nii") + \
-              " -n 2 -input " + img_vaso[i])
-    
-    os.system("3dUpsample -overwrite -datum short " + \
-              "-prefix " + os.path.join(path_bold,file_bold + "_upsampled.nii") + \
-              " -n 2 -input " + img_bold[i])
+    regrid_time_series(img_vaso[i], path_vaso, TR_old, TR_new, t_start=0)
+    regrid_time_series(img_bold[i], path_bold, TR_old, TR_new, t_start=0)
 
     # load vaso data and shift in time
     vaso = nb.load(os.path.join(path_vaso,file_vaso + "_upsampled.nii"))
@@ -90,13 +88,5 @@ for i in range(len(img_vaso)):
 
     # change TR in header
     os.system("3drefit " + \
-              "-TR " + str(TR) + " " + \
-              os.path.join(path_bold,file_bold + "_upsampled.nii"))
-    
-    os.system("3drefit " + \
-              "-TR " + str(TR) + " " + \
-              os.path.join(path_vaso,file_vaso + "_upsampled.nii"))
-
-    os.system("3drefit " + \
-              "-TR " + str(TR) + " " + \
+              "-TR " + str(TR_new) + " " + \
               os.path.join(path_vaso,file_vaso + "_upsampled_corrected.nii"))
\ No newline at end of file
@@ -8,14 +8,13 @@ for each input time series to denote volumes below threshold.
 
 created by Daniel Haenelt
 Date created: 31-07-2019             
-Last modified: 22-05-2020  
+Last modified: 18-10-2026
 """
 import os
 import numpy as np
-import nibabel as nb
 import matplotlib.pyplot as plt
-from scipy.stats import pearsonr, shapiro
 from lib.io.get_filename import get_filename
+from lib.preprocessing.get_volume_quality import get_volume_quality
 
 input = [
     "/data/pt_01880/Experiment1_ODC/p4/retinotopy3/pol_anticlock/uadata.nii",
@@ -26,6 +25,7 @@ input = [
 input_ref = "/data/pt_01880/Experiment1_ODC/p4/retinotopy3/diagnosis/mean_uadata.nii"
 input_mask_ref = ""
 r_threshold = 0.95
+n_sample = 5000 # number of voxels for shapiro-wilk test
 
 """ do not edit below """
 
@@ -41,120 +41,22 @@ else:
 if not os.path.exists(path_output):
     os.makedirs(path_output)
 
-# load reference volume
-data_0 = nb.load(input_ref).get_fdata()
-
-if len(input_mask_ref) > 0:
-    mask_0 = nb.load(input_mask_ref).get_fdata()
-
-# open logfile
-file = open(os.path.join(path_output,"correlation_"+name_file+".txt"),"w")
-file.write("Percentage of volumes below threshold\n")
-file.write("Correlation threshold: "+str(r_threshold)+"\n\n")
-
-r_pearson_0 = []
-r_pearson = []
-r_shapiro = []
-p_pearson_0 = []
-p_pearson = []
-p_shapiro = []
-for i in range(len(input)):
-    
-    # load time series
-    data_temp = nb.load(input[i]).get_fdata()   
-    
-    # print progress
-    print("Time series "+str(i+1)+"/"+str(len(input)))
-    
-    # create output folder for regressor of no interest
-    path_logfile = os.path.join(os.path.dirname(input[i]),"outlier")
-    if not os.path.exists(path_logfile):
-        os.makedirs(path_logfile)
-    
-    # open logfile for regressor of no interest
-    file2 = open(os.path.join(path_logfile,"correlation_regressor_"+name_file+".txt"),"w")
-    
-    pearson_run = 0
-    npearson_0 = 0
-    nshapiro = 0
-    for j in range(np.shape(data_temp)[3]):
-        
-        # load reference and current time step
-        data_temp_0 = data_0.copy()
-        data_temp_j = data_temp[:,:,:,j].copy()
-        
-        # mask time step
-        if len(input_mask_ref) > 0:
-            data_temp_0 = data_temp_0[mask_0 == 1].flatten()
-            data_temp_j = data_temp_j[mask_0 == 1].flatten()       
-        else:
-            data_temp_0 = data_temp_0.flatten()
-            data_temp_j = data_temp_j.flatten()       
-        
-        # shapiro wilk
-        r_tmp, p_tmp = shapiro(data_temp_j)
-        r_shapiro = np.append(r_shapiro, r_tmp)
-        p_shapiro = np.append(p_shapiro, p_tmp)
-
-        if r_tmp < r_threshold:
-            nshapiro += 1 
-        
-        # pearson correlation to reference
-        r_tmp, p_tmp = pearsonr(data_temp_0, data_temp_j)
-        r_pearson_0 = np.append(r_pearson_0, r_tmp)
-        p_pearson_0 = np.append(p_pearson_0, p_tmp)
-        
-        # sum for within-run correlation
-        pearson_run += r_tmp
-        
-        if r_tmp < r_threshold:
-            npearson_0 += 1
-            file2.write("1\n")
-        else:
-            file2.write("0\n")
-        
-        if j < np.shape(data_temp)[3]-1 and i < len(input):
-            data_temp_1 = data_temp[:,:,:,j].copy()
-            data_temp_2 = data_temp[:,:,:,j+1].copy()
-            
-        elif j == np.shape(data_temp)[3]-1 and i < len(input)-1:
-            data_temp_1 = data_temp[:,:,:,j].copy()
-            data_temp_2 = nb.load(input[i+1]).get_fdata()[:,:,:,0]
-            
-        else:
-            break
-            
-        # mask time step
-        if len(input_mask_ref) > 0:
-            data_temp_1 = data_temp_1[mask_0 == 1].flatten()
-            data_temp_2 = data_temp_2[mask_0 == 1].flatten() 
-        else:
-            data_temp_1 = data_temp_1.flatten()
-            data_temp_2 = data_temp_2.flatten() 
-        
-        r_tmp, p_tmp = pearsonr(data_temp_1, data_temp_2)
-        r_pearson = np.append(r_pearson, r_tmp)
-        p_pearson = np.append(p_pearson, p_tmp)
-               
-    # close logfile for regressor of no interest
-    file2.close()
-    
-    # percentage below threshold
-    res_pearson_0 = npearson_0 / np.shape(data_temp)[3] * 100
-    res_shapiro = nshapiro / np.shape(data_temp)[3] * 100
-    
-    # average within-run correlation
-    pearson_run = pearson_run / np.shape(data_temp)[3]
-    
-    # update logfile
-    file.write("Run: "+str(i+1)+"\n")
-    file.write("----------\n")
-    file.write("Pearson (average within run): "+str(pearson_run)+"\n")
-    file.write("Outlier percentage (pearson to ref): "+str(res_pearson_0)+"\n")
-    file.write("Outlier percentage (shapiro): "+str(res_shapiro)+"\n\n\n")
-
-# close logfile
-file.close()
+# volume quality metrics
+results = get_volume_quality(input, 
+                             input_ref, 
+                             input_mask_ref, 
+                             r_threshold=r_threshold, 
+                             n_sample=n_sample, 
+                             path_output=path_output, 
+                             name_output=name_file, 
+                             write_output=True)
+
+r_shapiro = results["r_shapiro"]
+p_shapiro = results["p_shapiro"]
+r_pearson = results["r_pearson"]
+p_pearson = results["p_pearson"]
+r_pearson_0 = results["r_pearson_0"]
+p_pearson_0 = results["p_pearson_0"]
 
 # save variables
 np.savez(os.path.join(path_output,"correlation_"+name_file),
@@ -7,11 +7,12 @@ resampled timeseries.
 
 created by Daniel Haenelt
 Date created: 26-05-2020           
-Last modified: 26-05-2020  
+Last modified: 18-10-2026
 """
 import os
 import numpy as np
 from lib.io.get_filename import get_filename
+from lib.utils.temporal_resampler import TemporalResampler
 
 # input
 file_in = ["/data/pt_01880/Experiment1_ODC/p4/odc/VASO1/Run_3/outlier/outlier_regressor_merge.txt"]
@@ -46,16 +47,10 @@ for i in range(len(file_in)):
     nt_new = int(run_length / TR_new)
     t_new = np.arange(0,nt_new) * TR_new
     
-    # find outliers
-    n_outlier = np.where(outlier_merge == 1)[0]
-    t_outlier = t_old[n_outlier]
-    
-    # get nearest time points in new time array
-    outlier_new = np.zeros_like(t_new)
-    for i in range(len(t_new)):
-        for j in range(len(t_outlier)):
-            if t_new[i] > t_outlier[j] - TR_new and t_new[i] < t_outlier[j] + TR_old:
-                outlier_new[i] = 1
+    # get time points in new time array which overlap with outlier volumes
+    resampler = TemporalResampler(t_old, t_new, kind="overlap")
+    outlier_new = resampler.apply(outlier_merge)
+    outlier_new[outlier_new != 0] = 1
 
     # save merged regressor
     np.savetxt(os.path.join(path_output,name_output),outlier_new,'%i')
@@ -10,10 +10,12 @@ by calling FREESURFER, ANTSENV and AFNI in the terminal.
 
 created by Daniel Haenelt
 Date created: 02-03-2019
-Last modified: 15-04-2020
+Last modified: 18-10-2026
 """
 import os
 import nibabel as nb
+from lib.io.get_filename import get_filename
+from lib.preprocessing.baseline_correction import baseline_correction
 from lib.preprocessing.get_nuisance_mask import get_nuisance_mask
 from lib.preprocessing.get_nuisance_regressor import get_nuisance_regressor
 from lib.processing.get_alff import get_alff
@@ -50,22 +52,22 @@ if not os.path.exists(path_output):
     os.makedirs(path_output)
 
 # get path and filenames
-path = os.path.dirname(function)
+path, name_file, _ = get_filename(function)
 file = os.path.basename(function)
-bfile = "b" + file # filename of baseline corrected time series
+bname = "b" + name_file # basename of baseline corrected time series
+bfile = bname + ".nii" # filename of baseline corrected time series
 rfile = "r" + file # filename of residual time series
 
 # physiological noise regression
 if nuisance_regression:
     
     # baseline correction
-    previous_cwd = os.getcwd()
-    os.chdir(pathLIB)
-    os.system("matlab" + \
-              " -nodisplay -nodesktop -r " + \
-              "\"baseline_correction(\'{0}\', {1}, {2}, \'{3}\'); exit;\"". \
-              format(function, TR, cutoff_highpass, pathSPM))
-    os.chdir(previous_cwd)
+    baseline_correction(function, 
+                        TR, 
+                        cutoff_highpass, 
+                        path_output=path, 
+                        name_output=bname, 
+                        write_output=True)
 
     if biopac:
         
@@ -81,6 +83,7 @@ if nuisance_regression:
     else:
 
         # get wm and csf mask
+        previous_cwd = os.getcwd()
         get_nuisance_mask(anatomy, pathSPM, deformation, path_output, 
                           nerode_wm, nerode_csf, segmentation, cleanup)
     
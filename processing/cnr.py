@@ -16,14 +16,13 @@ the terminal.
 
 created by Daniel Haenelt
 Date created: 03-05-2019             
-Last modified: 28-05-2020  
+Last modified: 18-10-2026  
 """
 import os
 import datetime
-import numpy as np
 import nibabel as nb
 from lib.io.get_filename import get_filename
-from lib.processing import get_onset_vols
+from lib.processing import get_block_stats
 
 # input data
 img_input = [
@@ -65,10 +64,6 @@ cutoff_highpass = 270 # cutoff in s for baseline correction
 name_sess = "GE_EPI2"
 name_output = "super"
 
-# path to SPM12 folder
-pathSPM = "/data/pt_01880/source/spm12"
-pathLIB = "/data/hu_haenelt/projects/scripts/lib/preprocessing"
-
 """ do not edit below """
 
 # get path from first entry
@@ -86,57 +81,17 @@ data_img.header["dim"][4] = 1
 header = data_img.header
 affine = data_img.affine
 
-# get image dimension
-dim = data_img.header["dim"][1:4]
-
-# get outlier dummy array if not outlier input
-if not len(outlier_input):
-    outlier_input = np.zeros(len(img_input))
-
-mean_cnr = np.zeros(dim)
-for i in range(len(img_input)):
-
-    # get filename
-    path_file, name_file, ext_file = get_filename(img_input[i])
-    
-    # get condition specific onsets
-    onsets0 = get_onset_vols(cond_input[i], outlier_input[i], condition0, TR, skip_vol)
-    onsets1 = get_onset_vols(cond_input[i], outlier_input[i], condition1, TR, skip_vol)
-    
-    # highpass filter time series
-    if use_highpass:
-        os.chdir(pathLIB)
-        os.system("matlab" + \
-                  " -nodisplay -nodesktop -r " + \
-                  "\"baseline_correction(\'{0}\', {1}, {2}, \'{3}\'); exit;\"". \
-                  format(os.path.join(path_file,name_file+ext_file), TR, cutoff_highpass, pathSPM))
-
-        # change input to highpass filtered time series
-        name_file = "b" + name_file
-    
-    # open baseline corrected data
-    data_img = nb.load(os.path.join(path_file,name_file+ext_file))
-    data_array = data_img.get_fdata()
-    
-    # sort volumes to conditions
-    data_condition0 = data_array[:,:,:,onsets0]
-    data_condition1 = data_array[:,:,:,onsets1]
-       
-    # mean
-    data_condition0_mean = np.mean(data_condition0, axis=3)
-    data_condition1_mean = np.mean(data_condition1, axis=3)
-    data_condition0_std = np.std(data_condition0, axis=3)
-    data_condition0_std[data_condition0_std == 0] = np.nan
-    
-    # percent signal change
-    cnr = ( np.abs(data_condition1_mean - data_condition0_mean) ) / data_condition0_std * 100
-    cnr[np.isnan(cnr)] = 0
-
-    # sum volumes for each run
-    mean_cnr += cnr
-    
-# divide by number of runs
-mean_cnr /= len(img_input)
+# cnr averaged across runs (highpass filter is applied while reading each run)
+results = get_block_stats(img_input, 
+                          cond_input, 
+                          outlier_input, 
+                          condition0=condition0, 
+                          condition1=condition1, 
+                          TR=TR, 
+                          skip_vol=skip_vol, 
+                          cutoff_highpass=cutoff_highpass if use_highpass else None)
+
+mean_cnr = results["cnr1"]
 
 # threshold tsnr
 if cnr_threshold:
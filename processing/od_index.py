@@ -3,29 +3,25 @@ OD index
 
 This scripts calculates a defined ocular dominance (OD) index for a session consisting of several
 runs. From the condition file which has to be in the SPM compatible *.mat format, time points for 
-both experimental conditions are extracted. Condition time points can be converted to z-scores. The 
-OD index is computed by dividing each condition mean by the condition mean or max within a 
-predefined mask before computing the difference of both conditions. The index for the whole session 
-is taken as the average across single runs. If the outlier input array is not empty, outlier volumes 
-are discarded from the analysis. Optionally, the time series can be filtered by a lowpass and a 
-highpass filter. The input images should be in nifti format.
+both experimental conditions are extracted. The OD index is computed by dividing each condition 
+mean by the condition mean or max within a predefined mask before computing the difference of both 
+conditions. The index for the whole session is taken as the average across single runs. If the 
+outlier input array is not empty, outlier volumes are discarded from the analysis. Optionally, the 
+time series can be filtered by a lowpass and a highpass filter. The input images should be in nifti format.
 
 Before running the script, login to queen via ssh and set the afni environment by calling AFNI in 
 the terminal.
 
 created by Daniel Haenelt
 Date created: 16-09-2019             
-Last modified: 24-07-2020  
+Last modified: 18-10-2026  
 """
 import os
-import sys
 import datetime
-import numpy as np
 import nibabel as nb
-from scipy.stats import zscore
 from nighres.registration import apply_coordinate_mappings
 from lib.io.get_filename import get_filename
-from lib.processing import get_onset_vols
+from lib.processing import get_block_stats
 
 # input data
 img_input = [
@@ -77,7 +73,6 @@ condition2 = "right" # experimental condition 2
 TR = 3 # repetition time in s
 skip_vol = 3 # skip number of volumes in each block
 baseline_calculation = "mean" # mean or max
-use_z_score = False
 use_highpass = True
 use_lowpass = False
 cutoff_highpass = 270 # cutoff in s for baseline correction
@@ -88,7 +83,6 @@ name_output = ""
 
 # path to SPM12 folder
 pathSPM = "/data/pt_01880/source/spm12"
-pathLIB1 = "/data/hu_haenelt/projects/scripts/lib/preprocessing"
 pathLIB2 = "/data/hu_haenelt/projects/scripts/lib/processing"
 
 """ do not edit below """
@@ -108,13 +102,6 @@ data_img.header["dim"][4] = 1
 header = data_img.header
 affine = data_img.affine
 
-# get image dimension
-dim = data_img.header["dim"][1:4]
-
-# get outlier dummy array if not outlier input
-if not len(outlier_input):
-    outlier_input = np.zeros(len(img_input))
-
 # deform mask
 apply_coordinate_mappings(mask_input, # input 
                           epi2orig_input, # cmap1
@@ -134,17 +121,12 @@ os.rename(os.path.join(path_output,"mask_def-img.nii.gz"),
 # load mask
 mask = nb.load(os.path.join(path_output,"mask.nii.gz")).get_fdata()
 
-mean_od_index1 = np.zeros(dim)
-mean_od_index2 = np.zeros(dim)
+file_input = []
 for i in range(len(img_input)):
     
     # get filename
     path_file, name_file, ext_file = get_filename(img_input[i])
     
-    # get condition specific onsets
-    onsets1 = get_onset_vols(cond_input[i], outlier_input[i], condition1, TR, skip_vol)
-    onsets2 = get_onset_vols(cond_input[i], outlier_input[i], condition2, TR, skip_vol)
-    
     # lowpass filter time series
     if use_lowpass:
         os.chdir(pathLIB2)
@@ -157,57 +139,22 @@ for i in range(len(img_input)):
         # change input to lowpass filtered time series
         name_file = "l" + name_file
 
-    # highpass filter time series
-    if use_highpass:
-        os.chdir(pathLIB1)
-        os.system("matlab" + \
-                  " -nodisplay -nodesktop -r " + \
-                  "\"baseline_correction(\'{0}\', {1}, {2}, \'{3}\'); exit;\"". \
-                  format(os.path.join(path_file,name_file+ext_file), TR, cutoff_highpass, pathSPM))
+    file_input.append(os.path.join(path_file,name_file+ext_file))
 
-        # change input to highpass filtered time series
-        name_file = "b" + name_file
+# od index averaged across runs (highpass filter is applied while reading each run)
+results = get_block_stats(file_input, 
+                          cond_input, 
+                          outlier_input, 
+                          condition1=condition1, 
+                          condition2=condition2, 
+                          TR=TR, 
+                          skip_vol=skip_vol, 
+                          cutoff_highpass=cutoff_highpass if use_highpass else None, 
+                          mask=mask, 
+                          baseline_calculation=baseline_calculation)
 
-    # open baseline corrected data
-    data_img = nb.load(os.path.join(path_file,name_file+ext_file))
-    data_array = data_img.get_fdata()
-    
-    # sort volumes to conditions
-    data_condition1 = data_array[:,:,:,onsets1]
-    data_condition2 = data_array[:,:,:,onsets2]
-    
-    # z-score
-    if use_z_score:
-        data_condition1 = zscore(data_condition1, axis=3)
-        data_condition2 = zscore(data_condition2, axis=3)
-    
-    # mean
-    data_condition1_mean = np.mean(data_condition1, axis=3)
-    data_condition2_mean = np.mean(data_condition2, axis=3)
-    
-    if baseline_calculation is "mean":
-        data_condition1_baseline = np.mean(data_condition1_mean[mask == 1])
-        data_condition2_baseline = np.mean(data_condition2_mean[mask == 1])
-    elif baseline_calculation is "max":
-        data_condition1_baseline = np.max(data_condition1_mean[mask == 1])
-        data_condition2_baseline = np.max(data_condition2_mean[mask == 1])   
-    else:
-        sys.exit("select either mean or max for baseline calculation!")
-    
-    # od index
-    data_condition1_rel = data_condition1_mean / data_condition1_baseline
-    data_condition2_rel = data_condition2_mean / data_condition2_baseline
-        
-    od_index1 = ( data_condition1_rel - data_condition2_rel ) * 100
-    od_index2 = ( data_condition2_rel - data_condition1_rel ) * 100
-
-    # sum volumes for each run
-    mean_od_index1 += od_index1
-    mean_od_index2 += od_index2
-    
-# divide by number of runs
-mean_od_index1 /= len(img_input)
-mean_od_index2 /= len(img_input)
+mean_od_index1 = results["od1"]
+mean_od_index2 = results["od2"]
 
 # name of output files
 if len(name_output) and len(name_sess):
@@ -240,7 +187,6 @@ fileID.write("condition2: "+condition2+"\n")
 fileID.write("TR: "+str(TR)+"\n")
 fileID.write("skip_vol: "+str(skip_vol)+"\n")
 fileID.write("baseline calculation: "+baseline_calculation+"\n")
-fileID.write("z-score: "+str(use_z_score)+"\n")
 fileID.write("highpass: "+str(use_highpass)+"\n")
 fileID.write("lowpass: "+str(use_lowpass)+"\n")
 fileID.write("cutoff highpass: "+str(cutoff_highpass)+"\n")
@@ -4,15 +4,14 @@ Partial volume estimation
 This scripts calculates the partial volume contribution of wm, gm and csf based on computed wm
 (wm: 1, rest: 0) and csf (wm+gm: 1, rest: 0) masks. Optionally, the masks can be deformed to an
 target epi image. Levelset images are computed and upsampled. Partial voluming in the target epi
-space is computed by counting the tissue compartments in each epi voxel using a moving-average like
-algorithm.
+space is computed by area-weighted averaging of the tissue compartments in each epi voxel.
 
 Before running the script, login to queen via ssh and set the afni environment by calling AFNI in 
 the terminal.
 
 created by Daniel Haenelt
 Date created: 02-05-2019             
-Last modified: 28-05-2020
+Last modified: 18-10-2026
 """
 import os
 import shutil as sh
@@ -143,11 +142,10 @@ nb.save(output,os.path.join(path_border,"gm.nii.gz"))
 
 # pv estimation
 name_input = ["wm", "csf", "gm"]
-for i in range(len(name_input)):
-    estimate_pv(file_target, 
-                os.path.join(path_border,name_input[i]+".nii.gz"), 
-                path_output, 
-                name_input[i])
+estimate_pv(file_target, 
+            [os.path.join(path_border,name_input[i]+".nii.gz") for i in range(len(name_input))], 
+            path_output, 
+            name_input)
 
 # clean intermediate files
 if cleanup:
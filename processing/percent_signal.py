@@ -15,15 +15,13 @@ the terminal.
 
 created by Daniel Haenelt
 Date created: 06-12-2018         
-Last modified: 28-05-2020
+Last modified: 18-10-2026
 """
 import os
 import datetime
-import numpy as np
 import nibabel as nb
-from scipy.stats import zscore
 from lib.io.get_filename import get_filename
-from lib.processing import get_onset_vols
+from lib.processing import get_block_stats
 
 # input data
 img_input = [
@@ -60,7 +58,6 @@ condition1 = "left" # experimental condition 1
 condition2 = "right" # experimental condition 2
 percent_threshold = 50 # remove unrealistic high signal values (if set > 0)
 skip_vol = 2 # skip number of volumes in each block
-use_z_score = False
 use_highpass = False
 use_lowpass = False
 TR = 3 # repetition time in s
@@ -72,7 +69,6 @@ name_output = ""
 
 # path to SPM12 folder
 pathSPM = "/data/pt_01880/source/spm12"
-pathLIB1 = "/data/hu_haenelt/projects/scripts/lib/preprocessing"
 pathLIB2 = "/data/hu_haenelt/projects/scripts/lib/processing"
 
 """ do not edit below """
@@ -92,25 +88,12 @@ data_img.header["dim"][4] = 1
 header = data_img.header
 affine = data_img.affine
 
-# get image dimension
-dim = data_img.header["dim"][1:4]
-
-# get outlier dummy array if not outlier input
-if not len(outlier_input):
-    outlier_input = np.zeros(len(img_input))
-
-mean_percent_signal1 = np.zeros(dim)
-mean_percent_signal2 = np.zeros(dim)
+file_input = []
 for i in range(len(img_input)):
     
     # get filename
     path_file, name_file, ext_file = get_filename(img_input[i])
     
-    # get condition specific onsets
-    onsets0 = get_onset_vols(cond_input[i], outlier_input[i], condition0, TR, skip_vol)
-    onsets1 = get_onset_vols(cond_input[i], outlier_input[i], condition1, TR, skip_vol)
-    onsets2 = get_onset_vols(cond_input[i], outlier_input[i], condition2, TR, skip_vol)
-
     # lowpass filter time series
     if use_lowpass:
         os.chdir(pathLIB2)
@@ -123,52 +106,21 @@ for i in range(len(img_input)):
         # change input to lowpass filtered time series
         name_file = "l" + name_file
 
-    # highpass filter time series
-    if use_highpass:
-        os.chdir(pathLIB1)
-        os.system("matlab" + \
-                  " -nodisplay -nodesktop -r " + \
-                  "\"baseline_correction(\'{0}\', {1}, {2}, \'{3}\'); exit;\"". \
-                  format(os.path.join(path_file,name_file+ext_file), TR, cutoff_highpass, pathSPM))
-
-        # change input to highpass filtered time series
-        name_file = "b" + name_file
+    file_input.append(os.path.join(path_file,name_file+ext_file))
 
-    # open baseline corrected data
-    data_img = nb.load(os.path.join(path_file,name_file+ext_file))
-    data_array = data_img.get_fdata()
-    
-    # sort volumes to conditions
-    data_condition0 = data_array[:,:,:,onsets0]
-    data_condition1 = data_array[:,:,:,onsets1]
-    data_condition2 = data_array[:,:,:,onsets2]
-    
-    # z-score
-    if use_z_score:
-        data_condition0 = zscore(data_condition0, axis=3)
-        data_condition1 = zscore(data_condition1, axis=3)
-        data_condition2 = zscore(data_condition2, axis=3)
-    
-    # mean
-    data_condition0_mean = np.mean(data_condition0, axis=3)
-    data_condition1_mean = np.mean(data_condition1, axis=3)
-    data_condition2_mean = np.mean(data_condition2, axis=3)
-    data_condition0_mean[data_condition0_mean == 0] = np.nan
-    
-    # percent signal change
-    percent_signal1 = ( data_condition1_mean - data_condition2_mean ) / data_condition0_mean * 100
-    percent_signal2 = ( data_condition2_mean - data_condition1_mean ) / data_condition0_mean * 100
-
-    percent_signal1[np.isnan(percent_signal1)] = 0
-    percent_signal2[np.isnan(percent_signal2)] = 0
+# percent signal change averaged across runs (highpass filter is applied while reading each run)
+results = get_block_stats(file_input, 
+                          cond_input, 
+                          outlier_input, 
+                          condition0=condition0, 
+                          condition1=condition1, 
+                          condition2=condition2, 
+                          TR=TR, 
+                          skip_vol=skip_vol, 
+                          cutoff_highpass=cutoff_highpass if use_highpass else None)
 
-    # sum volumes for each run
-    mean_percent_signal1 += percent_signal1
-    mean_percent_signal2 += percent_signal2
-    
-# divide by number of runs
-mean_percent_signal1 /= len(img_input)
-mean_percent_signal2 /= len(img_input)
+mean_percent_signal1 = results["psc1"]
+mean_percent_signal2 = results["psc2"]
 
 # threshold tsnr
 if percent_threshold:
@@ -209,7 +161,6 @@ fileID.write("condition2: "+condition2+"\n")
 fileID.write("percent threshold: "+str(percent_threshold)+"\n")
 fileID.write("TR: "+str(TR)+"\n")
 fileID.write("skip_vol: "+str(skip_vol)+"\n")
-fileID.write("z-score: "+str(use_z_score)+"\n")
 fileID.write("highpass: "+str(use_highpass)+"\n")
 fileID.write("lowpass: "+str(use_lowpass)+"\n")
 fileID.write("cutoff highpass: "+str(cutoff_highpass)+"\n")
@@ -6,14 +6,13 @@ time series and the overall mean are written.
 
 created by Daniel Haenelt
 Date created: 28-05-2020             
-Last modified: 28-05-2020  
+Last modified: 18-10-2026  
 """
 import os
 import datetime
-import numpy as np
 import nibabel as nb
 from lib.io.get_filename import get_filename
-from lib.utils.get_tsnr import get_tsnr
+from lib.processing import get_block_stats
 
 # input data
 img_input = [
@@ -37,10 +36,6 @@ cutoff_highpass = 270 # cutoff in s for baseline correction
 name_sess = "GE_EPI1"
 name_output = ""
 
-# path to SPM12 folder
-pathSPM = "/data/pt_01880/source/spm12"
-pathLIB = "/data/hu_haenelt/projects/scripts/lib/preprocessing"
-
 """ do not edit below """
 
 # get path from first entry
@@ -58,35 +53,22 @@ data_img.header["dim"][4] = 1
 header = data_img.header
 affine = data_img.affine
 
-# get image dimension
-dim = data_img.header["dim"][1:4]
+# tsnr of single runs and averaged across runs (highpass filter is applied while reading each run)
+results = get_block_stats(img_input, 
+                          TR=TR, 
+                          cutoff_highpass=cutoff_highpass if use_highpass else None, 
+                          tsnr_max=tsnr_threshold)
 
-mean_tsnr = np.zeros(dim)
-for i in range(len(img_input)):
+mean_tsnr = results["tsnr"]
 
-    # get filename
+# write tsnr of single runs
+for i in range(len(img_input)):
     path_file, name_file, ext_file = get_filename(img_input[i])
-    
-    # highpass filter time series
     if use_highpass:
-        os.chdir(pathLIB)
-        os.system("matlab" + \
-                  " -nodisplay -nodesktop -r " + \
-                  "\"baseline_correction(\'{0}\', {1}, {2}, \'{3}\'); exit;\"". \
-                  format(os.path.join(path_file,name_file+ext_file), TR, cutoff_highpass, pathSPM))
-
-        # change input to highpass filtered time series
         name_file = "b" + name_file
-        
-    # sum volumes for each run
-    mean_tsnr += get_tsnr(os.path.join(path_file, name_file+ext_file), 
-                          tsnr_max=tsnr_threshold,
-                          write_output=True, 
-                          path_output=path_file, 
-                          name_output=name_file)
     
-# divide by number of runs
-mean_tsnr /= len(img_input)
+    output = nb.Nifti1Image(results["tsnr_runs"][i], affine, header)
+    nb.save(output, os.path.join(path_file,"tsnr_"+name_file+ext_file))
 
 # name of output files
 if len(name_output) and len(name_sess):
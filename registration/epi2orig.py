@@ -25,7 +25,7 @@ calling FREESURFER and ANTSENV in the terminal.
 
 created by Daniel Haenelt
 Date created: 10-01-2019
-Last modified: 19-06-2020
+Last modified: 18-10-2026
 """
 import os
 import shutil as sh
@@ -36,6 +36,7 @@ from nipype.interfaces.freesurfer.preprocess import MRIConvert
 from nipype.interfaces.ants import N4BiasFieldCorrection
 from nighres.registration import embedded_antsreg, apply_coordinate_mappings
 from lib.cmap.clean_coordinate_mapping import clean_coordinate_mapping
+from lib.cmap.compose_coordinate_mapping import compose_coordinate_mapping
 from lib.cmap.expand_coordinate_mapping import expand_coordinate_mapping
 from lib.registration.get_scanner_transform import get_scanner_transform
 from lib.registration.mask_ana import mask_ana
@@ -223,32 +224,22 @@ embedded_antsreg(os.path.join(path_t1,"pT1.nii"), # source image
 merge deformations
 """
 # orig -> epi
-apply_coordinate_mappings(os.path.join(path_scanner,"orig_2_T1_scanner.nii"), # input 
-                          os.path.join(path_syn,"syn_ants-map.nii.gz"), # cmap
-                          interpolation = "linear", # nearest or linear
-                          padding = "zero", # closest, zero or max
-                          save_data = True, # save output data to file (boolean)
-                          overwrite = True, # overwrite existing results (boolean)
-                          output_dir = path_output, # output directory
-                          file_name = "orig2epi" # base name with file extension for output
-                          )
+compose_coordinate_mapping([os.path.join(path_scanner,"orig_2_T1_scanner.nii"), # first cmap
+                            os.path.join(path_syn,"syn_ants-map.nii.gz"), # second cmap
+                            ],
+                           interpolation = "linear", # nearest or linear
+                           padding = "zero", # closest or zero
+                           file_out = os.path.join(path_output,"orig2epi.nii.gz"), # output file
+                           )
 
 # epi -> orig
-apply_coordinate_mappings(os.path.join(path_syn,"syn_ants-invmap.nii.gz"), # input
-                          os.path.join(path_scanner,"T1_2_orig_scanner.nii"), # cmap
-                          interpolation = "linear", # nearest or linear
-                          padding = "zero", # closest, zero or max
-                          save_data = True, # save output data to file (boolean)
-                          overwrite = True, # overwrite existing results (boolean)
-                          output_dir = path_output, # output directory
-                          file_name = "epi2orig" # base name with file extension for output
-                          )
-
-# rename final deformations
-os.rename(os.path.join(path_output,"orig2epi_def-img.nii.gz"),
-          os.path.join(path_output,"orig2epi.nii.gz"))
-os.rename(os.path.join(path_output,"epi2orig_def-img.nii.gz"),
-          os.path.join(path_output,"epi2orig.nii.gz"))
+compose_coordinate_mapping([os.path.join(path_syn,"syn_ants-invmap.nii.gz"), # first cmap
+                            os.path.join(path_scanner,"T1_2_orig_scanner.nii"), # second cmap
+                            ],
+                           interpolation = "linear", # nearest or linear
+                           padding = "zero", # closest or zero
+                           file_out = os.path.join(path_output,"epi2orig.nii.gz"), # output file
+                           )
 
 """
 clean deformation
@@ -15,13 +15,14 @@ between MPM and MP2RAGE T1-maps. The script consists of the following steps:
 
 created by Daniel Haenelt
 Date created: 31-01-2019
-Last modified: 19-06-2020
+Last modified: 18-10-2026
 """
 import os
 import shutil as sh
 import numpy as np
 import nibabel as nb
 from nighres.registration import embedded_antsreg, apply_coordinate_mappings
+from lib.cmap.compose_coordinate_mapping import compose_coordinate_mapping
 from lib.cmap.expand_coordinate_mapping import expand_coordinate_mapping
 from lib.registration.get_scanner_transform import get_scanner_transform
 from lib.skullstrip.skullstrip_spm12 import skullstrip_spm12
@@ -178,37 +179,21 @@ embedded_antsreg(os.path.join(path_mpm,"scanner_def-img.nii.gz"), # source image
                  )
 
 # merge coordinate mappings
-apply_coordinate_mappings(os.path.join(path_deformation,"mpm_t1_2_mp2rage_t1_scanner.nii"), # input 
-                          os.path.join(path_deformation,"rigid_ants-map.nii.gz"), # first cmap
-                          mapping2 = None, # second cmap
-                          mapping3 = None, # third cmap
-                          mapping4 = None, # fourth cmap
-                          interpolation = "linear", # nearest or linear
-                          padding = "zero", # closest, zero or max
-                          save_data = True, # save output data to file (boolean)
-                          overwrite = True, # overwrite existing results (boolean)
-                          output_dir = path_output, # output directory
-                          file_name = "mpm_2_mp2rage" # base name with file extension for output
-                          )
-
-apply_coordinate_mappings(os.path.join(path_deformation,"rigid_ants-invmap.nii.gz"), # input
-                          os.path.join(path_deformation,"mp2rage_t1_2_mpm_t1_scanner.nii"), # first cmap
-                          mapping2 = None, # second cmap
-                          mapping3 = None, # third cmap
-                          mapping4 = None, # fourth cmap
-                          interpolation = "linear", # nearest or linear
-                          padding = "zero", # closest, zero or max
-                          save_data = True, # save output data to file (boolean)
-                          overwrite = True, # overwrite existing results (boolean)
-                          output_dir = path_output, # output directory
-                          file_name = "mp2rage_2_mpm" # base name with file extension for output
-                          )
-
-# rename final deformation examples
-os.rename(os.path.join(path_output,"mpm_2_mp2rage_def-img.nii.gz"),
-          os.path.join(path_output,"mpm_2_mp2rage.nii.gz"))
-os.rename(os.path.join(path_output,"mp2rage_2_mpm_def-img.nii.gz"),
-          os.path.join(path_output,"mp2rage_2_mpm.nii.gz"))
+compose_coordinate_mapping([os.path.join(path_deformation,"mpm_t1_2_mp2rage_t1_scanner.nii"), # first cmap
+                            os.path.join(path_deformation,"rigid_ants-map.nii.gz"), # second cmap
+                            ],
+                           interpolation = "linear", # nearest or linear
+                           padding = "zero", # closest or zero
+                           file_out = os.path.join(path_output,"mpm_2_mp2rage.nii.gz"), # output file
+                           )
+
+compose_coordinate_mapping([os.path.join(path_deformation,"rigid_ants-invmap.nii.gz"), # first cmap
+                            os.path.join(path_deformation,"mp2rage_t1_2_mpm_t1_scanner.nii"), # second cmap
+                            ],
+                           interpolation = "linear", # nearest or linear
+                           padding = "zero", # closest or zero
+                           file_out = os.path.join(path_output,"mp2rage_2_mpm.nii.gz"), # output file
+                           )
 
 """
 expand deformation
@@ -15,7 +15,7 @@ between MPM and MP2RAGE T1-maps. The script consists of the following steps:
 
 created by Daniel Haenelt
 Date created: 20-01-2020
-Last modified: 19-06-2020
+Last modified: 18-10-2026
 """
 import os
 import shutil as sh
@@ -23,9 +23,8 @@ import numpy as np
 import nibabel as nb
 from nipype.interfaces.fsl import FLIRT
 from nipype.interfaces.fsl import ConvertXFM
-from nipype.interfaces.fsl.preprocess import ApplyXFM
 from nighres.registration import apply_coordinate_mappings
-from lib.cmap.generate_coordinate_mapping import generate_coordinate_mapping
+from lib.cmap.compose_coordinate_mapping import compose_coordinate_mapping
 from lib.cmap.expand_coordinate_mapping import expand_coordinate_mapping
 from lib.registration.get_scanner_transform import get_scanner_transform
 from lib.skullstrip.skullstrip_spm12 import skullstrip_spm12
@@ -167,76 +166,26 @@ invt.inputs.invert_xfm = True
 invt.inputs.out_file = os.path.join(path_deformation, "flirt_inv_matrix.mat")
 invt.run()
 
-# get cmap
-generate_coordinate_mapping(os.path.join(path_mpm,"scanner_def-img.nii.gz"), 
-                            pad = 0, 
-                            path_output = path_deformation, 
-                            suffix = "source", 
-                            time = False, 
-                            write_output = True)
-
-generate_coordinate_mapping(os.path.join(path_mp2rage,"mp2rage_t1.nii"), 
-                            pad = 0, 
-                            path_output = path_deformation, 
-                            suffix = "target", 
-                            time = False, 
-                            write_output = True)
-
-# get coordinate mapping from flirt
-applyxfm = ApplyXFM()
-applyxfm.inputs.in_file = os.path.join(path_deformation, "cmap_source.nii")
-applyxfm.inputs.reference = os.path.join(path_mp2rage,"mp2rage_t1.nii")
-applyxfm.inputs.in_matrix_file = os.path.join(path_deformation, "flirt_matrix.mat")
-applyxfm.inputs.interp = "trilinear"
-applyxfm.inputs.padding_size = 0
-applyxfm.inputs.output_type = "NIFTI_GZ"
-applyxfm.inputs.out_file = os.path.join(path_deformation, "flirt.nii.gz")
-applyxfm.inputs.apply_xfm = True
-applyxfm.run() 
-
-applyxfm = ApplyXFM()
-applyxfm.inputs.in_file = os.path.join(path_deformation, "cmap_target.nii")
-applyxfm.inputs.reference = os.path.join(path_mpm,"scanner_def-img.nii.gz")
-applyxfm.inputs.in_matrix_file = os.path.join(path_deformation, "flirt_inv_matrix.mat")
-applyxfm.inputs.interp = "trilinear"
-applyxfm.inputs.padding_size = 0
-applyxfm.inputs.output_type = "NIFTI_GZ"
-applyxfm.inputs.out_file = os.path.join(path_deformation, "flirt_inv.nii.gz")
-applyxfm.inputs.apply_xfm = True
-applyxfm.run()
-
-# merge coordinate mappings
-apply_coordinate_mappings(os.path.join(path_deformation,"mpm_t1_2_mp2rage_t1_scanner.nii"), # input 
-                          os.path.join(path_deformation,"flirt.nii.gz"), # first cmap
-                          mapping2 = None, # second cmap
-                          mapping3 = None, # third cmap
-                          mapping4 = None, # fourth cmap
-                          interpolation = "linear", # nearest or linear
-                          padding = "zero", # closest, zero or max
-                          save_data = True, # save output data to file (boolean)
-                          overwrite = True, # overwrite existing results (boolean)
-                          output_dir = path_output, # output directory
-                          file_name = "mpm_2_mp2rage" # base name with file extension for output
-                          )
-
-apply_coordinate_mappings(os.path.join(path_deformation,"flirt_inv.nii.gz"), # input 
-                          os.path.join(path_deformation,"mp2rage_t1_2_mpm_t1_scanner.nii"), # first cmap
-                          mapping2 = None, # second cmap
-                          mapping3 = None, # third cmap
-                          mapping4 = None, # fourth cmap
-                          interpolation = "linear", # nearest or linear
-                          padding = "zero", # closest, zero or max
-                          save_data = True, # save output data to file (boolean)
-                          overwrite = True, # overwrite existing results (boolean)
-                          output_dir = path_output, # output directory
-                          file_name = "mp2rage_2_mpm" # base name with file extension for output
-                          )
-
-# rename final deformation examples
-os.rename(os.path.join(path_output,"mpm_2_mp2rage_def-img.nii.gz"),
-          os.path.join(path_output,"mpm_2_mp2rage.nii.gz"))
-os.rename(os.path.join(path_output,"mp2rage_2_mpm_def-img.nii.gz"),
-          os.path.join(path_output,"mp2rage_2_mpm.nii.gz"))
+# merge coordinate mappings with flirt transformation
+compose_coordinate_mapping([os.path.join(path_deformation,"mpm_t1_2_mp2rage_t1_scanner.nii"), # first cmap
+                            (os.path.join(path_deformation,"flirt_matrix.mat"), # flirt matrix
+                             os.path.join(path_mpm,"scanner_def-img.nii.gz"), # flirt input
+                             os.path.join(path_mp2rage,"mp2rage_t1.nii")), # flirt reference
+                            ],
+                           interpolation = "linear", # nearest or linear
+                           padding = "zero", # closest or zero
+                           file_out = os.path.join(path_output,"mpm_2_mp2rage.nii.gz"), # output file
+                           )
+
+compose_coordinate_mapping([(os.path.join(path_deformation,"flirt_inv_matrix.mat"), # flirt matrix
+                             os.path.join(path_mp2rage,"mp2rage_t1.nii"), # flirt input
+                             os.path.join(path_mpm,"scanner_def-img.nii.gz")), # flirt reference
+                            os.path.join(path_deformation,"mp2rage_t1_2_mpm_t1_scanner.nii"), # second cmap
+                            ],
+                           interpolation = "linear", # nearest or linear
+                           padding = "zero", # closest or zero
+                           file_out = os.path.join(path_output,"mp2rage_2_mpm.nii.gz"), # output file
+                           )
 
 """
 expand deformation
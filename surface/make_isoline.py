@@ -17,7 +17,7 @@ The script consists of the following steps:
 
 created by Daniel Haenelt
 Date created: 15-02-2019
-Last modified: 05-03-2019
+Last modified: 18-10-2026
 """
 import os
 import numpy as np
@@ -26,6 +26,7 @@ import matplotlib.pyplot as plt
 from nibabel.freesurfer.io import read_geometry
 from scipy.interpolate import griddata
 from lib.mapping.map2grid import map2grid
+from lib.utils.gaussian_filter_edge import gaussian_filter_edge
 
 # input
 input_white = "/data/pt_01880/V2STRIPES/p6/anatomy/dense/rh.white"
@@ -43,28 +44,13 @@ max_distance = 1 # maximal considered between vertex distance
 
 """ do not edit below """
 
-def gaussian_filter_edge(U, sigma):
-    """
-    This function calculates a Gaussian filter considering the voxels set to NaN ouside the grid.
-    """
-    from scipy.ndimage.filters import gaussian_filter
-    
-    V = U.copy()
-    V[U!=U] = 0
-    VV = gaussian_filter(V,sigma)
-
-    W = 0*U.copy()+1
-    W[U!=U] = 0
-    WW = gaussian_filter(W,sigma)
-
-    return VV/WW
-
 # make output folder
 if not os.path.exists(path_output):
     os.mkdir(path_output)
 
 # load phase, cmap and mask
 phase = map2grid(input_cmap, input_phase, 0, path_output, overwrite=False)
+phase_old = phase.copy() # unmasked phase for plot
 cmap = nb.load(input_cmap).get_fdata()
 mask = nb.load(input_mask).get_fdata()
 mask[mask==0] = np.NaN
@@ -158,9 +144,6 @@ nb.save(output, os.path.join(path_output,hemi+"."+name_patch+".iso_distance.nii"
 Plot: Contours overlaid on grid
 """
 
-# load phase
-phase_old = map2grid(input_cmap, input_phase, 0, path_output, overwrite=False)
-
 # get contour lines
 x1 = np.ceil(np.nanmin(phase))
 x2 = np.floor(np.nanmax(phase))
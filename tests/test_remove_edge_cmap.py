@@ -0,0 +1,58 @@
+import itertools
+import numpy as np
+import nibabel as nb
+from lib.cmap.remove_edge_cmap import remove_edge_cmap
+
+
+def remove_edge_cmap_reference(cmap_array, edge_threshold, min_threshold):
+    """
+    Explicit per-voxel reference of remove_edge_cmap. Each voxel is compared to all neighbours of
+    its 18-connected neighbourhood within the volume (same cmap dimension).
+    """
+    cmap_array = cmap_array.copy()
+    offset = [o for o in itertools.product([-1,0,1], repeat=3) if 0 < np.sum(np.abs(o)) < 3]
+    assert len(offset) == 18
+
+    nx, ny, nz, nd = np.shape(cmap_array)
+    edge_array = np.zeros_like(cmap_array, dtype=bool)
+    for x, y, z, d in itertools.product(range(nx), range(ny), range(nz), range(nd)):
+        if cmap_array[x,y,z,d] == 0:
+            continue
+        for o in offset:
+            xn, yn, zn = x + o[0], y + o[1], z + o[2]
+            if not (0 <= xn < nx and 0 <= yn < ny and 0 <= zn < nz):
+                continue
+            if np.abs(cmap_array[x,y,z,d] - cmap_array[xn,yn,zn,d]) > edge_threshold:
+                edge_array[x,y,z,d] = True
+
+    cmap_array[edge_array] = 0
+    cmap_array[np.isnan(cmap_array)] = 0
+
+    # mask and min threshold
+    mask_array = np.all(cmap_array[:,:,:,:3] != 0, axis=3)
+    min_array = np.any(cmap_array[:,:,:,:3] >= min_threshold, axis=3)
+    cmap_array[~(mask_array & min_array)] = 0
+
+    return cmap_array
+
+
+def test_remove_edge_cmap(tmp_path):
+    rng = np.random.default_rng(0)
+
+    # smooth cmap with random jumps, zero background and a nan voxel
+    cmap_array = np.stack(np.meshgrid(np.arange(9), np.arange(8), np.arange(7), indexing="ij"),
+                          axis=3).astype(np.float64) + 5
+    cmap_array += rng.normal(0, 2, np.shape(cmap_array))
+    cmap_array[rng.random(np.shape(cmap_array)) < 0.05] += 20
+    cmap_array[:2,:,:,:] = 0
+    cmap_array[5,4,3,1] = np.nan
+
+    file_cmap = str(tmp_path / "cmap.nii")
+    nb.save(nb.Nifti1Image(cmap_array, np.eye(4)), file_cmap)
+
+    remove_edge_cmap(file_cmap, edge_threshold=5, min_threshold=5)
+    res = nb.load(str(tmp_path / "cmap_edge.nii")).get_fdata()
+
+    ref = remove_edge_cmap_reference(cmap_array, 5, 5)
+    assert np.any(ref != cmap_array)
+    np.testing.assert_array_equal(res, ref)